@@ -0,0 +1,15 @@
+"""
+asgi.py
+───────
+Pro-Rooms ASGI entry-point.
+
+    uvicorn asgi:application --workers 4 --port 5000
+
+The Google OAuth callback runs natively async (httpx + asyncpg); all other
+routes are served by the Flask app in app.py. See rooms/asgi.py.
+"""
+
+from app import app
+from rooms.asgi import create_asgi_app
+
+application = create_asgi_app(app)
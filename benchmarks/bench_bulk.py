@@ -0,0 +1,106 @@
+"""
+benchmarks/bench_bulk.py
+────────────────────────
+Bulk import/export throughput (rows/sec) for NDJSON and CSV, comparing
+PostgreSQL COPY with the executemany fallback.
+
+    DATABASE_URL=postgresql+psycopg2://.../rooms_bench \\
+        python benchmarks/bench_bulk.py --rows 100000
+
+⚠️  The rooms table of the target database is TRUNCATED between runs;
+point DATABASE_URL at a scratch database.
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app                                   # noqa: E402
+from rooms.db.migrate import upgrade                  # noqa: E402
+from rooms.Models import db, Room                     # noqa: E402
+from rooms.bulk import COLUMNS, export_rooms, import_rooms   # noqa: E402
+
+
+def records(n):
+    for i in range(n):
+        yield {
+            "name": f"Bench Room {i}",
+            "description": f"Synthetic room number {i} for the bulk benchmark",
+            "whatsapp_link": f"https://chat.whatsapp.com/bench{i}",
+            "password": f"{i % 1000000:06d}",
+            "created_at": f"2024-01-01T00:00:{i % 60:02d}",
+        }
+
+
+def write_payload(fmt, n, path):
+    """Write the input file outside the timed section."""
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        if fmt == "csv":
+            writer = csv.DictWriter(f, fieldnames=COLUMNS)
+            writer.writeheader()
+            writer.writerows(records(n))
+        else:
+            f.writelines(json.dumps(r) + "\n" for r in records(n))
+
+
+def reset():
+    db.session.execute(db.delete(Room))
+    db.session.commit()
+
+
+def timed(fn, trace_memory):
+    """Run `fn`; return (result, seconds, peak traced bytes or None)."""
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    peak = None
+    if trace_memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def report(label, rows, elapsed, peak):
+    memory = f"  peak {peak / 2**20:6.1f} MiB" if peak is not None else ""
+    print(f"{label:<28} {rows:>9} rows  {rows / elapsed:>10,.0f} rows/s{memory}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows",       type=int, default=50_000)
+    parser.add_argument("--batch-size", type=int, default=5_000)
+    parser.add_argument("--memory", action="store_true",
+                        help="also report peak Python memory (tracemalloc slows the run)")
+    args = parser.parse_args()
+
+    with app.app_context():
+        upgrade(db.engine)
+        is_pg = db.engine.dialect.name == "postgresql"
+        methods = [("copy", True), ("executemany", False)] if is_pg else [("executemany", False)]
+
+        for fmt in ("ndjson", "csv"):
+            path = os.path.join(tempfile.gettempdir(), f"rooms-bench.{fmt}")
+            write_payload(fmt, args.rows, path)
+            for label, use_copy in methods:
+                reset()
+                with open(path, encoding="utf-8", newline="") as f:
+                    summary, elapsed, peak = timed(lambda: import_rooms(
+                        f, fmt, batch_size=args.batch_size, use_copy=use_copy), args.memory)
+                report(f"import {fmt}/{label}", summary["imported"], elapsed, peak)
+            os.remove(path)
+            _, elapsed, peak = timed(lambda: sum(len(c) for c in export_rooms(fmt)), args.memory)
+            report(f"export {fmt}", args.rows, elapsed, peak)
+        reset()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+benchmarks/bench_joins.py
+─────────────────────────
+Counting room joins, database side:
+
+    per-join   one upsert of the room's hourly row per join, in its own
+               transaction – popular rooms' rows become lock hot spots
+    buffered   record_join(): counted in memory, flushed as one batched
+               upsert per room (rooms/analytics.py)
+
+--joins attempts from --threads callers, skewed towards a few rooms
+(a --hot share of them hit --hot-rooms rooms). Reports joins/s, sessions
+waiting on row locks (sampled) and WAL written, the flush included.
+
+    DATABASE_URL=postgresql+psycopg2://.../rooms_bench \\
+        python benchmarks/bench_joins.py --joins 20000 --threads 8
+
+⚠️  room_stats is TRUNCATED before each run.
+"""
+
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app                                          # noqa: E402
+from rooms.analytics import UPSERT_JOIN_STATS, hour_bucket, record_join, room_stats   # noqa: E402
+from rooms.db.migrate import upgrade                         # noqa: E402
+from rooms.jobs import job_queues                            # noqa: E402
+from rooms.Models import db                                  # noqa: E402
+
+
+def per_join(room_id, ok):
+    db.session.execute(db.text(UPSERT_JOIN_STATS), {
+        "bucket": hour_bucket(datetime.utcnow()), "ids": [room_id],
+        "joins": [int(ok)], "failed": [int(not ok)],
+    })
+    db.session.commit()
+
+
+def buffered(room_id, ok):
+    record_join(room_id, ok)
+
+
+def attempts(n, room_ids, hot, hot_rooms, seed=1):
+    rng = random.Random(seed)
+    hottest = room_ids[:hot_rooms]
+    return [(rng.choice(hottest) if rng.random() < hot else rng.choice(room_ids), rng.random() < 0.9)
+            for _ in range(n)]
+
+
+def wal_position():
+    lsn = db.session.execute(db.text("SELECT pg_current_wal_lsn()")).scalar()
+    db.session.commit()
+    return lsn
+
+
+def run(fn, work, threads):
+    def timed(item):
+        with app.app_context():
+            fn(*item)
+
+    db.session.execute(db.text("TRUNCATE room_stats"))
+    db.session.commit()
+    wal_before = wal_position()
+    lock_waits = []
+    sampler = threading.Thread(target=_sample_lock_waits, args=(lock_waits,))
+    sampler.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(timed, work))
+    seconds = time.perf_counter() - start
+    lock_waits.append(None)                  # stop the sampler
+    sampler.join()
+    job_queues().local.drain()               # the buffered flush counts too
+    wal = db.session.execute(db.text("SELECT pg_wal_lsn_diff(:a, :b)"),
+                             {"a": wal_position(), "b": wal_before}).scalar()
+    return {
+        "joins_per_s": len(work) / seconds,
+        "lock_waiters_avg": sum(lock_waits) / max(len(lock_waits), 1),
+        "wal_kib": float(wal) / 1024,
+        "stored": db.session.execute(db.text("SELECT coalesce(sum(joins + failed_joins), 0) FROM room_stats")).scalar(),
+    }
+
+
+def _sample_lock_waits(samples):
+    """Sessions blocked on a lock, sampled every 10 ms until a None is appended."""
+    with app.app_context():
+        while not samples or samples[-1] is not None:
+            samples.append(db.session.execute(db.text(
+                "SELECT count(*) FROM pg_stat_activity WHERE wait_event_type = 'Lock'")).scalar())
+            db.session.commit()
+            time.sleep(0.01)
+        samples.pop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--joins",     type=int,   default=20000)
+    parser.add_argument("--threads",   type=int,   default=8)
+    parser.add_argument("--hot",       type=float, default=0.8, help="share of attempts on hot rooms")
+    parser.add_argument("--hot-rooms", type=int,   default=5)
+    args = parser.parse_args()
+
+    with app.app_context():
+        upgrade(db.engine)
+        room_ids = list(db.session.execute(db.text("SELECT id FROM rooms ORDER BY id LIMIT 1000")).scalars())
+        if not room_ids:
+            sys.exit("❌ No rooms to join; seed some first (benchmarks/suite.py or flask rooms import).")
+        work = attempts(args.joins, room_ids, args.hot, args.hot_rooms)
+
+        print(f"{args.joins} join attempts, {args.threads} threads, "
+              f"{args.hot:.0%} on {args.hot_rooms} of {len(room_ids)} rooms")
+        for label, fn in (("per-join", per_join), ("buffered", buffered)):
+            r = run(fn, work, args.threads)
+            print(f"  {label:<9} {r['joins_per_s']:>9,.0f} joins/s  {r['lock_waiters_avg']:5.2f} waiting on locks"
+                  f"  {r['wal_kib']:>8,.0f} KiB WAL  ({r['stored']:,} attempts stored)")
+        stats = room_stats().stats()
+        print(f"  recorded in memory: {stats['joins']:,} ok, {stats['failed_joins']:,} failed")
+
+
+if __name__ == "__main__":
+    main()
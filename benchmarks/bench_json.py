@@ -0,0 +1,121 @@
+"""
+benchmarks/bench_json.py
+────────────────────────
+Room API serialization throughput at --rooms rows (default 10 000):
+
+    load        ORM instances + Room.to_dict   vs  projected tuples + Room.rows_to_dicts
+    encode      Flask's stdlib provider        vs  FastJSONProvider (orjson, if installed)
+    compress    gzip / brotli at the configured levels: ratio and time
+
+    DATABASE_URL=postgresql+psycopg2://.../rooms_bench \\
+        python benchmarks/bench_json.py --rooms 10000 --repeat 5
+
+⚠️  The rooms table of the target database is TRUNCATED and re-seeded;
+point DATABASE_URL at a scratch database.
+"""
+
+import argparse
+import io
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask.json.provider import DefaultJSONProvider   # noqa: E402
+from sqlalchemy import select                         # noqa: E402
+
+from app import app                                   # noqa: E402
+from rooms.db.migrate import upgrade                  # noqa: E402
+from rooms.Models import db, Room                     # noqa: E402
+from rooms.serialization import Compressor, FastJSONProvider   # noqa: E402
+
+
+def seed(n):
+    """Replace the rooms table with `n` synthetic rooms."""
+    base = datetime(2024, 1, 1)
+    db.session.execute(db.delete(Room))
+    db.session.commit()
+    buf = io.StringIO("".join(
+        f"Room {i}\tA study group for topic {i % 97} with weekly calls\t"
+        f"https://chat.whatsapp.com/bench{i}\t123456\t\\N\t{base + timedelta(seconds=i)}\n"
+        for i in range(n)
+    ))
+    conn = db.engine.raw_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.copy_expert("COPY rooms (name, description, whatsapp_link, password,"
+                            " creator_id, created_at) FROM STDIN", buf)
+            cur.execute("ANALYZE rooms")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def timed(fn, repeat):
+    """(median seconds, last result) of `repeat` calls."""
+    timings, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+        db.session.expunge_all()
+    return statistics.median(timings), result
+
+
+def orm_dicts(n):
+    rooms = Room.query.order_by(Room.created_at.desc(), Room.id.desc()).limit(n).all()
+    return [room.to_dict() for room in rooms]
+
+
+def projected_dicts(n, native):
+    stmt = select(*Room.api_columns()).order_by(Room.created_at.desc(), Room.id.desc()).limit(n)
+    return Room.rows_to_dicts(db.session.execute(stmt).all(), native_datetimes=native)
+
+
+def report(label, seconds, n, extra=""):
+    print(f"  {label:<34} {seconds * 1000:8.1f} ms  {n / seconds:>11,.0f} rows/s{extra}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rooms",  type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    n = args.rooms
+
+    with app.app_context():
+        upgrade(db.engine)
+        seed(n)
+        stdlib, fast = DefaultJSONProvider(app), FastJSONProvider(app)
+
+        print(f"load {n} rooms")
+        orm_s, rows_iso   = timed(lambda: orm_dicts(n), args.repeat)
+        proj_s, _         = timed(lambda: projected_dicts(n, False), args.repeat)
+        native_s, rows_dt = timed(lambda: projected_dicts(n, True), args.repeat)
+        report("ORM + to_dict", orm_s, n)
+        report("projected tuples", proj_s, n, f"  ×{orm_s / proj_s:.1f}")
+        report("projected, native datetimes", native_s, n, f"  ×{orm_s / native_s:.1f}")
+
+        print(f"encode {n} rooms")
+        std_s, body = timed(lambda: stdlib.response(rows_iso).get_data(), args.repeat)
+        fast_s, fast_body = timed(lambda: fast.response(rows_dt).get_data(), args.repeat)
+        report("stdlib provider", std_s, n)
+        report(f"fast provider ({'orjson' if fast.orjson else 'stdlib fallback'})", fast_s, n,
+               f"  ×{std_s / fast_s:.1f}")
+        report("end to end: ORM + stdlib", orm_s + std_s, n)
+        report("end to end: projected + fast", native_s + fast_s, n,
+               f"  ×{(orm_s + std_s) / (native_s + fast_s):.1f}")
+
+        print(f"compress {len(body):,} bytes")
+        compressor = Compressor(0, app.config["COMPRESS_GZIP_LEVEL"],
+                                app.config["COMPRESS_BROTLI_QUALITY"])
+        for encoding in compressor.encodings:
+            seconds, data = timed(lambda: compressor.compress(fast_body, encoding), args.repeat)
+            report(encoding, seconds, n, f"  {len(data):>9,} B ({len(data) / len(body):.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+benchmarks/bench_passwords.py
+─────────────────────────────
+Logins/sec per core for each password-hashing cost setting, plus the
+aggregate rate through the bounded hashing pool, to size SCRYPT_N /
+PBKDF2_ITERATIONS / ARGON2_* and PASSWORD_HASH_WORKERS.
+
+    python benchmarks/bench_passwords.py --seconds 2
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rooms.passwords import PasswordHasher, argon2   # noqa: E402
+
+SETTINGS = [
+    ("scrypt n=2^13",        dict(scheme="scrypt", scrypt_n=2**13)),
+    ("scrypt n=2^14",        dict(scheme="scrypt", scrypt_n=2**14)),
+    ("scrypt n=2^15",        dict(scheme="scrypt", scrypt_n=2**15)),
+    ("scrypt n=2^16",        dict(scheme="scrypt", scrypt_n=2**16)),
+    ("pbkdf2 100k",          dict(scheme="pbkdf2_sha256", pbkdf2_iterations=100_000)),
+    ("pbkdf2 300k",          dict(scheme="pbkdf2_sha256", pbkdf2_iterations=300_000)),
+    ("pbkdf2 600k",          dict(scheme="pbkdf2_sha256", pbkdf2_iterations=600_000)),
+]
+if argon2 is not None:
+    SETTINGS += [
+        ("argon2 t=2 m=64MiB", dict(scheme="argon2", argon2_time_cost=2)),
+        ("argon2 t=3 m=64MiB", dict(scheme="argon2", argon2_time_cost=3)),
+    ]
+
+
+def rate(fn, seconds, threads=1):
+    """Calls per second of `fn` from `threads` concurrent callers."""
+    deadline = time.perf_counter() + seconds
+
+    def loop():
+        n = 0
+        while time.perf_counter() < deadline:
+            fn()
+            n += 1
+        return n
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        total = sum(pool.map(lambda _: loop(), range(threads)))
+    return total / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    print(f"{'setting':<20} | {'logins/s/core':>13} | {'logins/s pool x' + str(args.workers):>18}")
+    for label, kwargs in SETTINGS:
+        hasher  = PasswordHasher(workers=args.workers, **kwargs)
+        encoded = hasher.hash("correct horse battery staple")
+        single  = rate(lambda: hasher._verify("correct horse battery staple", encoded), args.seconds)
+        pooled  = rate(lambda: hasher.verify("correct horse battery staple", encoded),
+                       args.seconds, threads=args.workers * 2)
+        print(f"{label:<20} | {single:>13.1f} | {pooled:>18.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+benchmarks/bench_ratelimit.py
+─────────────────────────────
+Per-request cost of the rate limiter: one `check()` as made by
+/api/rooms/join (three buckets), for a hot key set and for a key space
+larger than RATELIMIT_MAX_KEYS (constant eviction).
+
+    python benchmarks/bench_ratelimit.py
+    python benchmarks/bench_ratelimit.py --redis-url redis://localhost:6379/0
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rooms.ratelimit import MemoryBuckets, RateLimiter, RedisBuckets   # noqa: E402
+
+RULES = {"join_user": "1000000/second", "join_ip": "1000000/second",
+         "join_room": "1000000/second"}
+
+
+def run(limiter, n, keys):
+    start = time.perf_counter()
+    for i in range(n):
+        k = i % keys
+        limiter.check(("join_user", k), ("join_ip", k), ("join_room", k))
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests",  type=int, default=200_000)
+    parser.add_argument("--max-keys",  type=int, default=100_000)
+    parser.add_argument("--redis-url", default="")
+    args = parser.parse_args()
+
+    backends = [("memory", lambda: MemoryBuckets(args.max_keys))]
+    if args.redis_url:
+        backends.append(("redis", lambda: RedisBuckets(args.redis_url, MemoryBuckets(args.max_keys))))
+
+    for name, make in backends:
+        n = args.requests if name == "memory" else args.requests // 20
+        for label, keys in (("hot keys", 100), ("evicting", args.max_keys * 2)):
+            limiter = RateLimiter(RULES, make())
+            print(f"{name:<7} {label:<9} {run(limiter, n, keys):8.2f} µs/request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+benchmarks/bench_render.py
+──────────────────────────
+Dashboard render time with N room cards, and template compile time per
+worker, in-process (no database, no HTTP):
+
+    inline      the card markup inside the index.html loop (before)
+    cold        room_card() with an empty fragment cache (first render)
+    fragments   room_card() with every card cached (steady state)
+
+    compile     every template compiled from source, vs loaded from a
+                warm bytecode cache (what a new worker pays)
+
+    python benchmarks/bench_render.py --rooms 1000,10000 --repeat 5
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rooms.Config import Config                     # noqa: E402
+from rooms.factory import create_app                # noqa: E402
+from rooms.templating import CARD_TEMPLATE, FragmentCache, warm_templates   # noqa: E402
+
+
+class RoomList(list):
+    next_cursor = None
+
+
+def rooms(n):
+    base = datetime(2024, 1, 1)
+    return RoomList({"id": i, "name": f"Room {i}", "description": f"A study group for topic {i % 97}",
+                     "created_at": (base + timedelta(seconds=i)).isoformat(), "creator_id": 1,
+                     "updated_at": None} for i in range(n, 0, -1))
+
+
+def make_app(**settings):
+    class BenchConfig(Config):
+        pass
+    for key, value in settings.items():
+        setattr(BenchConfig, key, value)
+    return create_app(BenchConfig)
+
+
+def inline_template(app):
+    """index.html as it was: the card markup in the loop."""
+    loader = app.jinja_env.loader
+    index, _, _ = loader.get_source(app.jinja_env, "index.html")
+    card, _, _  = loader.get_source(app.jinja_env, CARD_TEMPLATE)
+    return app.jinja_env.from_string(index.replace("{{ room_card(room) }}", card))
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def bench_render(app, n, repeat):
+    context = {"rooms": rooms(n), "page_size": 50, "live_feed": False, "feed_poll_ms": 30000, "feed_retry_ms": 3000}
+    with app.test_request_context("/dashboard"):
+        app.update_template_context(context)
+        inline = inline_template(app)
+        index  = app.jinja_env.get_template("index.html")
+        assert index.render(context) == index.render(context)
+
+        def cold():
+            app.extensions["fragments"] = FragmentCache(app.jinja_env, max_entries=n)
+            index.render(context)
+
+        results = {"inline": timed(lambda: inline.render(context), repeat), "cold": timed(cold, repeat)}
+        app.extensions["fragments"] = FragmentCache(app.jinja_env, max_entries=n)
+        index.render(context)
+        results["fragments"] = timed(lambda: index.render(context), repeat)
+    return results
+
+
+def bench_compile(repeat):
+    with tempfile.TemporaryDirectory() as directory:
+        source = timed(lambda: warm_templates(make_app(JINJA_BYTECODE_CACHE=False)), repeat)
+        warm_templates(make_app(JINJA_BYTECODE_DIR=directory))
+        cached = timed(lambda: warm_templates(make_app(JINJA_BYTECODE_DIR=directory)), repeat)
+    return source, cached
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rooms",  default="1000,10000", help="comma-separated card counts")
+    parser.add_argument("--repeat", type=int, default=5, help="median of N renders")
+    args = parser.parse_args()
+
+    app = make_app(JINJA_BYTECODE_CACHE=False)
+    print(f"dashboard render, median of {args.repeat}")
+    for n in (int(r) for r in args.rooms.split(",")):
+        r = bench_render(app, n, args.repeat)
+        print(f"  {n:>6,} rooms  inline {r['inline']:8.1f} ms   cold {r['cold']:8.1f} ms"
+              f"   fragments {r['fragments']:8.1f} ms   ×{r['inline'] / r['fragments']:.1f}")
+
+    source, cached = bench_compile(args.repeat)
+    print(f"compile all templates  from source {source:6.1f} ms   from bytecode cache {cached:6.1f} ms"
+          f"   (app creation included)")
+
+
+if __name__ == "__main__":
+    main()
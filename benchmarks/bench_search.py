@@ -0,0 +1,111 @@
+"""
+benchmarks/bench_search.py
+──────────────────────────
+Room search latency: legacy leading-wildcard ILIKE vs the configured
+search backend, at several table sizes.
+
+    DATABASE_URL=postgresql+psycopg2://.../rooms_bench \\
+        python benchmarks/bench_search.py --sizes 10000,100000,1000000
+
+⚠️  The rooms table of the target database is TRUNCATED and re-seeded;
+point DATABASE_URL at a scratch database.
+"""
+
+import argparse
+import io
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app                                   # noqa: E402
+from rooms.db.migrate import upgrade                  # noqa: E402
+from rooms.Models import db, Room                     # noqa: E402
+from rooms.search import search_backend               # noqa: E402
+
+TOPICS = (
+    "python java rust golang data science machine learning web design "
+    "devops cloud startup founders india remote jobs interview prep "
+    "students college hackathon open source android ios flutter react"
+).split()
+# Long-tail filler so topic words have realistic selectivity.
+FILLER = [f"{a}{b}{c}" for a in "bcdfgklmnprstvz" for b in "aeiou" for c in "lmnrstx"]
+QUERIES = ["pyth", "data sci", "rust", "open source", "hackath", "remote jobs", "zzz"]
+
+
+def seed(n):
+    """Replace the rooms table with `n` synthetic rooms."""
+    rng  = random.Random(42)
+    base = datetime(2024, 1, 1)
+    rows = (
+        (" ".join(rng.sample(TOPICS, 2) + rng.sample(FILLER, 1)).title(),
+         " ".join(rng.choices(TOPICS, k=2) + rng.choices(FILLER, k=10)),
+         "https://chat.whatsapp.com/bench", "123456", None,
+         base + timedelta(seconds=i))
+        for i in range(n)
+    )
+    db.session.execute(db.delete(Room))
+    db.session.commit()
+    if db.engine.dialect.name == "postgresql":
+        buf = io.StringIO("".join(
+            "\t".join("\\N" if v is None else str(v) for v in r) + "\n" for r in rows))
+        conn = db.engine.raw_connection()
+        try:
+            with conn.cursor() as cur:
+                cur.copy_expert(
+                    "COPY rooms (name, description, whatsapp_link, password,"
+                    " creator_id, created_at) FROM STDIN", buf)
+                cur.execute("ANALYZE rooms")
+            conn.commit()
+        finally:
+            conn.close()
+    else:
+        cols = ("name", "description", "whatsapp_link", "password",
+                "creator_id", "created_at")
+        db.session.execute(db.insert(Room), [dict(zip(cols, r)) for r in rows])
+        db.session.commit()
+
+
+def ilike_search(text, limit):
+    return [r.id for r in
+            Room.query.filter(Room.name.ilike(f"%{text}%") |
+                              Room.description.ilike(f"%{text}%"))
+                      .order_by(Room.created_at.desc()).limit(limit)]
+
+
+def measure(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        for q in QUERIES:
+            start = time.perf_counter()
+            fn(q, 50)
+            timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes",  default="10000,100000,1000000")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with app.app_context():
+        upgrade(db.engine)
+        backend_cls = type(search_backend())
+        print(f"{'rooms':>9} | {'ILIKE p50/p95 ms':>18} | {backend_cls.name + ' p50/p95 ms':>20}")
+        for n in (int(s) for s in args.sizes.split(",")):
+            seed(n)
+            backend = backend_cls()        # fresh instance: bulk seeding bypasses ORM events
+            backend.search("warmup", 1)    # builds the in-memory index, if any
+            ilike = measure(ilike_search, args.repeat)
+            fts   = measure(backend.search, args.repeat)
+            print(f"{n:>9} | {ilike[0]:>8.2f} / {ilike[1]:>7.2f} | {fts[0]:>9.2f} / {fts[1]:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+benchmarks/bench_sessions.py
+────────────────────────────
+Per-request session overhead and cookie size: Flask's signed cookie
+sessions vs the server-side backends in rooms/sessions.py.
+
+Three request shapes per backend, after one logged-in request:
+    untouched – route never reads `session` (static-like)
+    read      – route reads session["account_id"] (typical API call)
+    write     – route updates the session (flash / login)
+
+    python benchmarks/bench_sessions.py --requests 5000
+    python benchmarks/bench_sessions.py --redis-url redis://localhost:6379/0
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import session                              # noqa: E402
+from flask.sessions import SecureCookieSessionInterface   # noqa: E402
+
+from app import app                                    # noqa: E402
+from rooms.sessions import ServerSideSessionInterface, make_session_store, user_profile   # noqa: E402
+
+
+@app.route("/_bench/untouched")
+def bench_untouched():
+    return "ok"
+
+
+@app.route("/_bench/read")
+def bench_read():
+    return str(session.get("account_id"))
+
+
+@app.route("/_bench/write")
+def bench_write():
+    session["hits"] = session.get("hits", 0) + 1
+    return "ok"
+
+
+@app.route("/_bench/login")
+def bench_login():
+    session["account_id"]  = 1
+    session["user_email"]  = "someone.with.a.long.address@example.com"
+    session["is_new_user"] = False
+    session["profile"]     = user_profile(1, "someone.with.a.long.address@example.com",
+                                          "Some One", "https://lh3.googleusercontent.com/a/" + "x" * 80)
+    return "ok"
+
+
+def interfaces(args):
+    yield "cookie", SecureCookieSessionInterface()
+    ttl = app.permanent_session_lifetime.total_seconds()
+    backends = {"SESSION_BACKEND": "memory", "SESSION_MAX_ENTRIES": 10_000}
+    yield "memory", ServerSideSessionInterface(make_session_store(backends, ttl), ttl)
+    with tempfile.TemporaryDirectory() as directory:
+        config = {"SESSION_BACKEND": "filesystem", "SESSION_FILE_DIR": directory}
+        yield "filesystem", ServerSideSessionInterface(make_session_store(config, ttl), ttl)
+    if args.redis_url:
+        config = {"SESSION_BACKEND": "redis", "SESSION_REDIS_URL": args.redis_url}
+        yield "redis", ServerSideSessionInterface(make_session_store(config, ttl), ttl)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests",  type=int, default=3000)
+    parser.add_argument("--redis-url", default="")
+    args = parser.parse_args()
+
+    cookie_name = app.config["SESSION_COOKIE_NAME"]
+    for name, interface in interfaces(args):
+        app.session_interface = interface
+        client = app.test_client()
+        client.get("/_bench/login")
+        cookie = client.get_cookie(cookie_name).value
+        timings = {}
+        for shape in ("untouched", "read", "write"):
+            start = time.perf_counter()
+            for _ in range(args.requests):
+                client.get(f"/_bench/{shape}")
+            timings[shape] = (time.perf_counter() - start) / args.requests * 1e6
+        print(f"{name:<11} cookie {len(cookie):>4} B   "
+              + "   ".join(f"{shape} {us:7.1f} µs" for shape, us in timings.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+benchmarks/bench_signin.py
+──────────────────────────
+Returning-user Google sign-in throughput, database side of the callback:
+
+    before   every sign-in rewrites last_login, name and picture in its
+             own transaction (the statement up to user-020, kept below)
+    after    GOOGLE_SIGN_IN skips the unchanged profile, and last_login
+             is buffered and flushed in batches (record_sign_in)
+
+--accounts Google accounts are seeded, then each signs in --rounds times
+from --threads concurrent callers. Reports sign-ins/s, latency, rows
+updated and WAL written (the flush included).
+
+    DATABASE_URL=postgresql+psycopg2://.../rooms_bench \\
+        python benchmarks/bench_signin.py --accounts 1000 --rounds 5 --threads 8
+
+⚠️  Accounts named bench-signin-* are deleted and re-created.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app                                                   # noqa: E402
+from rooms.db.migrate import upgrade                                  # noqa: E402
+from rooms.identity import GOOGLE_SIGN_IN, google_sign_in, google_sign_in_params   # noqa: E402
+from rooms.jobs import job_queues                                     # noqa: E402
+from rooms.Models import db                                           # noqa: E402
+
+STATS_SETTLE = 1.5
+
+BEFORE_SIGN_IN = """
+    WITH cred AS (
+        SELECT account_id FROM credentials
+         WHERE provider = 'google' AND subject = :sub
+    ),
+    linked AS (
+        SELECT id AS account_id FROM accounts
+         WHERE lower(email) = lower(:email) AND :email_verified
+           AND NOT EXISTS (SELECT 1 FROM cred)
+    ),
+    updated AS (
+        UPDATE accounts
+           SET last_login = :now, display_name = :name, picture = :picture
+         WHERE id IN (SELECT account_id FROM cred UNION ALL SELECT account_id FROM linked)
+        RETURNING id, email, display_name, FALSE AS inserted
+    ),
+    created AS (
+        INSERT INTO accounts (email, display_name, picture, created_at, last_login)
+        SELECT :email, :name, :picture, :now, :now
+         WHERE NOT EXISTS (SELECT 1 FROM cred) AND NOT EXISTS (SELECT 1 FROM linked)
+        RETURNING id, email, display_name, TRUE AS inserted
+    ),
+    account AS (
+        SELECT * FROM updated UNION ALL SELECT * FROM created
+    ),
+    new_cred AS (
+        INSERT INTO credentials (account_id, provider, subject, created_at)
+        SELECT id, 'google', :sub, :now FROM account WHERE NOT EXISTS (SELECT 1 FROM cred)
+        ON CONFLICT DO NOTHING
+    )
+    SELECT id, email, display_name AS name, inserted FROM account
+"""
+
+
+def user_info(i):
+    return {"sub": f"bench-signin-{i}", "email": f"bench-signin-{i}@example.com",
+            "email_verified": True, "name": f"Bench Signin {i}",
+            "picture": f"https://example.com/avatar/{i}.png"}
+
+
+def seed(n):
+    db.session.execute(db.text("DELETE FROM accounts WHERE email LIKE 'bench-signin-%'"))
+    db.session.commit()
+    for i in range(n):
+        google_sign_in(user_info(i))
+
+
+def before(info):
+    params = google_sign_in_params(info, datetime.utcnow())
+    db.session.execute(db.text(BEFORE_SIGN_IN), params).mappings().one()
+    db.session.commit()
+
+
+def after(info):
+    google_sign_in(info)
+
+
+def write_counters():
+    """(rows updated in accounts, WAL position) – deltas measure a run's writes."""
+    time.sleep(STATS_SETTLE)    # idle backends report their table counters within a second
+    row = db.session.execute(db.text("""
+        SELECT (SELECT n_tup_upd FROM pg_stat_user_tables WHERE relname = 'accounts'),
+               pg_current_wal_lsn()
+    """)).one()
+    db.session.commit()
+    return row
+
+
+def run(fn, infos, threads):
+    def timed(info):
+        with app.app_context():
+            start = time.perf_counter()
+            fn(info)
+            return time.perf_counter() - start
+
+    rows_before, wal_before = write_counters()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        latencies = sorted(pool.map(timed, infos))
+    seconds = time.perf_counter() - start
+    job_queues().local.drain()        # the buffered last_login flush counts too
+    rows_after, wal_after = write_counters()
+    wal = db.session.execute(db.text("SELECT pg_wal_lsn_diff(:a, :b)"),
+                             {"a": wal_after, "b": wal_before}).scalar()
+    db.session.commit()
+    return {
+        "sign_ins_per_s": len(infos) / seconds,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+        "rows_updated": rows_after - rows_before,
+        "wal_kib": float(wal) / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--accounts", type=int, default=1000)
+    parser.add_argument("--rounds",   type=int, default=5)
+    parser.add_argument("--threads",  type=int, default=8)
+    parser.add_argument("--repeat",   type=int, default=3, help="alternating runs; medians reported")
+    args = parser.parse_args()
+
+    with app.app_context():
+        upgrade(db.engine)
+        seed(args.accounts)
+        infos = [user_info(i) for _ in range(args.rounds) for i in range(args.accounts)]
+
+        print(f"{args.accounts} accounts × {args.rounds} sign-ins, {args.threads} threads, "
+              f"median of {args.repeat}")
+        runs = {"before": [], "after": []}
+        for _ in range(args.repeat):
+            for label, fn in (("before", before), ("after", after)):
+                runs[label].append(run(fn, infos, args.threads))
+        results = {label: {key: statistics.median(r[key] for r in rs) for key in rs[0]}
+                   for label, rs in runs.items()}
+        for label, r in results.items():
+            print(f"  {label:<7} {r['sign_ins_per_s']:>9,.0f} sign-ins/s"
+                  f"  p50 {r['p50_ms']:6.2f} ms  p99 {r['p99_ms']:6.2f} ms"
+                  f"  {r['rows_updated']:>7,.0f} rows updated  {r['wal_kib']:>9,.0f} KiB WAL")
+        speedup   = results["after"]["sign_ins_per_s"] / results["before"]["sign_ins_per_s"]
+        wal_ratio = results["before"]["wal_kib"] / max(results["after"]["wal_kib"], 1)
+        print(f"  ×{speedup:.2f} throughput, {wal_ratio:.1f}× less WAL")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+benchmarks/bench_startup.py
+───────────────────────────
+Import and boot time of the app, as paid by every worker, CLI command
+and test run:
+
+    import      `import app` under `python -X importtime` (median of runs)
+    create      create_app() alone
+    first req   first GET /login (template compile, lazy init)
+
+and a check that creating the app leaves the lazily-loaded dependencies
+unimported (see rooms/factory.py). Exits 1 when a lazy module is loaded
+eagerly or the import time exceeds --budget-ms, so it can gate CI.
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --runs 10 --budget-ms 600 --top 15
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from rooms.factory import LAZY_MODULES   # noqa: E402
+
+CHILD = """
+import json, sys, time
+t0 = time.perf_counter()
+from rooms.factory import create_app
+t1 = time.perf_counter()
+app = create_app()
+t2 = time.perf_counter()
+loaded = sorted(m for m in {lazy!r} if m in sys.modules)
+app.test_client().get("/login")
+t3 = time.perf_counter()
+print(json.dumps({{"import": t1 - t0, "create": t2 - t1, "first_request": t3 - t2,
+                   "eager": loaded}}))
+"""
+
+
+def python(*args, env=None):
+    return subprocess.run([sys.executable, *args], cwd=ROOT, env=env, capture_output=True,
+                          text=True, check=True)
+
+
+def importtime(env=None):
+    """(cumulative µs of `import app`, {module: (self µs, cumulative µs)})."""
+    stderr = python("-X", "importtime", "-c", "import app", env=env).stderr
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules["app"][1], modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs",      type=int, default=5)
+    parser.add_argument("--top",       type=int, default=10, help="slowest imports to list")
+    parser.add_argument("--budget-ms", type=float, default=0, help="fail above this import time (0 = off)")
+    args = parser.parse_args()
+
+    python("-c", "import app")   # warm the bytecode cache
+    totals, modules = [], {}
+    for _ in range(args.runs):
+        total, modules = importtime()
+        totals.append(total / 1000)
+    boots = [json.loads(python("-c", CHILD.format(lazy=LAZY_MODULES)).stdout.splitlines()[-1])
+             for _ in range(args.runs)]
+
+    import_ms = statistics.median(totals)
+    print(f"{'import app':<12} {import_ms:7.1f} ms  (median of {args.runs}; min {min(totals):.1f})")
+    for key, label in (("create", "create_app()"), ("first_request", "first req")):
+        print(f"{label:<12} {statistics.median(b[key] for b in boots) * 1000:7.1f} ms")
+
+    print("\nslowest imports (cumulative ms, last run):")
+    slowest = sorted(((c, name) for name, (_, c) in modules.items() if name != "app"), reverse=True)
+    for cumulative, name in slowest[:args.top]:
+        print(f"  {cumulative / 1000:7.1f}  {name}")
+
+    failed = False
+    eager = sorted({m for b in boots for m in b["eager"]})
+    if eager:
+        print(f"\n❌ loaded eagerly by create_app(): {', '.join(eager)}")
+        failed = True
+    if args.budget_ms and import_ms > args.budget_ms:
+        print(f"\n❌ import time {import_ms:.1f} ms exceeds the {args.budget_ms:.0f} ms budget")
+        failed = True
+    if not failed:
+        print("\n✅ lazy dependencies stay unloaded" + (" and import time is within budget"
+                                                      if args.budget_ms else ""))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
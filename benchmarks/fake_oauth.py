@@ -0,0 +1,138 @@
+"""
+benchmarks/fake_oauth.py
+────────────────────────
+A local stand-in for Google's OpenID Connect endpoints, used by the load
+tests so they never touch the network.
+
+    GET  /.well-known/openid-configuration   discovery document
+    GET  /authorize                          302 straight back with a code
+    POST /token                              id_token signed with a local RSA key
+    GET  /jwks                               public key set
+
+`latency` is added to every /token call to model Google's round trip.
+
+    python benchmarks/fake_oauth.py --port 9000 --latency 0.2
+"""
+
+import argparse
+import asyncio
+import base64
+import itertools
+import json
+import threading
+import time
+from urllib.parse import parse_qs, urlencode
+
+from authlib.jose import JsonWebKey, jwt
+
+
+class FakeGoogle:
+    """Minimal OIDC provider issuing id_tokens for `users` distinct accounts."""
+
+    def __init__(self, base_url, client_id, latency=0.2, users=1000):
+        self.base_url  = base_url.rstrip("/")
+        self.client_id = client_id
+        self.latency   = latency
+        self.users     = users
+        self.key       = JsonWebKey.generate_key("RSA", 2048, is_private=True,
+                                                 options={"kid": "fake-1"})
+        self._counter  = itertools.count()
+        self.requests  = {"discovery": 0, "jwks": 0, "token": 0}
+
+    def discovery(self):
+        return {
+            "issuer":                 self.base_url,
+            "authorization_endpoint": f"{self.base_url}/authorize",
+            "token_endpoint":         f"{self.base_url}/token",
+            "jwks_uri":               f"{self.base_url}/jwks",
+            "userinfo_endpoint":      f"{self.base_url}/userinfo",
+            "id_token_signing_alg_values_supported": ["RS256"],
+        }
+
+    def issue_code(self, nonce):
+        sub = f"fake-{next(self._counter) % self.users}"
+        return base64.urlsafe_b64encode(json.dumps([sub, nonce]).encode()).decode()
+
+    def id_token(self, code):
+        sub, nonce = json.loads(base64.urlsafe_b64decode(code))
+        now = int(time.time())
+        claims = {
+            "iss": self.base_url, "aud": self.client_id, "sub": sub,
+            "iat": now, "exp": now + 3600, "nonce": nonce,
+            "email": f"{sub}@example.com", "name": sub.title(),
+            "picture": f"{self.base_url}/avatars/{sub}.png",
+        }
+        header = {"alg": "RS256", "kid": "fake-1"}
+        return jwt.encode(header, claims, self.key).decode()
+
+    # ── ASGI ─────────────────────────────────────────────────────────────────
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return
+        path  = scope["path"]
+        query = {k: v[0] for k, v in parse_qs(scope["query_string"].decode()).items()}
+
+        if path == "/.well-known/openid-configuration":
+            self.requests["discovery"] += 1
+            return await self._json(send, self.discovery())
+        if path == "/jwks":
+            self.requests["jwks"] += 1
+            return await self._json(send, {"keys": [self.key.as_dict(is_private=False)]})
+        if path == "/authorize":
+            location = query["redirect_uri"] + "?" + urlencode(
+                {"code": self.issue_code(query.get("nonce")), "state": query["state"]})
+            return await self._send(send, 302, b"", [(b"location", location.encode())])
+        if path == "/token":
+            self.requests["token"] += 1
+            body = b""
+            while True:
+                message = await receive()
+                body += message.get("body", b"")
+                if not message.get("more_body"):
+                    break
+            form = {k: v[0] for k, v in parse_qs(body.decode()).items()}
+            await asyncio.sleep(self.latency)
+            return await self._json(send, {
+                "access_token": "fake-access-token", "token_type": "Bearer",
+                "expires_in": 3600, "scope": "openid email profile",
+                "id_token": self.id_token(form["code"]),
+            })
+        return await self._send(send, 404, b"not found")
+
+    async def _json(self, send, payload):
+        await self._send(send, 200, json.dumps(payload).encode(),
+                         [(b"content-type", b"application/json")])
+
+    async def _send(self, send, status, body, headers=()):
+        await send({"type": "http.response.start", "status": status, "headers": list(headers)})
+        await send({"type": "http.response.body", "body": body})
+
+
+def serve_in_thread(port, client_id, latency=0.2, users=1000):
+    """Start a FakeGoogle on 127.0.0.1:`port` in a daemon thread; returns it once listening."""
+    import uvicorn
+
+    provider = FakeGoogle(f"http://127.0.0.1:{port}", client_id, latency, users)
+    server   = uvicorn.Server(uvicorn.Config(provider, host="127.0.0.1", port=port,
+                                             log_level="warning", lifespan="off",
+                                             backlog=4096))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return provider
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--port",      type=int,   default=9000)
+    parser.add_argument("--latency",   type=float, default=0.2)
+    parser.add_argument("--client-id", default="test-client")
+    args = parser.parse_args()
+    provider = FakeGoogle(f"http://127.0.0.1:{args.port}", args.client_id, args.latency)
+    uvicorn.run(provider, host="127.0.0.1", port=args.port, lifespan="off")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+benchmarks/load_oauth.py
+────────────────────────
+Google-login load test: the sync Flask server vs the ASGI entry-point,
+both talking to a local fake OAuth provider with simulated latency.
+
+Each virtual user runs the full flow (/auth/google → provider → callback)
+with its own cookie jar; only the callback is timed, since that is the
+request that waits on the token exchange.
+
+    DATABASE_URL=postgresql+psycopg2://.../rooms_bench \\
+        python benchmarks/load_oauth.py --logins 2000 --concurrency 500
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.fake_oauth import serve_in_thread   # noqa: E402
+
+SERVERS = {
+    "sync": [sys.executable, "-c",
+             "import logging; logging.getLogger('werkzeug').setLevel(logging.WARNING); "
+             "from app import app; app.run(host='127.0.0.1', port={port}, threaded=True)"],
+    "asgi": [sys.executable, "-m", "uvicorn", "asgi:application", "--host", "127.0.0.1",
+             "--port", "{port}", "--log-level", "warning", "--backlog", "4096"],
+}
+
+
+def wait_for_port(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with socket.socket() as sock:
+            if sock.connect_ex(("127.0.0.1", port)) == 0:
+                return
+        time.sleep(0.1)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+async def login(base_url, timings, failures):
+    async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+        try:
+            resp = await client.get("/auth/google")
+            resp = await client.get(resp.headers["location"])       # fake provider
+            start = time.perf_counter()
+            resp = await client.get(resp.headers["location"])       # our callback
+            elapsed = time.perf_counter() - start
+        except (httpx.HTTPError, KeyError):
+            failures.append(1)
+            return
+        if resp.headers.get("location", "").endswith("/dashboard"):
+            timings.append(elapsed)
+        else:
+            failures.append(1)
+
+
+async def drive(base_url, logins, concurrency):
+    timings, failures = [], []
+    gate = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with gate:
+            await login(base_url, timings, failures)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(logins)))
+    wall = time.perf_counter() - start
+    return timings, len(failures), wall
+
+
+def summarize(mode, timings, failures, wall):
+    timings = sorted(timings)
+    pct = lambda p: timings[min(len(timings) - 1, int(len(timings) * p))] * 1000 if timings else None
+    return {
+        "mode": mode, "ok": len(timings), "failed": failures,
+        "logins_per_sec": len(timings) / wall if wall else 0.0,
+        "p50_ms": pct(0.50), "p99_ms": pct(0.99),
+        "mean_ms": statistics.fmean(timings) * 1000 if timings else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--modes",         default="sync,asgi")
+    parser.add_argument("--logins",        type=int,   default=1000)
+    parser.add_argument("--concurrency",   type=int,   default=200)
+    parser.add_argument("--latency",       type=float, default=0.2, help="fake token endpoint delay (s)")
+    parser.add_argument("--provider-port", type=int,   default=9000)
+    parser.add_argument("--app-port",      type=int,   default=5055)
+    args = parser.parse_args()
+
+    client_id = os.environ.setdefault("GOOGLE_CLIENT_ID", "load-test-client")
+    os.environ.setdefault("GOOGLE_CLIENT_SECRET", "load-test-secret")
+    os.environ["GOOGLE_DISCOVERY_URL"] = (
+        f"http://127.0.0.1:{args.provider_port}/.well-known/openid-configuration")
+    serve_in_thread(args.provider_port, client_id, args.latency)
+
+    from app import app
+    from rooms.Models import db
+    from rooms.db.migrate import upgrade
+    with app.app_context():
+        upgrade(db.engine)
+
+    results = []
+    for mode in args.modes.split(","):
+        cmd  = [part.format(port=args.app_port) for part in SERVERS[mode]]
+        proc = subprocess.Popen(cmd, cwd=ROOT, env=os.environ.copy())
+        try:
+            wait_for_port(args.app_port)
+            asyncio.run(drive(f"http://127.0.0.1:{args.app_port}", 10, 10))   # warm-up
+            results.append(summarize(mode, *asyncio.run(
+                drive(f"http://127.0.0.1:{args.app_port}", args.logins, args.concurrency))))
+        finally:
+            proc.terminate()
+            proc.wait()
+        print(json.dumps(results[-1]))
+
+
+if __name__ == "__main__":
+    main()
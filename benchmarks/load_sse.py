@@ -0,0 +1,174 @@
+"""
+benchmarks/load_sse.py
+──────────────────────
+Room feed load test: --subscribers idle SSE connections to one ASGI
+worker, then --events rooms created through the API while they listen.
+
+Reports the worker's resident memory per idle subscriber and the
+delivery latency – room POSTed → event read by a subscriber – over every
+(event, subscriber) pair. Client and server share the machine, so on
+few cores the latency includes the client parsing 10k copies of each
+event.
+
+    DATABASE_URL=postgresql+psycopg2://.../rooms_bench \\
+        python benchmarks/load_sse.py --subscribers 10000 --events 20
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.fake_oauth import serve_in_thread    # noqa: E402
+from benchmarks.load_oauth import wait_for_port      # noqa: E402
+
+SERVER = [sys.executable, "-m", "uvicorn", "asgi:application", "--host", "127.0.0.1",
+          "--port", "{port}", "--log-level", "warning", "--backlog", "4096"]
+
+
+def rss_kib(pid):
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+def session_cookie(base_url):
+    """Sign a load-test account up (or in) and return its session cookie header."""
+    with httpx.Client(base_url=base_url) as client:
+        client.post("/signup", data={"username": "feedload", "email": "feedload@example.com",
+                                     "password": "feedload", "ConfirmPassword": "feedload"})
+        client.post("/login", data={"identifier": "feedload", "password": "feedload"})
+        return "; ".join(f"{k}={v}" for k, v in client.cookies.items())
+
+
+class Subscriber:
+    """One raw-socket SSE client (httpx per connection would dwarf the server side)."""
+
+    def __init__(self, port, cookie, received):
+        self.port     = port
+        self.cookie   = cookie
+        self.received = received   # event name → [arrival times]
+        self.ready    = asyncio.Event()
+
+    async def run(self):
+        reader, writer = await asyncio.open_connection("127.0.0.1", self.port)
+        writer.write(f"GET /api/rooms/stream HTTP/1.1\r\nHost: 127.0.0.1\r\n"
+                     f"Accept: text/event-stream\r\nCookie: {self.cookie}\r\n\r\n".encode())
+        await writer.drain()
+        status = await reader.readline()
+        if b" 200 " not in status:
+            raise RuntimeError(status.decode().strip())
+        while await reader.readline() not in (b"\r\n", b""):
+            pass
+        self.ready.set()
+        try:
+            while line := await reader.readline():
+                if line.startswith(b"data: "):
+                    name = json.loads(line[6:])["name"]
+                    self.received.setdefault(name, []).append(time.perf_counter())
+        finally:
+            writer.close()
+
+
+async def drive(port, cookie, subscribers, events, interval, connect_concurrency, pid):
+    received, gate = {}, asyncio.Semaphore(connect_concurrency)
+    clients = [Subscriber(port, cookie, received) for _ in range(subscribers)]
+
+    async def connect(client, task_list):
+        async with gate:
+            task_list.append(asyncio.create_task(client.run()))
+            await client.ready.wait()
+
+    rss_before = rss_kib(pid)
+    tasks, started = [], time.perf_counter()
+    await asyncio.gather(*(connect(c, tasks) for c in clients))
+    connect_s = time.perf_counter() - started
+    await asyncio.sleep(2)
+    rss_after = rss_kib(pid)
+
+    sent = {}
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}",
+                                 headers={"Cookie": cookie}) as api:
+        for k in range(events):
+            name = f"feed-load-{k}-{time.time_ns()}"
+            sent[name] = time.perf_counter()
+            resp = await api.post("/api/rooms", json={
+                "name": name, "description": "load", "password": "123456",
+                "whatsapp_link": "https://chat.whatsapp.com/load"})
+            resp.raise_for_status()
+            await asyncio.sleep(interval)
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline and sum(len(received.get(n, ())) for n in sent) < events * subscribers:
+        await asyncio.sleep(0.2)
+    for task in tasks:
+        task.cancel()
+
+    latencies = sorted(t - sent[name] for name in sent for t in received.get(name, ()))
+    pct = lambda p: latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000 if latencies else None
+    return {
+        "subscribers": subscribers, "connect_s": round(connect_s, 2),
+        "rss_idle_kib": rss_after, "rss_per_subscriber_kib": round((rss_after - rss_before) / subscribers, 2),
+        "events": events, "delivered": len(latencies), "expected": events * subscribers,
+        "latency_p50_ms": pct(0.50), "latency_p99_ms": pct(0.99), "latency_max_ms": pct(1.0),
+        "latency_mean_ms": statistics.fmean(latencies) * 1000 if latencies else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--subscribers",   type=int,   default=10000)
+    parser.add_argument("--events",        type=int,   default=20)
+    parser.add_argument("--interval",      type=float, default=0.5, help="seconds between rooms")
+    parser.add_argument("--connect-concurrency", type=int, default=500)
+    parser.add_argument("--provider-port", type=int,   default=9000)
+    parser.add_argument("--app-port",      type=int,   default=5056)
+    args = parser.parse_args()
+
+    # Each subscriber is a socket on both ends; children inherit the limit.
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    if hard < args.subscribers + 100:
+        sys.exit(f"❌ open-file limit {hard} is too low for {args.subscribers} subscribers")
+
+    # The ASGI app builds its Google client at startup; point it at the fake provider.
+    client_id = os.environ.setdefault("GOOGLE_CLIENT_ID", "load-test-client")
+    os.environ.setdefault("GOOGLE_CLIENT_SECRET", "load-test-secret")
+    os.environ["GOOGLE_DISCOVERY_URL"] = (
+        f"http://127.0.0.1:{args.provider_port}/.well-known/openid-configuration")
+    serve_in_thread(args.provider_port, client_id, 0)
+
+    from app import app
+    from rooms.Models import db
+    from rooms.db.migrate import upgrade
+    with app.app_context():
+        upgrade(db.engine)
+
+    cmd  = [part.format(port=args.app_port) for part in SERVER]
+    proc = subprocess.Popen(cmd, cwd=ROOT, env=os.environ.copy())
+    try:
+        wait_for_port(args.app_port)
+        base_url = f"http://127.0.0.1:{args.app_port}"
+        cookie   = session_cookie(base_url)
+        asyncio.run(drive(args.app_port, cookie, 1, 1, 0.1, 1, proc.pid))   # warm-up: LISTEN, pool
+        print(json.dumps(asyncio.run(drive(args.app_port, cookie, args.subscribers, args.events,
+                                           args.interval, args.connect_concurrency, proc.pid))))
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,370 @@
+"""
+benchmarks/suite.py
+───────────────────
+Benchmark and load-test suite over every Pro-Rooms route, with a
+baseline gate for regressions.
+
+    micro   the app in-process through Flask's test client, one request
+            at a time: --requests per route after a warm-up
+    load    gunicorn (gunicorn.conf.py, --workers workers, --mode wsgi |
+            asgi) over real HTTP: a closed-loop concurrency ramp per
+            route, --duration seconds per step
+
+Google sign-in goes through a local fake provider (fake_oauth.py), so
+the suite never touches the network; only the callback request is
+timed. Every scenario reports throughput and p50/p95/p99 latency, and
+the whole run is written as JSON:
+
+    python benchmarks/suite.py --rooms 10000 --users 1000 --out run.json
+    python benchmarks/suite.py --save-baseline benchmarks/baseline.json
+    python benchmarks/suite.py --baseline benchmarks/baseline.json --tolerance 0.15
+
+With --baseline the run exits 1 when a scenario's throughput dropped, or
+its p95 rose, by more than --tolerance. Baselines are only comparable on
+the machine and settings that produced them.
+
+⚠️  The accounts, credentials and rooms tables of the target database are
+TRUNCATED and re-seeded; point DATABASE_URL at a scratch database.
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+
+import httpx
+
+ROOT = os.path.dirname(os.path.abspath(os.path.dirname(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.fake_oauth import serve_in_thread    # noqa: E402
+from benchmarks.load_oauth import wait_for_port      # noqa: E402
+
+PASSWORD      = "bench-password"
+ROOM_PASSWORD = "123456"
+SERVER = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "{target}"]
+TARGETS = {"wsgi": "app:app", "asgi": "asgi:application"}
+
+# Rate limits stay in the request path but can't be what's measured.
+SUITE_ENV = {
+    "RATELIMIT_LOGIN_IP": "1000000/second", "RATELIMIT_LOGIN_ACCOUNT": "1000000/second",
+    "RATELIMIT_JOIN_IP": "1000000/second", "RATELIMIT_JOIN_USER": "1000000/second",
+    "RATELIMIT_JOIN_ROOM": "1000000/second",
+    "SLOW_REQUEST_MS": "0", "SLOW_QUERY_MS": "0",
+}
+
+
+# ── Seeding ───────────────────────────────────────────────────────────────────
+def seed(rooms, users):
+    """Replace accounts and rooms with `users` local accounts and `rooms` rooms."""
+    from rooms.Models import db
+    from rooms.passwords import password_hasher
+
+    secret = password_hasher().hash(PASSWORD)    # one hash, shared: seeding isn't the benchmark
+    base   = datetime(2024, 1, 1)
+    accounts = io.StringIO("".join(
+        f"bench{i}\tbench{i}@example.com\tBench {i}\t{base}\n" for i in range(users)))
+    room_rows = io.StringIO("".join(
+        f"Room {i}\tA study group for topic {i % 97} with weekly calls\t"
+        f"https://chat.whatsapp.com/bench{i}\t{ROOM_PASSWORD}\t{1 + i % users}\t"
+        f"{base + timedelta(seconds=i)}\n"
+        for i in range(rooms)))
+    conn = db.engine.raw_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("TRUNCATE rooms, credentials, accounts RESTART IDENTITY CASCADE")
+            cur.copy_expert("COPY accounts (username, email, display_name, created_at) FROM STDIN",
+                            accounts)
+            cur.execute("""INSERT INTO credentials (account_id, provider, secret, created_at)
+                           SELECT id, 'password', %s, created_at FROM accounts""", (secret,))
+            cur.copy_expert("COPY rooms (name, description, whatsapp_link, password,"
+                            " creator_id, created_at) FROM STDIN", room_rows)
+            cur.execute("ANALYZE accounts; ANALYZE credentials; ANALYZE rooms")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+# ── Scenarios ─────────────────────────────────────────────────────────────────
+class Scenario:
+    """
+    One route: `request(rng)` → (method, path, kwargs) for the test
+    client (form=/json=) or httpx (data=/json=); `ok(status, location)`.
+    """
+
+    def __init__(self, name, request, ok, authed=True, oauth=False):
+        self.name    = name
+        self.request = request
+        self.ok      = ok
+        self.authed  = authed
+        self.oauth   = oauth
+
+
+def scenarios(rooms, users):
+    status = lambda *codes: (lambda code, location: code in codes)
+    to_dashboard = lambda code, location: code == 302 and location.endswith("/dashboard")
+    room_id = lambda rng: rng.randint(1, max(rooms, 1))
+    return [
+        Scenario("login", lambda rng: ("POST", "/login", {"form": {
+            "identifier": f"bench{rng.randrange(users)}", "password": PASSWORD}}),
+            to_dashboard, authed=False),
+        Scenario("google_callback", None, to_dashboard, authed=False, oauth=True),
+        Scenario("dashboard", lambda rng: ("GET", "/dashboard", {}), status(200)),
+        Scenario("get_rooms", lambda rng: ("GET", "/api/rooms?limit=50", {}), status(200, 304)),
+        Scenario("get_rooms_search", lambda rng: (
+            "GET", f"/api/rooms?search=topic+{rng.randrange(97)}&limit=20", {}), status(200, 304)),
+        Scenario("join_room", lambda rng: ("POST", "/api/rooms/join", {"json": {
+            "room_id": room_id(rng), "password": ROOM_PASSWORD}}), status(200)),
+        Scenario("create_room", lambda rng: ("POST", "/api/rooms", {"json": {
+            "name": f"Bench room {rng.random():.8f}", "description": "created by the suite",
+            "whatsapp_link": "https://chat.whatsapp.com/suite", "password": ROOM_PASSWORD}}),
+            status(200)),
+        Scenario("healthz", lambda rng: ("GET", "/healthz", {}), status(200), authed=False),
+    ]
+
+
+def summarize(latencies, errors, seconds):
+    """Throughput and latency percentiles (ms) of one scenario run."""
+    latencies = sorted(latencies)
+    pct = lambda p: round(latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000, 3) \
+        if latencies else None
+    return {
+        "requests": len(latencies), "errors": errors,
+        "rps": round(len(latencies) / seconds, 2) if seconds else 0.0,
+        "p50_ms": pct(0.50), "p95_ms": pct(0.95), "p99_ms": pct(0.99),
+    }
+
+
+# ── Micro: Flask test client ──────────────────────────────────────────────────
+def _test_client_oauth(client):
+    """Run /auth/google → fake provider → callback; returns (seconds, response)."""
+    resp = client.get("/auth/google")
+    provider = httpx.get(resp.headers["Location"], follow_redirects=False)
+    start = time.perf_counter()
+    callback = urlsplit(provider.headers["location"])
+    resp = client.get(f"{callback.path}?{callback.query}")
+    return time.perf_counter() - start, resp
+
+
+def run_micro(app, scenario, requests, warmup, rng):
+    client = app.test_client()
+    if scenario.authed:
+        with client.session_transaction() as session:
+            session["account_id"] = 1
+            session["username"]   = "bench0"
+
+    def once():
+        if scenario.oauth:
+            return _test_client_oauth(client)
+        method, path, kwargs = scenario.request(rng)
+        if "form" in kwargs:
+            kwargs = {"data": kwargs["form"]}
+        start = time.perf_counter()
+        resp  = client.open(path, method=method, **kwargs)
+        resp.get_data()          # drain streamed bodies (dashboard)
+        return time.perf_counter() - start, resp
+
+    for _ in range(warmup):
+        once()
+    latencies, errors, started = [], 0, time.perf_counter()
+    for _ in range(requests):
+        seconds, resp = once()
+        if scenario.ok(resp.status_code, resp.headers.get("Location", "")):
+            latencies.append(seconds)
+        else:
+            errors += 1
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+# ── Load: real server ─────────────────────────────────────────────────────────
+async def _http_once(client, scenario, rng):
+    if scenario.oauth:
+        resp = await client.get("/auth/google")
+        resp = await client.get(resp.headers["location"])            # fake provider
+        start = time.perf_counter()
+        resp = await client.get(resp.headers["location"])            # our callback
+        return time.perf_counter() - start, resp
+    method, path, kwargs = scenario.request(rng)
+    if "form" in kwargs:
+        kwargs = {"data": kwargs["form"]}
+    start = time.perf_counter()
+    resp  = await client.request(method, path, **kwargs)
+    return time.perf_counter() - start, resp
+
+
+async def run_load_step(base_url, cookie, scenario, concurrency, duration, seed_value):
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + duration
+
+    async def user(n):
+        nonlocal errors
+        rng     = random.Random(seed_value * 1000 + n)
+        headers = {"Cookie": cookie} if scenario.authed else {}
+        async with httpx.AsyncClient(base_url=base_url, headers=headers, timeout=60) as client:
+            while time.perf_counter() < deadline:
+                if scenario.oauth or not scenario.authed:
+                    client.cookies.clear()     # every sign-in starts signed out
+                try:
+                    seconds, resp = await _http_once(client, scenario, rng)
+                except (httpx.HTTPError, KeyError):
+                    errors += 1
+                    continue
+                if scenario.ok(resp.status_code, resp.headers.get("location", "")):
+                    latencies.append(seconds)
+                else:
+                    errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(user(n) for n in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+def login_cookie(base_url):
+    """Session cookie of bench0, signed by the server under test."""
+    with httpx.Client(base_url=base_url) as client:
+        resp = client.post("/login", data={"identifier": "bench0", "password": PASSWORD})
+        if resp.status_code != 302:
+            raise RuntimeError(f"login failed with {resp.status_code}")
+        return "; ".join(f"{k}={v}" for k, v in client.cookies.items())
+
+
+def run_load(selected, args):
+    env = {**os.environ, "SERVER_BIND": f"127.0.0.1:{args.app_port}",
+           "SERVER_WORKERS": str(args.workers), "SERVER_MODE": args.mode}
+    cmd = [part.format(target=TARGETS[args.mode]) for part in SERVER]
+    proc = subprocess.Popen(cmd, cwd=ROOT, env=env, stderr=subprocess.DEVNULL)
+    results = {}
+    try:
+        wait_for_port(args.app_port, timeout=60)
+        base_url = f"http://127.0.0.1:{args.app_port}"
+        cookie   = login_cookie(base_url)
+        for scenario in selected:
+            for concurrency in args.ramp:
+                key = f"load.{scenario.name}@{concurrency}"
+                asyncio.run(run_load_step(base_url, cookie, scenario, min(concurrency, 4), 0.5, 0))
+                results[key] = asyncio.run(run_load_step(
+                    base_url, cookie, scenario, concurrency, args.duration, args.seed))
+                print(f"  {key:<34} {_line(results[key])}", flush=True)
+    finally:
+        proc.terminate()
+        proc.wait()
+    return results
+
+
+# ── Baseline ──────────────────────────────────────────────────────────────────
+def compare(results, baseline, tolerance, slack_ms=1.0):
+    """Regressions of `results` against `baseline`: (key, metric, baseline, now)."""
+    regressions = []
+    for key, base in baseline.get("results", {}).items():
+        now = results.get(key)
+        if now is None or not base.get("rps"):
+            continue
+        if now["rps"] < base["rps"] * (1 - tolerance):
+            regressions.append((key, "rps", base["rps"], now["rps"]))
+        if base.get("p95_ms") is not None and now.get("p95_ms") is not None \
+                and now["p95_ms"] > base["p95_ms"] * (1 + tolerance) + slack_ms:
+            regressions.append((key, "p95_ms", base["p95_ms"], now["p95_ms"]))
+    return regressions
+
+
+def _line(r):
+    return (f"{r['rps']:>9,.1f} req/s  p50 {r['p50_ms'] or 0:8.2f}  p95 {r['p95_ms'] or 0:8.2f}"
+            f"  p99 {r['p99_ms'] or 0:8.2f} ms  {r['errors']} errors")
+
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rooms",         type=int,   default=10000)
+    parser.add_argument("--users",         type=int,   default=1000)
+    parser.add_argument("--scenarios",     default="", help="comma-separated subset (default: all)")
+    parser.add_argument("--skip",          default="", help="'micro' or 'load'")
+    parser.add_argument("--requests",      type=int,   default=200, help="micro: requests per route")
+    parser.add_argument("--warmup",        type=int,   default=10)
+    parser.add_argument("--ramp",          default="1,8,32", help="load: concurrency steps")
+    parser.add_argument("--duration",      type=float, default=5.0, help="load: seconds per step")
+    parser.add_argument("--workers",       type=int,   default=2)
+    parser.add_argument("--mode",          choices=tuple(TARGETS), default="wsgi")
+    parser.add_argument("--oauth-latency", type=float, default=0.05, help="fake token endpoint delay (s)")
+    parser.add_argument("--provider-port", type=int,   default=9000)
+    parser.add_argument("--app-port",      type=int,   default=5057)
+    parser.add_argument("--seed",          type=int,   default=1)
+    parser.add_argument("--out",           help="write the results JSON here")
+    parser.add_argument("--save-baseline", help="write the results JSON as the new baseline")
+    parser.add_argument("--baseline",      help="compare against this baseline; exit 1 on regression")
+    parser.add_argument("--tolerance",     type=float, default=0.15)
+    args = parser.parse_args()
+    args.ramp = [int(c) for c in args.ramp.split(",")]
+    if args.users < 1:
+        parser.error("--users must be at least 1 (rooms need a creator, routes a session)")
+
+    os.environ.update(SUITE_ENV)
+    client_id = os.environ.setdefault("GOOGLE_CLIENT_ID", "bench-client")
+    os.environ.setdefault("GOOGLE_CLIENT_SECRET", "bench-secret")
+    os.environ["GOOGLE_DISCOVERY_URL"] = (
+        f"http://127.0.0.1:{args.provider_port}/.well-known/openid-configuration")
+    serve_in_thread(args.provider_port, client_id, args.oauth_latency, args.users)
+
+    from app import app
+    from rooms.Models import db
+    from rooms.db.migrate import upgrade
+    with app.app_context():
+        upgrade(db.engine)
+        seed(args.rooms, args.users)
+
+    wanted   = set(filter(None, args.scenarios.split(",")))
+    selected = [s for s in scenarios(args.rooms, args.users) if not wanted or s.name in wanted]
+    results  = {}
+    if args.skip != "micro":
+        print(f"micro (test client, {args.requests} requests per route)")
+        for scenario in selected:
+            with app.app_context():
+                key = f"micro.{scenario.name}"
+                results[key] = run_micro(app, scenario, args.requests, args.warmup,
+                                         random.Random(args.seed))
+            print(f"  {key:<34} {_line(results[key])}", flush=True)
+    if args.skip != "load":
+        print(f"load (gunicorn {args.mode}, {args.workers} workers, ramp {args.ramp}, {args.duration:g} s/step)")
+        results.update(run_load(selected, args))
+
+    report = {
+        "meta": {
+            "revision": _git_revision(), "time": datetime.utcnow().isoformat(timespec="seconds"),
+            "python": platform.python_version(), "cpus": os.cpu_count(),
+            "rooms": args.rooms, "users": args.users, "workers": args.workers, "mode": args.mode,
+            "requests": args.requests, "ramp": args.ramp, "duration": args.duration,
+        },
+        "results": results,
+    }
+    for path in filter(None, (args.out, args.save_baseline)):
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Wrote {path}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for key, metric, before, now in regressions:
+            print(f"❌ {key}: {metric} {before} → {now}")
+        if regressions:
+            sys.exit(1)
+        print(f"✅ No regressions beyond {args.tolerance:.0%} of {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
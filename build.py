@@ -4,6 +4,10 @@ import sys
 from rooms.db.db import db_create
 import platform
 
+# `python build.py --prod` runs the pre-fork production server (gunicorn);
+# without it, Flask's debug server is started as before.
+production = "--prod" in sys.argv[1:]
+
 # Paths
 base_dir = os.path.dirname(os.path.abspath(__file__))
 venv_dir = os.path.join(base_dir, "venv")
@@ -22,6 +26,22 @@ def get_venv_paths(venv_dir):
 
 python_path, pip_path = get_venv_paths(venv_dir)
 
+
+def run_app():
+    if production and platform.system() == "Windows":
+        print("⚠️  gunicorn needs a POSIX host; starting the development server instead.")
+    elif production:
+        from rooms.Config import Config
+        # Fingerprinted, precompressed static files (rooms/assets.py)
+        subprocess.run([python_path, "-m", "flask", "--app", "app", "assets", "build"],
+                       cwd=base_dir, check=True)
+        target = "asgi:application" if Config.SERVER_MODE == "asgi" else "app:app"
+        subprocess.run([python_path, "-m", "gunicorn",
+                        "-c", os.path.join(base_dir, "gunicorn.conf.py"), target],
+                       cwd=base_dir)
+        return
+    subprocess.run([python_path, os.path.join(base_dir, "app.py")])
+
 # Create virtual environment if not exists
 if not os.path.exists(venv_dir):
     print("Creating virtual environment...")
@@ -40,12 +60,12 @@ if not os.path.exists(venv_dir):
         # Create database using db_create
         db_create(db_folder)
         # Run your Flask app using the venv python
-        subprocess.run([python_path, os.path.join(base_dir, "app.py")])
+        run_app()
     else:
         print(f"❌ requirements.txt not found at {requirements_file}")
 else:
     db_create(db_folder)
     print("Allready Virtual Environment Created ✅ !!!")
-    subprocess.run([python_path, os.path.join(base_dir, "app.py")])
+    run_app()
 
 
@@ -0,0 +1,77 @@
+"""
+gunicorn.conf.py
+────────────────
+Production pre-fork server settings, derived from rooms.Config.
+
+    gunicorn -c gunicorn.conf.py app:app            (SERVER_MODE=wsgi)
+    gunicorn -c gunicorn.conf.py asgi:application   (SERVER_MODE=asgi)
+
+`python build.py --prod` picks the right target for you.
+
+    kill -HUP <master pid>   graceful reload (new workers, then old ones drain)
+    kill -TERM <master pid>  graceful shutdown
+
+With SERVER_PRELOAD (the default) HUP forks the new workers from the
+master's already-imported app, so they run the old code. To deploy new
+code, restart the server, or without downtime start a new master with
+`kill -USR2 <master pid>` and stop the old one with `kill -QUIT <old pid>`
+once the new workers serve. HUP picks up new code only with
+SERVER_PRELOAD=false.
+"""
+
+import multiprocessing
+
+from rooms.Config import Config
+
+bind    = Config.SERVER_BIND
+workers = Config.SERVER_WORKERS or multiprocessing.cpu_count()
+
+if Config.SERVER_MODE == "asgi":
+    worker_class = "uvicorn.workers.UvicornWorker"
+else:
+    worker_class = "gthread"
+    threads      = Config.SERVER_THREADS
+
+# Import the app once in the master so workers share its code pages
+# copy-on-write instead of each importing Flask/SQLAlchemy/Authlib.
+preload_app = Config.SERVER_PRELOAD
+
+# Recycle workers after N requests (jittered so they don't restart together).
+max_requests        = Config.SERVER_MAX_REQUESTS
+max_requests_jitter = Config.SERVER_MAX_REQUESTS_JITTER
+
+timeout          = Config.SERVER_TIMEOUT
+graceful_timeout = Config.SERVER_GRACEFUL_TIMEOUT
+
+
+def when_ready(server):
+    """
+    Migrate once, in the master, before any worker serves traffic. With
+    preload_app the master also builds the Google OAuth client and compiles
+    the templates, so workers inherit Authlib, warm OIDC metadata and
+    compiled templates instead of each loading them on first use.
+    """
+    from app import app
+    from rooms.Models import db
+    from rooms.db.migrate import ensure_schema
+    from rooms.oauth import google_client
+    from rooms.templating import warm_templates
+    with app.app_context():
+        ensure_schema(db.engine, Config.DB_MIGRATE_ON_START)
+    if Config.SERVER_PRELOAD:
+        google_client(app)
+        warm_templates(app)
+
+
+def post_fork(server, worker):
+    """
+    Drop pooled connections inherited from the master (a socket shared
+    between processes corrupts both sides' protocol state), then warm the
+    worker's own pool.
+    """
+    from app import app
+    from rooms.Models import db
+    from rooms.db.pool import warm_pool
+    with app.app_context():
+        db.engine.dispose(close=False)
+        warm_pool(db.engine, Config.DB_POOL_MIN_SIZE)
@@ -7,10 +7,20 @@ Flask application configuration loaded from environment variables.
 import os
 import secrets
 from dotenv import load_dotenv
-from authlib.integrations.flask_client import OAuth
 
-# Load environment variables from .env file
-load_dotenv()
+_env_loaded = False
+
+
+def load_env():
+    """Load the .env file into os.environ, once per process."""
+    global _env_loaded
+    if not _env_loaded:
+        load_dotenv()
+        _env_loaded = True
+
+
+# Config reads os.environ as the class body runs, so .env must be in first.
+load_env()
 
 
 class Config:
@@ -31,44 +41,188 @@ class Config:
         f"postgresql+psycopg2://{_db_user}:{_db_password}@{_db_host}:{_db_port}/{_db_name}"
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Apply pending migrations at startup (false: only warn; run `flask db upgrade`)
+    DB_MIGRATE_ON_START = os.getenv("DB_MIGRATE_ON_START", "true").lower() == "true"
+
+    # ── Connection pool (shared by SQLAlchemy and raw psycopg2 paths) ────────
+    DB_POOL_MIN_SIZE     = int(os.getenv("DB_POOL_MIN_SIZE",     "2"))
+    DB_POOL_SIZE         = int(os.getenv("DB_POOL_SIZE",         "10"))
+    DB_POOL_MAX_OVERFLOW = int(os.getenv("DB_POOL_MAX_OVERFLOW", "5"))
+    DB_POOL_RECYCLE      = int(os.getenv("DB_POOL_RECYCLE",      "1800"))  # seconds
+    DB_POOL_TIMEOUT      = float(os.getenv("DB_POOL_TIMEOUT",    "10"))    # seconds
+    DB_POOL_PRE_PING     = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
+    # ── Read replicas (see rooms/db/replicas.py) ──────────────────────────────
+    # Comma-separated SQLAlchemy URIs; empty sends every query to the primary.
+    DB_REPLICA_URIS            = [u.strip() for u in os.getenv("DB_REPLICA_URIS", "").split(",") if u.strip()]
+    DB_REPLICA_POLICY          = os.getenv("DB_REPLICA_POLICY", "round_robin")   # round_robin | least_busy
+    DB_REPLICA_MAX_LAG         = float(os.getenv("DB_REPLICA_MAX_LAG", "5"))         # seconds behind
+    DB_REPLICA_CHECK_INTERVAL  = float(os.getenv("DB_REPLICA_CHECK_INTERVAL", "5"))  # seconds
+    DB_REPLICA_CONNECT_TIMEOUT = int(os.getenv("DB_REPLICA_CONNECT_TIMEOUT", "2"))   # seconds
+    # Read-your-writes: after a write a client reads from the primary this long.
+    DB_REPLICA_PIN_SECONDS     = float(os.getenv("DB_REPLICA_PIN_SECONDS", "5"))
+
+    # ── Password hashing ──────────────────────────────────────────────────────
+    PASSWORD_HASHER    = os.getenv("PASSWORD_HASHER", "scrypt")  # scrypt | pbkdf2_sha256 | argon2
+    SCRYPT_N           = int(os.getenv("SCRYPT_N", str(2**14)))
+    SCRYPT_R           = int(os.getenv("SCRYPT_R", "8"))
+    SCRYPT_P           = int(os.getenv("SCRYPT_P", "1"))
+    PBKDF2_ITERATIONS  = int(os.getenv("PBKDF2_ITERATIONS", "600000"))
+    ARGON2_TIME_COST   = int(os.getenv("ARGON2_TIME_COST", "3"))
+    ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", "65536"))  # KiB
+    ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", "1"))
+    # Hashing thread pool: 0 workers means one per CPU.
+    PASSWORD_HASH_WORKERS     = int(os.getenv("PASSWORD_HASH_WORKERS", "0"))
+    PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
+    PASSWORD_HASH_TIMEOUT     = float(os.getenv("PASSWORD_HASH_TIMEOUT", "5"))  # seconds
+
+    # ── Room listing API ──────────────────────────────────────────────────────
+    ROOMS_PAGE_SIZE     = int(os.getenv("ROOMS_PAGE_SIZE",     "50"))
+    ROOMS_MAX_PAGE_SIZE = int(os.getenv("ROOMS_MAX_PAGE_SIZE", "200"))
+    SEARCH_BACKEND      = os.getenv("SEARCH_BACKEND", "auto")  # auto | postgres | memory
+
+    # ── Join analytics and sort=trending (see rooms/analytics.py) ────────────
+    ROOM_STATS_ENABLED        = os.getenv("ROOM_STATS_ENABLED", "true").lower() == "true"
+    ROOM_STATS_FLUSH_INTERVAL = float(os.getenv("ROOM_STATS_FLUSH_INTERVAL", "10"))  # seconds
+    ROOM_STATS_RETENTION_DAYS = int(os.getenv("ROOM_STATS_RETENTION_DAYS", "30"))
+    ROOMS_TRENDING_WINDOW     = float(os.getenv("ROOMS_TRENDING_WINDOW", "48"))      # hours
+    ROOMS_TRENDING_HALF_LIFE  = float(os.getenv("ROOMS_TRENDING_HALF_LIFE", "6"))    # hours
+    ROOMS_TRENDING_SIZE       = int(os.getenv("ROOMS_TRENDING_SIZE", "1000"))        # rooms ranked
+    ROOMS_TRENDING_REFRESH    = float(os.getenv("ROOMS_TRENDING_REFRESH", "60"))     # seconds
+
+    # ── Room cache ────────────────────────────────────────────────────────────
+    CACHE_ENABLED     = os.getenv("CACHE_ENABLED", "true").lower() == "true"
+    CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1024"))
+    CACHE_TTL         = float(os.getenv("CACHE_TTL", "60"))   # seconds
+    CACHE_REDIS_URL   = os.getenv("CACHE_REDIS_URL", "")      # optional shared tier
+    # Several workers and no shared tier: a write only invalidates its own
+    # worker's listings; the others serve theirs until this TTL runs out.
+    CACHE_LOCAL_LISTING_TTL = float(os.getenv("CACHE_LOCAL_LISTING_TTL", "2"))  # seconds
+
+    # ── Rate limiting (token buckets: "<count>/<second|minute|hour|day>") ─────
+    RATELIMIT_ENABLED       = os.getenv("RATELIMIT_ENABLED", "true").lower() == "true"
+    RATELIMIT_LOGIN_IP      = os.getenv("RATELIMIT_LOGIN_IP",      "20/minute")
+    RATELIMIT_LOGIN_ACCOUNT = os.getenv("RATELIMIT_LOGIN_ACCOUNT", "5/minute")
+    RATELIMIT_JOIN_IP       = os.getenv("RATELIMIT_JOIN_IP",       "30/minute")
+    RATELIMIT_JOIN_USER     = os.getenv("RATELIMIT_JOIN_USER",     "10/minute")
+    RATELIMIT_JOIN_ROOM     = os.getenv("RATELIMIT_JOIN_ROOM",     "60/minute")
+    RATELIMIT_MAX_KEYS      = int(os.getenv("RATELIMIT_MAX_KEYS", "100000"))
+    RATELIMIT_REDIS_URL     = os.getenv("RATELIMIT_REDIS_URL", "")  # optional shared buckets
+    # Reverse proxies in front of the app whose X-Forwarded-For is trusted.
+    TRUSTED_PROXIES         = int(os.getenv("TRUSTED_PROXIES", "0"))
+
+    # ── Instrumentation (/metrics, slow logs, sampled profiles) ───────────────
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    METRICS_TOKEN   = os.getenv("METRICS_TOKEN", "")    # bearer token for /metrics (open if unset)
+    SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "500"))   # 0 disables the log
+    SLOW_QUERY_MS   = float(os.getenv("SLOW_QUERY_MS", "100"))
+    PROFILE_EVERY   = int(os.getenv("PROFILE_EVERY", "0"))         # cProfile 1 in N requests
+    PROFILE_DIR     = os.getenv("PROFILE_DIR", "profiles")
+
+    # ── Bulk import/export (flask rooms …, /api/admin/rooms/…) ────────────────
+    BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", "5000"))
+    # Bearer token for the admin API; the admin routes are disabled when unset.
+    ADMIN_API_TOKEN = os.getenv("ADMIN_API_TOKEN", "")
+
+    # ── Dashboard rendering ───────────────────────────────────────────────────
+    # Rooms rendered server-side; the rest are fetched page by page from the API.
+    DASHBOARD_INITIAL_ROOMS = int(os.getenv("DASHBOARD_INITIAL_ROOMS", "60"))
+    DASHBOARD_STREAM        = os.getenv("DASHBOARD_STREAM", "true").lower() == "true"
+    DASHBOARD_STREAM_CHUNK  = int(os.getenv("DASHBOARD_STREAM_CHUNK", "20"))  # rows per fetch / fragments per flush
+
+    # ── Templates (see rooms/templating.py) ──────────────────────────────────
+    JINJA_BYTECODE_CACHE       = os.getenv("JINJA_BYTECODE_CACHE", "true").lower() == "true"
+    JINJA_BYTECODE_DIR         = os.getenv("JINJA_BYTECODE_DIR", "")   # default: Jinja's per-user temp dir
+    FRAGMENT_CACHE_ENABLED     = os.getenv("FRAGMENT_CACHE_ENABLED", "true").lower() == "true"
+    FRAGMENT_CACHE_MAX_ENTRIES = int(os.getenv("FRAGMENT_CACHE_MAX_ENTRIES", "20000"))  # room cards per worker
+
+    # ── Live room feed (/api/rooms/stream, see rooms/feed.py) ─────────────────
+    FEED_ENABLED          = os.getenv("FEED_ENABLED", "true").lower() == "true"
+    FEED_CHANNEL          = os.getenv("FEED_CHANNEL", "room_feed")      # LISTEN/NOTIFY channel
+    FEED_BUFFER           = int(os.getenv("FEED_BUFFER", "1024"))       # events kept per worker
+    FEED_REPLAY_LIMIT     = int(os.getenv("FEED_REPLAY_LIMIT", "500"))  # rooms replayed on resume
+    FEED_HEARTBEAT        = float(os.getenv("FEED_HEARTBEAT", "15"))    # seconds between keep-alives
+    FEED_RETRY_MS         = int(os.getenv("FEED_RETRY_MS", "3000"))     # client reconnect delay
+    # Under WSGI every subscriber holds a request thread, so the stream is opt-in
+    # there, capped per worker (0 = half of SERVER_THREADS). ASGI is uncapped.
+    FEED_WSGI             = os.getenv("FEED_WSGI", "false").lower() == "true"
+    FEED_WSGI_SUBSCRIBERS = int(os.getenv("FEED_WSGI_SUBSCRIBERS", "0"))
+    # Dashboards without the stream poll the first page of /api/rooms instead (0 = off).
+    FEED_POLL_INTERVAL    = float(os.getenv("FEED_POLL_INTERVAL", "30"))   # seconds
+
+    # ── Background jobs (see rooms/jobs.py) ──────────────────────────────────
+    JOBS_BACKEND        = os.getenv("JOBS_BACKEND", "thread")   # thread | postgres (durable jobs)
+    JOBS_WORKERS        = int(os.getenv("JOBS_WORKERS", "1"))           # thread-queue threads per process
+    JOBS_PG_CONSUMERS   = int(os.getenv("JOBS_PG_CONSUMERS", "1"))      # per web worker; 0 = `flask jobs work` only
+    JOBS_BATCH_SIZE     = int(os.getenv("JOBS_BATCH_SIZE", "100"))
+    JOBS_MAX_ATTEMPTS   = int(os.getenv("JOBS_MAX_ATTEMPTS", "5"))
+    JOBS_RETRY_BACKOFF  = float(os.getenv("JOBS_RETRY_BACKOFF", "5"))   # seconds, doubled per attempt
+    JOBS_COALESCE_DELAY = float(os.getenv("JOBS_COALESCE_DELAY", "1"))  # seconds a coalescing job waits
+    JOBS_POLL_INTERVAL  = float(os.getenv("JOBS_POLL_INTERVAL", "1"))   # idle postgres consumers, seconds
+    # Sign-ins buffer accounts.last_login per process and write it in batches.
+    LAST_LOGIN_FLUSH_INTERVAL = float(os.getenv("LAST_LOGIN_FLUSH_INTERVAL", "5"))  # seconds
+
+    # ── API responses (see rooms/serialization.py) ───────────────────────────
+    JSON_FAST               = os.getenv("JSON_FAST", "false").lower() == "true"   # orjson provider
+    COMPRESS_ENABLED        = os.getenv("COMPRESS_ENABLED", "true").lower() == "true"
+    COMPRESS_MIN_SIZE       = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))   # bytes
+    COMPRESS_GZIP_LEVEL     = int(os.getenv("COMPRESS_GZIP_LEVEL", "6"))
+    COMPRESS_BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", "4"))
+
+    # ── Static assets (flask assets build, see rooms/assets.py) ───────────────
+    ASSETS_BUILD_DIR = os.getenv("ASSETS_BUILD_DIR", "")   # default: static-dist/ next to static/
+    ASSETS_MAX_AGE   = int(os.getenv("ASSETS_MAX_AGE", "31536000"))  # fingerprinted files, seconds
+
+    # ── Production server (gunicorn, see gunicorn.conf.py) ────────────────────
+    SERVER_MODE                 = os.getenv("SERVER_MODE", "wsgi")   # wsgi | asgi
+    SERVER_BIND                 = os.getenv("SERVER_BIND", "0.0.0.0:5000")
+    SERVER_WORKERS              = int(os.getenv("SERVER_WORKERS", os.getenv("WEB_CONCURRENCY", "0")))  # 0 = one per CPU
+    SERVER_THREADS              = int(os.getenv("SERVER_THREADS", "4"))
+    SERVER_PRELOAD              = os.getenv("SERVER_PRELOAD", "true").lower() == "true"
+    SERVER_MAX_REQUESTS         = int(os.getenv("SERVER_MAX_REQUESTS", "5000"))  # recycle a worker after N
+    SERVER_MAX_REQUESTS_JITTER  = int(os.getenv("SERVER_MAX_REQUESTS_JITTER", "500"))
+    SERVER_TIMEOUT              = int(os.getenv("SERVER_TIMEOUT", "30"))
+    SERVER_GRACEFUL_TIMEOUT     = int(os.getenv("SERVER_GRACEFUL_TIMEOUT", "30"))
 
     # ── Google OAuth credentials ──────────────────────────────────────────────
     GOOGLE_CLIENT_ID     = os.getenv("GOOGLE_CLIENT_ID")
     GOOGLE_CLIENT_SECRET = os.getenv("GOOGLE_CLIENT_SECRET")
+    # Overridable so load tests can point at a local fake provider.
+    GOOGLE_DISCOVERY_URL = os.getenv(
+        "GOOGLE_DISCOVERY_URL",
+        "https://accounts.google.com/.well-known/openid-configuration"
+    )
+
+    OAUTH_HTTP_TIMEOUT   = float(os.getenv("OAUTH_HTTP_TIMEOUT", "10"))  # seconds
+    # Discovery document + JWKS cache shared by all workers (see rooms/oidc_cache.py)
+    OIDC_CACHE_PATH      = os.getenv("OIDC_CACHE_PATH", "")   # default: system temp dir
+    OIDC_CACHE_TTL       = float(os.getenv("OIDC_CACHE_TTL", "3600"))  # seconds
 
     # ── Session Configuration ─────────────────────────────────────────────────
     SESSION_COOKIE_NAME     = "prorooms_session"
     SESSION_COOKIE_HTTPONLY = True
     SESSION_COOKIE_SAMESITE = "Lax"
-    PERMANENT_SESSION_LIFETIME = 86400  # 24 hours
+    PERMANENT_SESSION_LIFETIME = 86400  # 24 hours (also the server-side store TTL)
+
+    # cookie (signed, default) | memory | filesystem | redis — see rooms/sessions.py
+    SESSION_BACKEND     = os.getenv("SESSION_BACKEND", "cookie")
+    SESSION_MAX_ENTRIES = int(os.getenv("SESSION_MAX_ENTRIES", "10000"))  # memory backend
+    SESSION_FILE_DIR    = os.getenv("SESSION_FILE_DIR", "")   # default: system temp dir
+    SESSION_REDIS_URL   = os.getenv("SESSION_REDIS_URL", "")
 
     # Uncomment in production (HTTPS only)
     # SESSION_COOKIE_SECURE = True
 
     @staticmethod
-    def validate():
-        """Validate required configuration values at startup."""
+    def validate(config):
+        """Validate the Google OAuth settings of an app's `config`."""
         missing = []
-        if not Config.GOOGLE_CLIENT_ID:
+        if not config.get("GOOGLE_CLIENT_ID"):
             missing.append("GOOGLE_CLIENT_ID")
-        if not Config.GOOGLE_CLIENT_SECRET:
+        if not config.get("GOOGLE_CLIENT_SECRET"):
             missing.append("GOOGLE_CLIENT_SECRET")
         if missing:
             raise ValueError(
                 f"❌ Missing required environment variables: {', '.join(missing)}\n"
                 "   Copy .env.example → .env and fill in the values."
             )
-
-
-# ── OAuth configuration helper ────────────────────────────────────────────────
-def init_oauth(app):
-    """Initialize and configure Google OAuth with the Flask app."""
-    oauth = OAuth(app)
-    oauth.register(
-        name="google",
-        client_id=app.config["GOOGLE_CLIENT_ID"],
-        client_secret=app.config["GOOGLE_CLIENT_SECRET"],
-        server_metadata_url="https://accounts.google.com/.well-known/openid-configuration",
-        client_kwargs={"scope": "openid email profile"},
-    )
-    return oauth
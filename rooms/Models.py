@@ -4,102 +4,240 @@ rooms/Models.py
 SQLAlchemy ORM models (PostgreSQL) and a raw psycopg2 connection helper.
 """
 
-import os
+import threading
 from datetime import datetime
 
-import psycopg2
-import psycopg2.extras
+from flask import current_app
 from flask_sqlalchemy import SQLAlchemy
-from dotenv import load_dotenv
 
-load_dotenv()
+from rooms.db.replicas import RoutingSession, read_connection
+from rooms.metrics import TimedConnection
 
-# ── SQLAlchemy instance (shared with app.py) ──────────────────────────────────
-db = SQLAlchemy()
+
+# ── SQLAlchemy instance (shared with the app factory) ─────────────────────────
+class _PendingEngine:
+    """Stands in for an engine until first use."""
+
+    def __init__(self, make):
+        self.make = make
+
+    def dispose(self):
+        """Nothing to release yet (init_app() disposes engines on re-init)."""
+
+
+class LazySQLAlchemy(SQLAlchemy):
+    """
+    Flask-SQLAlchemy that builds each engine on first use instead of in
+    init_app(). create_engine() imports the dialect and psycopg2, so
+    deferring it keeps app creation – CLI commands, tests, worker boot –
+    from paying for a database until something actually queries.
+    """
+
+    _engine_lock = threading.Lock()
+
+    def _make_engine(self, bind_key, options, app):
+        make = super()._make_engine
+        return _PendingEngine(lambda: make(bind_key, options, app))
+
+    @property
+    def engines(self):
+        engines = super().engines
+        if any(isinstance(e, _PendingEngine) for e in engines.values()):
+            with self._engine_lock:
+                for key, engine in engines.items():
+                    if isinstance(engine, _PendingEngine):
+                        engines[key] = engine.make()
+        return engines
+
+
+# Reads of @replica_reads views may go to a replica (rooms/db/replicas.py).
+db = LazySQLAlchemy(session_options={"class_": RoutingSession})
 
 
 # ── Raw psycopg2 connection (used for direct queries in routes) ───────────────
-def get_db_connection():
+def get_db_connection(read_only=False):
     """
-    Return a live psycopg2 connection to the PostgreSQL database.
-    Credentials are read from environment variables:
-        DB_HOST, DB_PORT, DB_USER, DB_PASSWORD, DB_NAME
+    Check a psycopg2 connection out of the shared SQLAlchemy engine pool;
+    with `read_only`, out of the request's replica pool when it has one.
+
+    The returned object proxies the DBAPI connection (`cursor()`, `commit()`,
+    `rollback()`); calling `close()` hands it back to the pool instead of
+    closing the socket. Must be called inside an application context.
+    With METRICS_ENABLED its cursors are timed into the request metrics.
     """
-    return psycopg2.connect(
-        host=os.getenv("DB_HOST",     "localhost"),
-        port=os.getenv("DB_PORT",     "5432"),
-        user=os.getenv("DB_USER",     "postgres"),
-        password=os.getenv("DB_PASSWORD", "postgres"),
-        dbname=os.getenv("DB_NAME",   "rooms_db")
-    )
+    conn = read_connection() if read_only else None
+    if conn is None:
+        conn = db.engine.raw_connection()
+    if current_app.config.get("METRICS_ENABLED"):
+        return TimedConnection(conn)
+    return conn
 
 
 # ── ORM Models ────────────────────────────────────────────────────────────────
 
-class SSO_User(db.Model):
-    """Stores users who sign in via Google OAuth."""
+class Account(db.Model):
+    """One row per person, however they sign in (see Credential)."""
 
-    __tablename__ = "sso_users"
+    __tablename__ = "accounts"
 
-    id        = db.Column(db.Integer, primary_key=True)
-    google_id = db.Column(db.String(255), unique=True, nullable=False, index=True)
-    email     = db.Column(db.String(255), unique=True, nullable=False, index=True)
-    name      = db.Column(db.String(255), nullable=False)
-    picture   = db.Column(db.String(500), nullable=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
-    last_login = db.Column(db.DateTime, default=datetime.utcnow, nullable=True)
+    id           = db.Column(db.Integer, primary_key=True)
+    username     = db.Column(db.String(100), nullable=True)    # local sign-ups only
+    email        = db.Column(db.String(255), nullable=False)
+    display_name = db.Column(db.String(255), nullable=False)
+    picture      = db.Column(db.String(500), nullable=True)
+    created_at   = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    last_login   = db.Column(db.DateTime, nullable=True)
 
     def __repr__(self):
-        return f"<SSO_User {self.email}>"
+        return f"<Account {self.email}>"
 
     def to_dict(self):
         return {
-            "id":         self.id,
-            "google_id":  self.google_id,
-            "email":      self.email,
-            "name":       self.name,
-            "picture":    self.picture,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "last_login": self.last_login.isoformat() if self.last_login else None,
+            "id":           self.id,
+            "username":     self.username,
+            "email":        self.email,
+            "display_name": self.display_name,
+            "picture":      self.picture,
+            "created_at":   self.created_at.isoformat() if self.created_at else None,
+            "last_login":   self.last_login.isoformat() if self.last_login else None,
         }
 
 
-class User(db.Model):
-    """Stores users who register with username/email/password."""
+# Case-insensitive uniqueness; login looks accounts up through these.
+db.Index("ux_accounts_username_lower", db.func.lower(Account.username), unique=True)
+db.Index("ux_accounts_email_lower", db.func.lower(Account.email), unique=True)
+
 
-    __tablename__ = "users"
+class Credential(db.Model):
+    """A way to sign in to an Account: a password hash or a Google subject."""
+
+    __tablename__ = "credentials"
+    __table_args__ = (
+        # One credential per provider per account; also serves account_id lookups.
+        db.UniqueConstraint("account_id", "provider", name="ux_credentials_account_provider"),
+        # Partial (WHERE subject IS NOT NULL) on PostgreSQL, see migrations.py; a
+        # postgresql_where= here would import the dialect when the models load.
+        db.Index("ux_credentials_provider_subject", "provider", "subject", unique=True),
+    )
+
+    PROVIDERS = ("password", "google")
 
     id         = db.Column(db.Integer, primary_key=True)
-    username   = db.Column(db.String(100), nullable=False)
-    email      = db.Column(db.String(150), unique=True, nullable=False, index=True)
-    password   = db.Column(db.String(255), nullable=False)   # SHA-256 hex digest
+    account_id = db.Column(db.Integer, db.ForeignKey("accounts.id", ondelete="CASCADE"), nullable=False)
+    provider   = db.Column(db.String(20), nullable=False)     # 'password' | 'google'
+    subject    = db.Column(db.String(255), nullable=True)     # Google `sub`
+    secret     = db.Column(db.String(255), nullable=True)     # encoded hash, see rooms/passwords.py
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
 
     def __repr__(self):
-        return f"<User {self.username}>"
+        return f"<Credential {self.provider} account={self.account_id}>"
 
 
 class Room(db.Model):
     """Stores information about student/pro rooms (WhatsApp group links)."""
 
     __tablename__ = "rooms"
+    __table_args__ = (
+        # Backs the newest-first keyset pagination in /api/rooms.
+        db.Index("ix_rooms_created_at_id", "created_at", "id"),
+        # Backs max(updated_at) in the listing ETag.
+        db.Index("ix_rooms_updated_at", "updated_at"),
+    )
 
     id            = db.Column(db.Integer, primary_key=True)
     name          = db.Column(db.String(100), nullable=False)
     description   = db.Column(db.Text, nullable=True)
     whatsapp_link = db.Column(db.String(500), nullable=False)
     password      = db.Column(db.String(6), nullable=False)  # 6-digit password
-    # Linking to users is tricky since we have two types. 
-    # For now, we'll store creator_info as a string or use two optional FKs.
-    creator_id    = db.Column(db.Integer, nullable=False)
-    creator_type  = db.Column(db.String(20), nullable=False) # 'local' or 'sso'
+    # Rooms outlive their creator's account.
+    creator_id    = db.Column(db.Integer,
+                              db.ForeignKey("accounts.id", ondelete="SET NULL", name="fk_rooms_creator_id"),
+                              nullable=True, index=True)
     created_at    = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    # Set by ORM updates; NULL until a room is first edited. Versions cached room cards.
+    updated_at    = db.Column(db.DateTime, nullable=True, onupdate=datetime.utcnow)
+
+    # Columns exposed through the room API (and selectable with `fields=`).
+    API_FIELDS = ("id", "name", "description", "created_at", "creator_id")
+    # What a dashboard card needs: the API fields plus its cache version.
+    CARD_FIELDS = API_FIELDS + ("updated_at",)
+
+    def to_dict(self, fields=None):
+        """Serialise the room; `fields` limits the output to those columns."""
+        data = {}
+        for field in fields or self.API_FIELDS:
+            value = getattr(self, field)
+            data[field] = value.isoformat() if field == "created_at" else value
+        return data
+
+    @classmethod
+    def api_columns(cls, fields=None):
+        """Column list for a projected `select()` of `fields` (default: all API fields)."""
+        return [getattr(cls, field) for field in fields or cls.API_FIELDS]
+
+    @classmethod
+    def rows_to_dicts(cls, rows, fields=None, native_datetimes=False):
+        """
+        Serialise result tuples of `select(*Room.api_columns(fields), …)`
+        like `to_dict`, without building ORM instances. Extra trailing
+        columns are ignored. With `native_datetimes` created_at stays a
+        datetime, for a JSON provider that encodes it (rooms/serialization.py).
+        """
+        fields = tuple(fields or cls.API_FIELDS)
+        dicts  = [dict(zip(fields, row)) for row in rows]
+        if "created_at" in fields and not native_datetimes:
+            for data in dicts:
+                data["created_at"] = data["created_at"].isoformat()
+        return dicts
+
+
+class RoomStat(db.Model):
+    """Join attempts on one room in one hour (rooms/analytics.py)."""
+
+    __tablename__ = "room_stats"
+    __table_args__ = (
+        # The trending query scans the last ROOMS_TRENDING_WINDOW hours.
+        db.Index("ix_room_stats_bucket", "bucket"),
+    )
 
-    def to_dict(self):
-        return {
-            "id":          self.id,
-            "name":        self.name,
-            "description": self.description,
-            "created_at":  self.created_at.isoformat(),
-            "creator_type": self.creator_type
-        }
+    room_id      = db.Column(db.Integer, db.ForeignKey("rooms.id", ondelete="CASCADE"), primary_key=True)
+    bucket       = db.Column(db.DateTime, primary_key=True)      # start of the hour
+    joins        = db.Column(db.BigInteger, nullable=False, default=0)
+    failed_joins = db.Column(db.BigInteger, nullable=False, default=0)
+
+
+class JSONDocument(db.TypeDecorator):
+    """JSON, stored as JSONB on PostgreSQL; the dialect is imported when first compiled for."""
+
+    impl     = db.JSON
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "postgresql":
+            from sqlalchemy.dialects.postgresql import JSONB
+            return dialect.type_descriptor(JSONB())
+        return dialect.type_descriptor(db.JSON())
+
+
+class Job(db.Model):
+    """A durable background job (rooms/jobs.py, JOBS_BACKEND=postgres)."""
+
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # Consumers claim the oldest due jobs; on PostgreSQL dead jobs drop out
+        # of the index (WHERE failed_at IS NULL, see migrations.py).
+        db.Index("ix_jobs_due", "run_at", "id"),
+    )
+
+    id           = db.Column(db.BigInteger().with_variant(db.Integer, "sqlite"), primary_key=True)
+    kind         = db.Column(db.String(100), nullable=False)
+    payload      = db.Column(JSONDocument(), nullable=False)
+    coalesce_key = db.Column(db.String(255), nullable=True)   # same kind + key: newest payload wins
+    attempts     = db.Column(db.Integer, nullable=False, default=0)
+    run_at       = db.Column(db.DateTime, nullable=False)
+    created_at   = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    failed_at    = db.Column(db.DateTime, nullable=True)      # set once attempts run out
+    last_error   = db.Column(db.Text, nullable=True)
+
+    def __repr__(self):
+        return f"<Job {self.kind} #{self.id}>"
@@ -0,0 +1,259 @@
+"""
+rooms/analytics.py
+──────────────────
+Room join analytics and the trending ranking behind GET /api/rooms?sort=trending.
+
+    record_join(room_id, ok)    called by join_room for every attempt on an
+                                existing room; only bumps a counter in memory
+
+Each process counts attempts per room ({room_id: [joins, failed]}) and
+flushes them every ROOM_STATS_FLUSH_INTERVAL seconds as one batched
+upsert into room_stats, a row per room and hour – a popular room's row
+is written once per interval per worker, not once per join. The flush
+is a coalescing job on the thread queue (rooms/jobs.py), so it runs off
+the request path, retries on failure and drains at a clean exit.
+
+The trending ranking – up to ROOMS_TRENDING_SIZE room ids ordered by
+joins over the last ROOMS_TRENDING_WINDOW hours, each hour's weight
+halving every ROOMS_TRENDING_HALF_LIFE hours – is computed by a query
+over room_stats, kept per process and recomputed in the background once
+it is older than ROOMS_TRENDING_REFRESH seconds, or after a flush. It is
+always read from the primary: every later request is served from it, so
+a lagging replica must not shape it. Requests only read it.
+Rooms nobody joined in the window are not in the ranking. Hourly rows
+older than ROOM_STATS_RETENTION_DAYS are pruned by the background refresh.
+
+The flush is one unnest() upsert on PostgreSQL; other dialects (SQLite in
+development) get the same upsert as SQLAlchemy Core. The ranking query is
+Core on every dialect: each hour's decay weight is computed in Python and
+passed in, so the database only sums joins × weight.
+"""
+
+import hashlib
+import threading
+import time
+from array import array
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import case, delete, func, select
+
+from rooms.db.replicas import primary_reads
+from rooms.jobs import enqueue, job
+from rooms.Models import db, Room, RoomStat
+
+FLUSH_JOB   = "rooms.flush_join_stats"
+REFRESH_JOB = "rooms.refresh_trending"
+
+# ids: array of room ids, best first; version: digest of the ids (ETags, cache keys).
+Ranking = namedtuple("Ranking", "ids version")
+EMPTY_RANKING = Ranking(array("q"), "none")
+
+# Rooms deleted since the attempt drop out through the join.
+UPSERT_JOIN_STATS = """
+    INSERT INTO room_stats (room_id, bucket, joins, failed_joins)
+    SELECT v.room_id, :bucket, v.joins, v.failed
+      FROM unnest(CAST(:ids AS integer[]), CAST(:joins AS bigint[]), CAST(:failed AS bigint[]))
+           AS v (room_id, joins, failed)
+      JOIN rooms ON rooms.id = v.room_id
+     ORDER BY v.room_id
+    ON CONFLICT (room_id, bucket) DO UPDATE
+       SET joins        = room_stats.joins + EXCLUDED.joins,
+           failed_joins = room_stats.failed_joins + EXCLUDED.failed_joins
+"""
+
+
+def hour_bucket(at):
+    return at.replace(minute=0, second=0, microsecond=0)
+
+
+def upsert_join_stats(bucket, ids, joins, failed):
+    """Add the counts of rooms `ids` to their `bucket` rows (rooms since deleted are skipped)."""
+    if db.session.get_bind().dialect.name == "postgresql":
+        db.session.execute(db.text(UPSERT_JOIN_STATS),
+                           {"bucket": bucket, "ids": ids, "joins": joins, "failed": failed})
+        return
+    from sqlalchemy.dialects.sqlite import insert
+
+    existing = set(db.session.scalars(select(Room.id).where(Room.id.in_(ids))))
+    rows = [{"room_id": i, "bucket": bucket, "joins": j, "failed_joins": f}
+            for i, j, f in zip(ids, joins, failed) if i in existing]
+    if not rows:
+        return
+    stmt = insert(RoomStat).values(rows)
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=[RoomStat.room_id, RoomStat.bucket],
+        set_={"joins":        RoomStat.joins + stmt.excluded.joins,
+              "failed_joins": RoomStat.failed_joins + stmt.excluded.failed_joins},
+    ))
+
+
+def trending_query(now, window, half_life, limit):
+    """
+    Room ids by joins over the `window` hours before `now`, each hour
+    weighted 0.5 ** (age / half_life), best first.
+    """
+    since, bucket, weights = hour_bucket(now - timedelta(hours=window)), hour_bucket(now), []
+    while bucket >= since:
+        age = (now - bucket).total_seconds() / 3600
+        weights.append((RoomStat.bucket == bucket, 0.5 ** (age / half_life)))
+        bucket -= timedelta(hours=1)
+    score = func.sum(RoomStat.joins * case(*weights, else_=0.0))
+    return (
+        select(RoomStat.room_id)
+        .where(RoomStat.bucket >= since)
+        .group_by(RoomStat.room_id)
+        .having(func.sum(RoomStat.joins) > 0)
+        .order_by(score.desc(), RoomStat.room_id.desc())
+        .limit(limit)
+    )
+
+
+class RoomStats:
+    """Per-process join counters and trending ranking of one app."""
+
+    def __init__(self, flush_interval=10.0, window=48.0, half_life=6.0, size=1000,
+                 refresh=60.0, retention_days=30):
+        self.flush_interval = flush_interval
+        self.window         = window
+        self.half_life      = half_life
+        self.size           = size
+        self.refresh        = refresh
+        self.retention_days = retention_days
+        self.totals         = [0, 0]    # joins, failed: recorded by this process
+        self._lock          = threading.Lock()
+        self._pending       = {}        # room_id → [joins, failed] since the last flush
+        self._scheduled     = False
+        self._ranking       = None
+        self._ranked_at     = float("-inf")
+        self._pruned_at     = float("-inf")
+
+    # ── Counting ─────────────────────────────────────────────────────────────
+    def record(self, room_id, ok):
+        slot = 0 if ok else 1
+        with self._lock:
+            counts = self._pending.get(room_id)
+            if counts is None:
+                counts = self._pending[room_id] = [0, 0]
+            counts[slot] += 1
+            self.totals[slot] += 1
+            schedule, self._scheduled = not self._scheduled, True
+        if schedule:
+            enqueue(FLUSH_JOB, {}, key="flush", delay=self.flush_interval)
+
+    def take(self):
+        """Hand over the counts since the last flush (the next record schedules a new one)."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._scheduled = False
+        return pending
+
+    def restore(self, pending):
+        """Put back counts whose flush failed; the queue retries the flush."""
+        with self._lock:
+            for room_id, (joins, failed) in pending.items():
+                counts = self._pending.setdefault(room_id, [0, 0])
+                counts[0] += joins
+                counts[1] += failed
+
+    def flush(self):
+        pending = self.take()
+        if not pending:
+            return
+        ids = sorted(pending)
+        try:
+            upsert_join_stats(hour_bucket(datetime.utcnow()), ids,
+                              [pending[i][0] for i in ids], [pending[i][1] for i in ids])
+            db.session.commit()
+        except Exception:
+            self.restore(pending)
+            raise
+
+    # ── Ranking ──────────────────────────────────────────────────────────────
+    def ranking(self):
+        """The current Ranking; the first call computes it, later ones refresh it in the background."""
+        if self._ranking is None:
+            self.rank()
+        elif self.stale():
+            enqueue(REFRESH_JOB, {}, key="rank")
+        return self._ranking
+
+    def stale(self):
+        return time.monotonic() - self._ranked_at > self.refresh
+
+    def rank(self):
+        with primary_reads():
+            ids = array("q", db.session.scalars(
+                trending_query(datetime.utcnow(), self.window, self.half_life, self.size)))
+        version = hashlib.blake2b(ids.tobytes(), digest_size=6).hexdigest() if ids else "none"
+        self._ranking, self._ranked_at = Ranking(ids, version), time.monotonic()
+
+    def prune(self):
+        """Delete hourly rows past the retention, at most once an hour."""
+        if time.monotonic() - self._pruned_at < 3600:
+            return
+        cutoff = hour_bucket(datetime.utcnow() - timedelta(days=self.retention_days))
+        db.session.execute(delete(RoomStat).where(RoomStat.bucket < cutoff))
+        db.session.commit()
+        self._pruned_at = time.monotonic()
+
+    def stats(self):
+        with self._lock:
+            joins, failed = self.totals
+            pending = len(self._pending)
+        ranked = len(self._ranking.ids) if self._ranking is not None else 0
+        return {"joins": joins, "failed_joins": failed, "pending_rooms": pending, "ranked_rooms": ranked}
+
+
+class NullRoomStats:
+    """ROOM_STATS_ENABLED=false: nothing is counted and nothing trends."""
+
+    def record(self, room_id, ok):
+        pass
+
+    def ranking(self):
+        return EMPTY_RANKING
+
+    def stats(self):
+        return {}
+
+
+@job(FLUSH_JOB, coalesce=True, durable=False)
+def flush_join_stats(payloads):
+    stats = room_stats()
+    stats.flush()
+    if stats.stale():
+        stats.rank()        # fold the new counts in here rather than on a request
+
+
+@job(REFRESH_JOB, coalesce=True, durable=False)
+def refresh_trending(payloads):
+    stats = room_stats()
+    stats.rank()
+    stats.prune()
+
+
+def init_analytics(app):
+    """Attach the app's RoomStats (or a no-op one when disabled)."""
+    config = app.config
+    if not config["ROOM_STATS_ENABLED"]:
+        stats = NullRoomStats()
+    else:
+        stats = RoomStats(
+            flush_interval=config["ROOM_STATS_FLUSH_INTERVAL"], window=config["ROOMS_TRENDING_WINDOW"],
+            half_life=config["ROOMS_TRENDING_HALF_LIFE"], size=config["ROOMS_TRENDING_SIZE"],
+            refresh=config["ROOMS_TRENDING_REFRESH"], retention_days=config["ROOM_STATS_RETENTION_DAYS"],
+        )
+    app.extensions["room_stats"] = stats
+    return stats
+
+
+def room_stats():
+    """The RoomStats of the current app."""
+    return current_app.extensions["room_stats"]
+
+
+def record_join(room_id, ok):
+    """Count one join attempt on `room_id` (ok: the password matched)."""
+    room_stats().record(room_id, ok)
@@ -0,0 +1,417 @@
+"""
+rooms/asgi.py
+─────────────
+ASGI serving mode (see asgi.py at the project root).
+
+Two routes are served natively async; every other route is the
+unchanged Flask app, run through asgiref's WSGI adapter.
+
+    /auth/google/callback  the token exchange and discovery/JWKS fetches go
+                           through a shared httpx.AsyncClient and the account
+                           sign-in through an asyncpg pool, so thousands of
+                           logins can wait on Google without a thread each
+    /api/rooms/stream      the SSE room feed (rooms/feed.py): one asyncpg
+                           LISTEN per worker wakes every subscriber through
+                           a shared future, so an idle subscriber is a
+                           parked coroutine rather than a thread
+
+Session, flash and redirect handling reuse the Flask app itself (a
+request context is pushed around the callback), so both serving modes
+share cookies and session backends.
+"""
+
+import asyncio
+import contextvars
+import io
+import sys
+import time
+from datetime import datetime
+
+import asyncpg
+import httpx
+from asgiref.wsgi import WsgiToAsgi
+from authlib.integrations.base_client.errors import OAuthError
+from flask import flash, jsonify, redirect, request, session, url_for
+
+from rooms.feed import (
+    HEARTBEAT, LATEST_SQL, LISTEN_PING, RECONNECT_DELAY, REPLAY_PARAMS, REPLAY_SQL,
+    FeedBuffer, last_event_id, room_payload, sse_frame, sse_preamble,
+)
+from rooms.identity import (
+    GOOGLE_SIGN_IN, GOOGLE_SIGN_IN_PARAMS, google_sign_in_params, numbered, record_sign_in
+)
+from rooms.oauth import google_client
+from rooms.sessions import regenerate_session, user_profile
+
+CALLBACK_PATH = "/auth/google/callback"
+FEED_PATH     = "/api/rooms/stream"
+
+# The same single-statement sign-in as the sync callback, in asyncpg's $n style.
+GOOGLE_SIGN_IN_ASYNC = numbered(GOOGLE_SIGN_IN, GOOGLE_SIGN_IN_PARAMS)
+REPLAY_SQL_ASYNC     = numbered(REPLAY_SQL, REPLAY_PARAMS)
+
+
+def asyncpg_dsn(sqlalchemy_uri):
+    """Turn a `postgresql+psycopg2://` SQLAlchemy URI into an asyncpg DSN."""
+    scheme, rest = sqlalchemy_uri.split("://", 1)
+    return "postgresql://" + rest
+
+
+def wsgi_environ(scope, body=b""):
+    """Minimal WSGI environ for an ASGI HTTP scope (enough for a request context)."""
+    server = scope.get("server") or ("localhost", 80)
+    environ = {
+        "REQUEST_METHOD":  scope["method"],
+        "SCRIPT_NAME":     scope.get("root_path", "").encode().decode("latin1"),
+        "PATH_INFO":       scope["path"].encode().decode("latin1"),
+        "QUERY_STRING":    scope["query_string"].decode("ascii"),
+        "SERVER_NAME":     server[0],
+        "SERVER_PORT":     str(server[1] or 80),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR":     (scope.get("client") or ("", 0))[0],
+        "wsgi.version":    (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input":      io.BytesIO(body),
+        "wsgi.errors":     sys.stderr,
+        "wsgi.multithread":  True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once":     False,
+    }
+    for raw_name, raw_value in scope["headers"]:
+        name  = raw_name.decode("latin1").upper().replace("-", "_")
+        value = raw_value.decode("latin1")
+        if name not in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            name = "HTTP_" + name
+        environ[name] = f"{environ[name]},{value}" if name in environ else value
+    return environ
+
+
+async def send_response(send, response):
+    """Send a (non-streamed) Flask response over ASGI."""
+    await send({
+        "type":    "http.response.start",
+        "status":  response.status_code,
+        "headers": [(k.lower().encode("latin1"), v.encode("latin1"))
+                    for k, v in response.headers.to_wsgi_list()],
+    })
+    await send({"type": "http.response.body", "body": response.get_data()})
+
+
+class AsyncGoogleCallback:
+    """Async implementation of `google_callback` from rooms/views.py."""
+
+    def __init__(self, flask_app):
+        self.app    = flask_app
+        self.client = google_client(flask_app)
+        self.http   = None
+        self.pool   = None
+
+    async def startup(self):
+        config = self.app.config
+        self.http = httpx.AsyncClient(timeout=config["OAUTH_HTTP_TIMEOUT"])
+        self.pool = await asyncpg.create_pool(
+            asyncpg_dsn(config["SQLALCHEMY_DATABASE_URI"]),
+            min_size=config["DB_POOL_MIN_SIZE"],
+            max_size=config["DB_POOL_SIZE"] + config["DB_POOL_MAX_OVERFLOW"],
+            max_inactive_connection_lifetime=config["DB_POOL_RECYCLE"],
+        )
+
+    async def shutdown(self):
+        if self.http is not None:
+            await self.http.aclose()
+        if self.pool is not None:
+            await self.pool.close()
+
+    # ── OAuth ────────────────────────────────────────────────────────────────
+    async def _load_metadata(self):
+        """
+        Fill the Authlib client's metadata (discovery document + JWKS) without
+        blocking; the sync client then finds it cached and skips its own fetch.
+        """
+        metadata = self.client.server_metadata
+        if "_loaded_at" not in metadata:
+            resp = await self.http.get(self.client._server_metadata_url)
+            resp.raise_for_status()
+            metadata.update(resp.json(), _loaded_at=time.time())
+        if "jwks" not in metadata:
+            resp = await self.http.get(metadata["jwks_uri"])
+            resp.raise_for_status()
+            metadata["jwks"] = resp.json()
+        return metadata
+
+    async def _fetch_token(self, code, state_data):
+        metadata = await self._load_metadata()
+        resp = await self.http.post(
+            metadata["token_endpoint"],
+            data={"grant_type": "authorization_code", "code": code,
+                  "redirect_uri": state_data["redirect_uri"]},
+            auth=(self.client.client_id, self.client.client_secret),
+            headers={"Accept": "application/json"},
+        )
+        token = resp.json()
+        if resp.status_code != 200 or "error" in token:
+            raise OAuthError(error=token.get("error", "token_error"),
+                             description=token.get("error_description"))
+        if "id_token" in token and "nonce" in state_data:
+            # Keys are cached in the metadata, so this does no network I/O.
+            token["userinfo"] = self.client.parse_id_token(token, nonce=state_data["nonce"])
+        return token
+
+    async def _sign_in(self, user_info):
+        params = google_sign_in_params(user_info, datetime.utcnow())
+        args   = [params[name] for name in GOOGLE_SIGN_IN_PARAMS]
+        async with self.pool.acquire() as conn:
+            try:
+                account = await conn.fetchrow(GOOGLE_SIGN_IN_ASYNC, *args)
+            except asyncpg.UniqueViolationError:
+                # Lost a race with a concurrent first sign-in; it exists now.
+                account = await conn.fetchrow(GOOGLE_SIGN_IN_ASYNC, *args)
+        if not account["inserted"]:
+            record_sign_in(account["id"], params["now"])
+        return account
+
+    async def _handle(self):
+        """Mirror of the sync route; runs with a Flask request context pushed."""
+        try:
+            if request.args.get("error"):
+                raise OAuthError(error=request.args["error"],
+                                 description=request.args.get("error_description"))
+
+            state      = request.args.get("state")
+            state_data = self.client.framework.get_state_data(session, state)
+            self.client.framework.clear_state_data(session, state)
+            if not state_data:
+                raise OAuthError(error="mismatching_state",
+                                 description="CSRF Warning! State not equal in request and response.")
+
+            token     = await self._fetch_token(request.args.get("code"), state_data)
+            user_info = token.get("userinfo")
+            if not user_info:
+                flash("Failed to fetch user info from Google 😞", "error")
+                return redirect(url_for("main.login"))
+
+            user = await self._sign_in(user_info)
+            regenerate_session()
+            session["account_id"]  = user["id"]
+            session["user_email"]  = user["email"]
+            session["is_new_user"] = user["inserted"]
+            session["profile"]     = user_profile(user["id"], user["email"], user["name"],
+                                                  user_info.get("picture"))
+            if user["inserted"]:
+                flash(f"Welcome to Pro Rooms, {user['name']}! 🎉", "success")
+            else:
+                flash(f"Welcome back, {user['name']}! 👋", "success")
+            return redirect(url_for("main.dashboard"))
+
+        except OAuthError as e:
+            flash(f"OAuth error: {str(e)}", "error")
+            return redirect(url_for("main.login"))
+        except Exception as e:
+            print(f"[google_callback:async] Unexpected error: {e}")
+            flash(f"Authentication failed: {str(e)}", "error")
+            return redirect(url_for("main.login"))
+
+    # ── ASGI ─────────────────────────────────────────────────────────────────
+    async def __call__(self, scope, receive, send):
+        ctx = self.app.request_context(wsgi_environ(scope))
+        ctx.push()
+        try:
+            # Run before_request hooks (metrics timing) as the WSGI path would.
+            response = self.app.preprocess_request()
+            if response is None:
+                response = await self._handle()
+            response = self.app.process_response(self.app.make_response(response))
+        finally:
+            ctx.pop()
+        await send_response(send, response)
+
+
+class AsyncFeedHub(FeedBuffer):
+    """
+    asyncio twin of rooms.feed.FeedHub: an asyncpg LISTEN connection,
+    opened with the first subscriber, and one shared future that every
+    waiting subscriber parks on until the next event.
+    """
+
+    def __init__(self, dsn, channel, size):
+        super().__init__(size)
+        self.dsn         = dsn
+        self.channel     = channel
+        self.subscribers = 0
+        self._changed = None
+        self._ready   = None
+        self._task    = None
+
+    async def subscribe(self):
+        """Start listening if this is the first subscriber; returns the current seq."""
+        if self._task is None:
+            loop = asyncio.get_running_loop()
+            self._changed = loop.create_future()
+            self._ready   = asyncio.Event()
+            self._task    = loop.create_task(self._listen())
+        try:
+            await asyncio.wait_for(self._ready.wait(), RECONNECT_DELAY)
+        except asyncio.TimeoutError:
+            pass
+        self.subscribers += 1
+        return self.seq
+
+    def publish(self, payload):
+        self._append(payload)
+        self._wake()
+
+    def _wake(self):
+        changed, self._changed = self._changed, asyncio.get_running_loop().create_future()
+        changed.set_result(None)
+
+    async def wait(self, seq, timeout, disconnected):
+        """Events after `seq` (see FeedBuffer.since); [] after `timeout` or a disconnect."""
+        if seq == self.seq:
+            await asyncio.wait((self._changed, disconnected), timeout=timeout,
+                               return_when=asyncio.FIRST_COMPLETED)
+        return self.since(seq)
+
+    async def _listen(self):
+        while True:
+            conn, lost = None, asyncio.Event()
+            try:
+                conn = await asyncpg.connect(self.dsn)
+                conn.add_termination_listener(lambda _conn: lost.set())
+                await conn.add_listener(self.channel,
+                                        lambda _conn, _pid, _channel, payload: self.publish(payload))
+                self._ready.set()
+                while not lost.is_set():
+                    try:
+                        await asyncio.wait_for(lost.wait(), LISTEN_PING)
+                    except asyncio.TimeoutError:
+                        await conn.execute("SELECT 1")
+            except asyncio.CancelledError:
+                if conn is not None:
+                    await conn.close()
+                raise
+            except Exception as e:
+                print(f"❌ Room feed listener lost its connection ({e}); reconnecting…")
+            if conn is not None:
+                conn.terminate()
+            self._ready.clear()
+            self._reset()
+            self._wake()
+            await asyncio.sleep(RECONNECT_DELAY)
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+
+class AsyncRoomFeed:
+    """Async implementation of `room_stream` from rooms/views.py."""
+
+    def __init__(self, flask_app, callback):
+        config = flask_app.config
+        self.app      = flask_app
+        self.callback = callback     # shares its asyncpg pool
+        self.hub      = AsyncFeedHub(asyncpg_dsn(config["SQLALCHEMY_DATABASE_URI"]),
+                                     config["FEED_CHANNEL"], config["FEED_BUFFER"])
+
+    async def _backlog(self, last_id):
+        """(replayed payloads, preamble): rooms after last_id, or the anchor for a fresh client."""
+        config = self.app.config
+        async with self.callback.pool.acquire() as conn:
+            if last_id is None:
+                return [], sse_preamble(config["FEED_RETRY_MS"], await conn.fetchval(LATEST_SQL))
+            rows = await conn.fetch(REPLAY_SQL_ASYNC, last_id, config["FEED_REPLAY_LIMIT"])
+        backlog = [room_payload({**row, "created_at": row["created_at"].isoformat()}) for row in rows]
+        return backlog, sse_preamble(config["FEED_RETRY_MS"])
+
+    @staticmethod
+    async def _until_disconnect(receive):
+        while (await receive())["type"] != "http.disconnect":
+            pass
+
+    async def __call__(self, scope, receive, send):
+        with self.app.request_context(wsgi_environ(scope)):
+            last_id  = last_event_id(request.headers, request.args)
+            response = None
+            if "account_id" not in session:
+                response = self.app.make_response((jsonify({"error": "Unauthorized"}), 401))
+        if response is not None:
+            await send_response(send, response)
+            return
+
+        hub = self.hub
+        seq = await hub.subscribe()
+        disconnected = asyncio.ensure_future(self._until_disconnect(receive))
+        try:
+            # Subscribed first, then read the backlog; duplicates are skipped below.
+            backlog, preamble = await self._backlog(last_id)
+            replayed, chunk = set(), [preamble]
+            for payload in backlog:
+                room_id, frame = sse_frame(payload)
+                replayed.add(room_id)
+                chunk.append(frame)
+            await send({
+                "type": "http.response.start", "status": 200,
+                "headers": [(b"content-type", b"text/event-stream; charset=utf-8"),
+                            (b"cache-control", b"no-cache"), (b"x-accel-buffering", b"no")],
+            })
+            await send({"type": "http.response.body", "body": b"".join(chunk), "more_body": True})
+
+            heartbeat = self.app.config["FEED_HEARTBEAT"]
+            while True:
+                events = await hub.wait(seq, heartbeat, disconnected)
+                if disconnected.done():
+                    return
+                if events is None:
+                    break                  # fell behind: the client resumes by replay
+                if events:
+                    seq  = events[-1][0]
+                    body = b"".join(frame for _, room_id, frame in events if room_id not in replayed)
+                else:
+                    body = HEARTBEAT
+                await send({"type": "http.response.body", "body": body, "more_body": True})
+            await send({"type": "http.response.body", "body": b""})
+        finally:
+            hub.subscribers -= 1
+            disconnected.cancel()
+
+
+def create_asgi_app(flask_app):
+    """Wrap `flask_app` as an ASGI application with the async OAuth callback and room feed."""
+    wsgi     = WsgiToAsgi(flask_app)
+    callback = AsyncGoogleCallback(flask_app)
+    feed     = AsyncRoomFeed(flask_app, callback) if flask_app.config["FEED_ENABLED"] else None
+    flask_app.extensions["room_feed_async"] = feed is not None   # served here, not by the WSGI route
+
+    async def application(scope, receive, send):
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    try:
+                        await callback.startup()
+                    except Exception as e:
+                        await send({"type": "lifespan.startup.failed", "message": str(e)})
+                        return
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    if feed is not None:
+                        await feed.hub.stop()
+                    await callback.shutdown()
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        elif scope["type"] == "http" and scope["path"] == CALLBACK_PATH:
+            await callback(scope, receive, send)
+        elif scope["type"] == "http" and scope["path"] == FEED_PATH and feed is not None:
+            await feed(scope, receive, send)
+        else:
+            # A fresh context per request: uvicorn starts a keep-alive
+            # connection's next request from inside the previous response's
+            # send(), which asgiref runs in its finished AsyncToSync context –
+            # inherited, that makes the adapter pick a dead thread executor.
+            await asyncio.create_task(wsgi(scope, receive, send), context=contextvars.Context())
+
+    return application
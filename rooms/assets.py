@@ -0,0 +1,360 @@
+"""
+rooms/assets.py
+───────────────
+Static asset pipeline.
+
+    flask assets build            minify, fingerprint and precompress static/
+    flask assets build --clean    … and delete files the new manifest no longer lists
+
+The build writes to ASSETS_BUILD_DIR (default static-dist/, next to
+static/):
+
+    • CSS is minified; the stylesheets a page loads together are bundled
+      into one file (BUNDLES)
+    • PNGs are re-encoded losslessly (row filters and deflate re-chosen,
+      metadata chunks dropped) when that makes them smaller
+    • every file gets a content hash in its name – css/dashboard.3f2a9c1b0e.css
+    • text files get .gz (and .br, when the `brotli` package is installed)
+      variants next to them
+    • manifest.json maps each logical name to its fingerprinted file
+
+With a manifest present, `url_for('static', filename='css/login.css')`
+returns the fingerprinted URL, and fingerprinted files are served with
+`Cache-Control: public, max-age=…, immutable` and the best precompressed
+variant the client accepts. A changed file gets a new name, so browsers
+never revalidate. Without a build (development) static/ is served as
+before, and bundles are concatenated on request.
+
+The manifest is replaced last and atomically, and a build without
+--clean keeps the previous fingerprints, so pages rendered by workers
+still running the old release keep resolving during a rolling deploy.
+"""
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import struct
+import zlib
+
+import click
+from flask import current_app, request, send_from_directory
+from flask.cli import AppGroup
+
+# Stylesheets loaded together by one page, served as one file.
+BUNDLES = {
+    "css/dashboard.css": ("css/header.css", "css/menuBar.css", "css/rooms.css"),
+}
+
+COMPRESSIBLE = {".css", ".js", ".svg", ".json", ".txt", ".html", ".xml", ".ico"}
+MIN_SAVING   = 0.9     # keep a precompressed variant only below 90 % of the original
+MANIFEST     = "manifest.json"
+ENCODING_SUFFIX = {"br": ".br", "gzip": ".gz"}   # in order of preference
+
+
+def _import_brotli():
+    """The optional brotli module; .br variants are skipped without it."""
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+# ── CSS ───────────────────────────────────────────────────────────────────────
+_CSS_STRING  = r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\''
+_CSS_COMMENT = re.compile(rf"({_CSS_STRING})|/\*.*?\*/", re.S)
+_CSS_SPLIT   = re.compile(rf"({_CSS_STRING})", re.S)
+_CSS_SPACE   = re.compile(r"\s*([{};,>])\s*|(:)\s+|\s+")
+_CSS_IMPORT  = re.compile(rf"@import(?:{_CSS_STRING}|[^;\"'])*;", re.S)
+
+
+def minify_css(css):
+    """Drop comments and insignificant whitespace; strings are left untouched."""
+    css = _CSS_COMMENT.sub(lambda m: m.group(1) or "", css)
+    parts = _CSS_SPLIT.split(css)
+    for i in range(0, len(parts), 2):     # odd indexes are string literals
+        parts[i] = _CSS_SPACE.sub(lambda m: m.group(1) or m.group(2) or " ", parts[i])
+    return "".join(parts).replace(";}", "}").strip()
+
+
+def bundle_css(sources):
+    """Concatenate stylesheets, hoisting @import rules, which must come first."""
+    imports, rules = [], []
+    for css in sources:
+        imports += _CSS_IMPORT.findall(css)
+        rules.append(_CSS_IMPORT.sub("", css))
+    return "".join(imports) + "".join(rules)
+
+
+# ── PNG ───────────────────────────────────────────────────────────────────────
+# Chunks that change how the image renders; the rest (text, timestamps,
+# physical size, …) are metadata browsers ignore.
+_PNG_KEEP = {b"IHDR", b"PLTE", b"IDAT", b"IEND", b"tRNS", b"gAMA", b"cHRM", b"sRGB", b"iCCP"}
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+_PNG_CHANNELS  = {0: 1, 2: 3, 4: 2, 6: 4}   # colour type → samples per pixel
+
+
+def _paeth(a, b, c):
+    p = a + b - c
+    pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+    if pa <= pb and pa <= pc:
+        return a
+    return b if pb <= pc else c
+
+
+def _png_rows(raw, height, stride, bpp):
+    """Undo the per-row filters of a decompressed IDAT stream."""
+    rows, prev, i = [], bytes(stride), 0
+    for _ in range(height):
+        kind, line = raw[i], bytearray(raw[i + 1:i + 1 + stride])
+        i += 1 + stride
+        if kind == 1:
+            for x in range(bpp, stride):
+                line[x] = (line[x] + line[x - bpp]) & 0xFF
+        elif kind == 2:
+            line = bytearray((v + up) & 0xFF for v, up in zip(line, prev))
+        elif kind == 3:
+            for x in range(stride):
+                left = line[x - bpp] if x >= bpp else 0
+                line[x] = (line[x] + ((left + prev[x]) >> 1)) & 0xFF
+        elif kind == 4:
+            for x in range(stride):
+                left, upleft = (line[x - bpp], prev[x - bpp]) if x >= bpp else (0, 0)
+                line[x] = (line[x] + _paeth(left, prev[x], upleft)) & 0xFF
+        rows.append(bytes(line))
+        prev = line
+    return rows
+
+
+def _png_adaptive(rows, stride, bpp):
+    """Re-filter each row with the filter minimising its sum of absolute residuals."""
+    out, prev = bytearray(), bytes(stride)
+    for line in rows:
+        left, upleft = bytes(bpp) + line[:-bpp], bytes(bpp) + prev[:-bpp]
+        candidates = (
+            line,
+            bytes((v - a) & 0xFF for v, a in zip(line, left)),
+            bytes((v - b) & 0xFF for v, b in zip(line, prev)),
+            bytes((v - ((a + b) >> 1)) & 0xFF for v, a, b in zip(line, left, prev)),
+            bytes((v - _paeth(a, b, c)) & 0xFF for v, a, b, c in zip(line, left, prev, upleft)),
+        )
+        kind = min(range(5), key=lambda k: sum(v if v < 128 else 256 - v for v in candidates[k]))
+        out.append(kind)
+        out += candidates[kind]
+        prev = line
+    return bytes(out)
+
+
+def _png_chunk(kind, data):
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+def optimize_png(data):
+    """
+    Losslessly re-encode a PNG: try the original row filters, no filters
+    and adaptive filters, each at maximum deflate, and drop metadata
+    chunks. Returns the input unchanged if nothing is smaller.
+    """
+    if not data.startswith(_PNG_SIGNATURE):
+        return data
+    chunks, idat, i = [], b"", len(_PNG_SIGNATURE)
+    while i < len(data):
+        length, kind = struct.unpack(">I4s", data[i:i + 8])
+        body = data[i + 8:i + 8 + length]
+        i += 12 + length
+        if kind == b"IDAT":
+            idat += body
+        elif kind in _PNG_KEEP:
+            chunks.append((kind, body))
+    width, height, depth, colour, _, _, interlace = struct.unpack(">IIBBBBB", chunks[0][1])
+
+    raw = zlib.decompress(idat)
+    streams = [raw]
+    if depth == 8 and not interlace and colour in _PNG_CHANNELS:
+        bpp  = _PNG_CHANNELS[colour]
+        rows = _png_rows(raw, height, width * bpp, bpp)
+        streams += [b"".join(b"\0" + row for row in rows), _png_adaptive(rows, width * bpp, bpp)]
+    best = min((zlib.compress(s, 9) for s in streams), key=len)
+
+    out = [_PNG_SIGNATURE]
+    for kind, body in chunks:
+        if kind == b"IEND":
+            out.append(_png_chunk(b"IDAT", best))
+        out.append(_png_chunk(kind, body))
+    out = b"".join(out)
+    return out if len(out) < len(data) else data
+
+
+# ── Build ─────────────────────────────────────────────────────────────────────
+def fingerprint(name, content):
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{hashlib.sha256(content).hexdigest()[:10]}{ext}"
+
+
+def _read(source_dir, name):
+    with open(os.path.join(source_dir, name), "rb") as f:
+        return f.read()
+
+
+def _write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(content)
+    os.replace(tmp, path)
+
+
+def _sources(source_dir, skip):
+    for root, dirs, files in os.walk(source_dir):
+        dirs[:] = sorted(d for d in dirs if os.path.join(root, d) != skip)
+        for filename in sorted(files):
+            yield os.path.relpath(os.path.join(root, filename), source_dir).replace(os.sep, "/")
+
+
+def _process(name, content):
+    if name.endswith(".css"):
+        return minify_css(content.decode("utf-8")).encode("utf-8")
+    if name.endswith(".png"):
+        return optimize_png(content)
+    return content
+
+
+def _precompress(content):
+    """{encoding: bytes} for the variants worth serving."""
+    variants = {"gzip": gzip.compress(content, 9, mtime=0)}
+    brotli = _import_brotli()
+    if brotli:
+        variants["br"] = brotli.compress(content, quality=11)
+    return {enc: data for enc, data in variants.items() if len(data) < len(content) * MIN_SAVING}
+
+
+def build(source_dir, build_dir):
+    """Build every asset into build_dir; returns (manifest, [(name, before, after, encodings)])."""
+    outputs = {}
+    for name in _sources(source_dir, skip=os.path.abspath(build_dir)):
+        content = _read(source_dir, name)
+        outputs[name] = (len(content), _process(name, content))
+    for name, members in BUNDLES.items():
+        css = [_read(source_dir, m).decode("utf-8") for m in members]
+        outputs[name] = (sum(map(len, css)), minify_css(bundle_css(css)).encode("utf-8"))
+
+    manifest = {"files": {}, "encodings": {}}
+    report = []
+    for name, (before, content) in outputs.items():
+        hashed = fingerprint(name, content)
+        _write(os.path.join(build_dir, hashed), content)
+        encodings = []
+        if os.path.splitext(name)[1].lower() in COMPRESSIBLE:
+            for encoding, data in _precompress(content).items():
+                _write(os.path.join(build_dir, hashed + ENCODING_SUFFIX[encoding]), data)
+                encodings.append(encoding)
+        manifest["files"][name] = hashed
+        if encodings:
+            manifest["encodings"][hashed] = encodings
+        report.append((name, before, len(content), encodings))
+
+    _write(os.path.join(build_dir, MANIFEST), json.dumps(manifest, indent=2, sort_keys=True).encode())
+    return manifest, report
+
+
+def clean(build_dir, manifest):
+    """Delete built files the manifest no longer references; returns how many."""
+    keep = {MANIFEST}
+    for hashed in manifest["files"].values():
+        keep.add(hashed)
+        keep.update(hashed + ENCODING_SUFFIX[e] for e in manifest["encodings"].get(hashed, ()))
+    removed = 0
+    for name in list(_sources(build_dir, skip=None)):
+        if name not in keep:
+            os.remove(os.path.join(build_dir, name))
+            removed += 1
+    return removed
+
+
+# ── Serving ───────────────────────────────────────────────────────────────────
+class Assets:
+    """The loaded manifest, and the static view that serves from it."""
+
+    def __init__(self, source_dir, build_dir, max_age):
+        self.source_dir = source_dir
+        self.build_dir  = build_dir
+        self.max_age    = max_age
+        self.files, self.encodings = {}, {}
+        path = os.path.join(build_dir, MANIFEST)
+        if os.path.exists(path):
+            with open(path) as f:
+                manifest = json.load(f)
+            self.files, self.encodings = manifest["files"], manifest["encodings"]
+        self.fingerprinted = set(self.files.values())
+
+    def url_filename(self, filename):
+        return self.files.get(filename, filename)
+
+    def serve(self, filename):
+        if filename in self.fingerprinted:
+            return self._immutable(filename)
+        if filename in self.files:
+            # An unfingerprinted URL (hardcoded in a template or bookmarked):
+            # the built content, revalidated like any static file.
+            return send_from_directory(self.build_dir, self.files[filename])
+        if filename in BUNDLES:
+            css = bundle_css(_read(self.source_dir, m).decode("utf-8") for m in BUNDLES[filename])
+            return current_app.response_class(css, mimetype="text/css")
+        return send_from_directory(self.source_dir, filename)
+
+    def _immutable(self, filename):
+        accepted = [e for e in self.encodings.get(filename, ()) if request.accept_encodings[e]]
+        encoding = min(accepted, key=list(ENCODING_SUFFIX).index, default=None)
+        mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        response = send_from_directory(
+            self.build_dir, filename + ENCODING_SUFFIX.get(encoding, ""),
+            mimetype=mimetype, max_age=self.max_age,
+        )
+        if encoding:
+            response.content_encoding = encoding
+        if filename in self.encodings:
+            response.vary.add("Accept-Encoding")
+        response.cache_control.public    = True
+        response.cache_control.immutable = True
+        return response
+
+
+def init_assets(app):
+    """Serve static files through the build manifest, if one has been built."""
+    source_dir = app.static_folder
+    build_dir  = app.config["ASSETS_BUILD_DIR"] or os.path.join(app.root_path, "static-dist")
+    assets = app.extensions["assets"] = Assets(source_dir, build_dir, app.config["ASSETS_MAX_AGE"])
+
+    @app.url_defaults
+    def fingerprinted_static(endpoint, values):
+        if endpoint == "static" and "filename" in values:
+            values["filename"] = assets.url_filename(values["filename"])
+
+    app.view_functions["static"] = assets.serve
+
+
+# ── CLI: flask assets … ───────────────────────────────────────────────────────
+assets_cli = AppGroup("assets", help="Static asset pipeline.")
+
+
+@assets_cli.command("build")
+@click.option("--clean", "prune", is_flag=True, help="Delete files of earlier builds.")
+def build_command(prune):
+    """Minify, bundle, fingerprint and precompress static/."""
+    assets = current_app.extensions["assets"]
+    manifest, report = build(assets.source_dir, assets.build_dir)
+    total_before = total_after = 0
+    for name, before, after, encodings in sorted(report):
+        total_before += before
+        total_after  += after
+        note = f"  +{','.join(encodings)}" if encodings else ""
+        click.echo(f"  {name:<60} {before:>8} → {after:>8} B{note}")
+    click.echo(f"✅ {len(report)} assets built into {assets.build_dir} "
+               f"({total_before} → {total_after} bytes).")
+    if _import_brotli() is None:
+        click.echo("⚠️  'brotli' is not installed; only gzip variants were written.")
+    if prune:
+        click.echo(f"✅ Removed {clean(assets.build_dir, manifest)} stale file(s).")
@@ -0,0 +1,320 @@
+"""
+rooms/bulk.py
+─────────────
+Bulk room import/export as NDJSON or CSV, with constant memory.
+
+Import parses the input lazily, validates it in batches of
+`BULK_BATCH_SIZE` with the same rules as `create_room`, and writes each
+batch with one PostgreSQL `COPY ... FROM STDIN` (executemany on other
+backends), committing per batch. Export streams rows out with
+`COPY ... TO STDOUT` for CSV on PostgreSQL, or a server-side cursor
+otherwise.
+
+Exposed as `flask rooms import/export` and as the admin API in rooms/views.py.
+"""
+
+import csv
+import io
+import json
+import queue
+import threading
+from datetime import datetime
+from itertools import islice
+from urllib.parse import urlparse
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import insert, select
+
+from rooms.Models import db, Account, Room
+
+FORMATS = ("ndjson", "csv")
+COLUMNS = ("name", "description", "whatsapp_link", "password", "creator_id", "created_at")
+MAX_REPORTED_ERRORS = 100
+
+
+# ── Parsing & validation ──────────────────────────────────────────────────────
+def iter_records(stream, fmt):
+    """Yield (line_number, record dict) from a text stream, lazily."""
+    if fmt == "csv":
+        for line_no, row in enumerate(csv.DictReader(stream), start=2):
+            yield line_no, row
+    else:
+        for line_no, line in enumerate(stream, start=1):
+            if line.strip():
+                try:
+                    yield line_no, json.loads(line)
+                except ValueError:
+                    yield line_no, None
+
+
+def validate_record(record, defaults):
+    """Return a clean row tuple in COLUMNS order, or raise ValueError."""
+    if not isinstance(record, dict):
+        raise ValueError("not a JSON object")
+    record = {**defaults, **{k: v for k, v in record.items() if v not in (None, "")}}
+
+    name          = str(record.get("name", "")).strip()
+    description   = str(record.get("description", "")).strip()
+    whatsapp_link = str(record.get("whatsapp_link", "")).strip()
+    password      = str(record.get("password", "")).strip()
+
+    if not all([name, whatsapp_link, password]):
+        raise ValueError("missing required fields")
+    if len(name) > 100:
+        raise ValueError("name longer than 100 characters")
+    if len(password) != 6 or not password.isdigit():
+        raise ValueError("password must be a 6-digit number")
+    link = urlparse(whatsapp_link)
+    if link.scheme not in ("http", "https") or not link.netloc or len(whatsapp_link) > 500:
+        raise ValueError("whatsapp_link must be an http(s) URL")
+    creator_id = record.get("creator_id")
+    if creator_id is not None:
+        try:
+            creator_id = int(creator_id)
+        except (TypeError, ValueError):
+            raise ValueError("creator_id must be an integer account id") from None
+    created_at = record.get("created_at") or datetime.utcnow()
+    if isinstance(created_at, str):
+        created_at = datetime.fromisoformat(created_at)
+
+    return (name, description, whatsapp_link, password, creator_id, created_at)
+
+
+def _unknown_creators(rows):
+    """creator_ids in `rows` with no account (they would fail the foreign key)."""
+    ids = {row[4] for row in rows if row[4] is not None}
+    if not ids:
+        return set()
+    known = db.session.execute(select(Account.id).where(Account.id.in_(ids))).scalars()
+    return ids - set(known)
+
+
+def _batches(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+# ── Writers ───────────────────────────────────────────────────────────────────
+def _copy_rows(rows):
+    """Insert a batch with one COPY FROM STDIN (PostgreSQL)."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for row in rows:
+        writer.writerow(v.isoformat() if isinstance(v, datetime) else v for v in row)
+    buf.seek(0)
+
+    conn = db.engine.raw_connection()
+    try:
+        with conn.cursor() as cursor:
+            # FORCE_NOT_NULL keeps an empty description "" rather than NULL.
+            cursor.copy_expert(
+                f"COPY rooms ({', '.join(COLUMNS)}) FROM STDIN "
+                "WITH (FORMAT csv, FORCE_NOT_NULL (description))", buf
+            )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _executemany_rows(rows):
+    """Insert a batch with one executemany (any backend)."""
+    db.session.execute(insert(Room), [dict(zip(COLUMNS, row)) for row in rows])
+    db.session.commit()
+
+
+def import_rooms(stream, fmt="ndjson", defaults=None, batch_size=None, use_copy=None):
+    """
+    Import rooms from `stream`. Invalid records are skipped and reported;
+    valid ones are written batch by batch. Returns a summary dict.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of {', '.join(FORMATS)}")
+    batch_size = batch_size or current_app.config["BULK_BATCH_SIZE"]
+    if use_copy is None:
+        use_copy = db.engine.dialect.name == "postgresql"
+    write = _copy_rows if use_copy else _executemany_rows
+
+    imported, rejected, errors = 0, 0, []
+    for batch in _batches(iter_records(stream, fmt), batch_size):
+        rows, lines = [], []
+        for line_no, record in batch:
+            try:
+                rows.append(validate_record(record, defaults or {}))
+                lines.append(line_no)
+            except ValueError as e:
+                rejected += 1
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append({"line": line_no, "error": str(e)})
+        unknown = _unknown_creators(rows)
+        if unknown:
+            kept = []
+            for line_no, row in zip(lines, rows):
+                if row[4] in unknown:
+                    rejected += 1
+                    if len(errors) < MAX_REPORTED_ERRORS:
+                        errors.append({"line": line_no, "error": f"no account with id {row[4]}"})
+                else:
+                    kept.append(row)
+            rows = kept
+        if rows:
+            write(rows)
+            imported += len(rows)
+
+    # Bulk writes bypass ORM events: refresh listings and the search index.
+    if imported:
+        current_app.extensions["room_cache"].invalidate()
+        current_app.extensions["room_search"].invalidate()
+    return {"imported": imported, "rejected": rejected, "errors": errors}
+
+
+# ── Export ────────────────────────────────────────────────────────────────────
+EXPORT_COLUMNS = ("id",) + COLUMNS
+
+
+class _ExportCancelled(Exception):
+    """Raised inside `copy_expert` to abort the COPY once the client is gone."""
+
+
+def _export_copy_csv(chunk_size):
+    """Stream `COPY ... TO STDOUT` output through a bounded queue."""
+    chunks    = queue.Queue(maxsize=64)
+    cancelled = threading.Event()
+    done      = object()
+
+    def put(item):
+        # A full queue nobody drains any more must not pin the thread (and
+        # the connection) forever: give up once the consumer has closed.
+        while True:
+            if cancelled.is_set():
+                raise _ExportCancelled()
+            try:
+                return chunks.put(item, timeout=0.5)
+            except queue.Full:
+                continue
+
+    class _Writer:
+        """psycopg2 writes one row per call; hand them on in `chunk_size` slabs."""
+        def __init__(self):
+            self.parts, self.size = [], 0
+
+        def write(self, data):
+            self.parts.append(data if isinstance(data, str) else data.decode())
+            self.size += len(data)
+            if self.size >= chunk_size:
+                self.flush()
+
+        def flush(self):
+            if self.parts:
+                put("".join(self.parts))
+                self.parts, self.size = [], 0
+
+    conn = db.engine.raw_connection()
+
+    def run():
+        writer = _Writer()
+        try:
+            with conn.cursor() as cursor:
+                cursor.copy_expert(
+                    f"COPY (SELECT {', '.join(EXPORT_COLUMNS)} FROM rooms ORDER BY id) "
+                    "TO STDOUT WITH (FORMAT csv, HEADER)", writer
+                )
+            writer.flush()
+            conn.rollback()
+            put(done)
+        except _ExportCancelled:
+            pass
+        except Exception as e:
+            try:
+                put(e)
+            except _ExportCancelled:
+                pass
+
+    thread = threading.Thread(target=run, name="export-copy", daemon=True)
+    thread.start()
+    finished = False
+    try:
+        while (chunk := chunks.get()) is not done:
+            if isinstance(chunk, Exception):
+                raise chunk
+            yield chunk
+        finished = True
+    finally:
+        cancelled.set()
+        thread.join()
+        if not finished:
+            conn.invalidate()       # an aborted COPY leaves the connection unusable
+        conn.close()
+
+
+def _export_cursor(fmt, chunk_size):
+    """Stream rows through a server-side cursor (any backend)."""
+    stmt = (
+        select(*(getattr(Room, c) for c in EXPORT_COLUMNS))
+        .order_by(Room.id)
+        .execution_options(yield_per=chunk_size)
+    )
+    if fmt == "csv":
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        writer.writerow(EXPORT_COLUMNS)
+    for partition in db.session.execute(stmt).partitions():
+        if fmt == "csv":
+            for row in partition:
+                writer.writerow(v.isoformat() if isinstance(v, datetime) else v for v in row)
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+        else:
+            yield "".join(
+                json.dumps({c: (v.isoformat() if isinstance(v, datetime) else v)
+                            for c, v in zip(EXPORT_COLUMNS, row)}) + "\n"
+                for row in partition
+            )
+
+
+def export_rooms(fmt="ndjson", chunk_size=None):
+    """Yield the rooms table as NDJSON or CSV text chunks."""
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of {', '.join(FORMATS)}")
+    chunk_size = chunk_size or current_app.config["BULK_BATCH_SIZE"]
+    if fmt == "csv" and db.engine.dialect.name == "postgresql":
+        return _export_copy_csv(chunk_size * 64)   # bytes per streamed chunk
+    return _export_cursor(fmt, chunk_size)
+
+
+# ── CLI: flask rooms import / export ──────────────────────────────────────────
+rooms_cli = AppGroup("rooms", help="Bulk room import/export.")
+
+
+def _format_for(path, fmt):
+    if fmt:
+        return fmt
+    return "csv" if path.endswith(".csv") else "ndjson"
+
+
+@rooms_cli.command("import")
+@click.argument("path", type=click.Path(dir_okay=False, allow_dash=True))
+@click.option("--format", "fmt", type=click.Choice(FORMATS), help="Default: from the file extension.")
+@click.option("--creator-id", type=int, help="Account id for records that omit creator_id.")
+@click.option("--batch-size", type=int, help="Rows per COPY/commit (default BULK_BATCH_SIZE).")
+def import_command(path, fmt, creator_id, batch_size):
+    """Import rooms from an NDJSON or CSV file ('-' for stdin)."""
+    defaults = {"creator_id": creator_id} if creator_id is not None else {}
+    with click.open_file(path, encoding="utf-8") as stream:
+        summary = import_rooms(stream, _format_for(path, fmt), defaults, batch_size)
+    for error in summary["errors"]:
+        click.echo(f"line {error['line']}: {error['error']}", err=True)
+    click.echo(f"✅ Imported {summary['imported']} rooms, rejected {summary['rejected']}.")
+
+
+@rooms_cli.command("export")
+@click.argument("path", type=click.Path(dir_okay=False, allow_dash=True), default="-")
+@click.option("--format", "fmt", type=click.Choice(FORMATS), help="Default: from the file extension.")
+def export_command(path, fmt):
+    """Export all rooms as NDJSON or CSV ('-' for stdout)."""
+    with click.open_file(path, "w", encoding="utf-8") as out:
+        for chunk in export_rooms(_format_for(path, fmt)):
+            out.write(chunk)
@@ -0,0 +1,346 @@
+"""
+rooms/cache.py
+──────────────
+Read-through cache for room lookups and room listings.
+
+Two tiers:
+    local  – per-process LRU with a TTL (always on when caching is enabled)
+    shared – optional Redis tier (`CACHE_REDIS_URL`) shared by all workers
+
+Listings are stored under a generation number; creating, updating or
+deleting a Room bumps the generation (after the transaction commits), so
+every cached listing is invalidated in O(1) without scanning keys.
+
+The generation lives in the shared tier when there is one, so a write
+invalidates the listings of every worker. Without CACHE_REDIS_URL each
+process keeps its own generation and a write only reaches the listings
+of the worker that made it; the other workers would serve their copies
+(and their ETags) until CACHE_TTL. With more than one worker process
+(SERVER_WORKERS, or one per CPU) listings are therefore only kept for
+CACHE_LOCAL_LISTING_TTL seconds, which bounds how stale they can be.
+Room lookups have the same limit, but no route edits a room after it is
+created (a bulk import that replaces one is seen by other workers after
+CACHE_TTL).
+
+Values in the shared tier are JSON (datetimes tagged so they round-trip),
+never pickles: whoever can write to the Redis instance can't make the
+workers run code. Each app's cache lives in `app.extensions`.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import nullcontext
+from datetime import datetime
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from rooms.db.replicas import primary_reads
+from rooms.Models import db, Room
+from rooms.redis_client import import_redis
+
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Thread-safe LRU with a per-entry TTL and hit/miss/eviction counters."""
+
+    def __init__(self, max_entries=1024, ttl=60.0):
+        self.max_entries = max_entries
+        self.ttl         = ttl
+        self._data  = OrderedDict()       # key → (expires_at, value)
+        self._lock  = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        return {"entries": len(self._data), "hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions, "expirations": self.expirations}
+
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return {"$datetime": value.isoformat()}
+    raise TypeError(f"{type(value).__name__} can't be cached in the shared tier")
+
+
+def _decode(obj):
+    return datetime.fromisoformat(obj["$datetime"]) if obj.keys() == {"$datetime"} else obj
+
+
+def dumps(value):
+    """JSON for the shared tier; tuples come back as lists."""
+    return json.dumps(value, default=_encode, separators=(",", ":"))
+
+
+def loads(raw):
+    return json.loads(raw, object_hook=_decode)
+
+
+class RedisCache:
+    """Shared tier over any Redis-protocol server; values are JSON (see dumps())."""
+
+    def __init__(self, url, ttl=60.0, prefix="prorooms:", setting="CACHE_REDIS_URL"):
+        redis = import_redis(setting)
+        self.RedisError = redis.RedisError
+        self._client = redis.Redis.from_url(url)
+        self.ttl     = ttl
+        self.prefix  = prefix
+        self.hits = self.misses = self.errors = 0
+
+    def get(self, key, default=None):
+        try:
+            raw = self._client.get(self.prefix + key)
+        except self.RedisError:
+            self.errors += 1
+            return default
+        try:
+            value = _MISSING if raw is None else loads(raw)
+        except ValueError:              # not ours (e.g. written by an older release)
+            value = _MISSING
+        if value is _MISSING:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return value
+
+    def set(self, key, value, ttl=None):
+        try:
+            self._client.set(self.prefix + key, dumps(value),
+                             px=int((self.ttl if ttl is None else ttl) * 1000))
+        except self.RedisError:
+            self.errors += 1
+
+    def delete(self, key):
+        try:
+            self._client.delete(self.prefix + key)
+        except self.RedisError:
+            self.errors += 1
+
+    def incr(self, key):
+        try:
+            return self._client.incr(self.prefix + key)
+        except self.RedisError:
+            self.errors += 1
+            return None
+
+    def get_int(self, key):
+        try:
+            return int(self._client.get(self.prefix + key) or 0)
+        except self.RedisError:
+            self.errors += 1
+            return None
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "errors": self.errors}
+
+
+class RoomCache:
+    """Room-by-id and listing cache in front of the database."""
+
+    # How long a worker trusts its copy of the shared listing generation.
+    GENERATION_TTL = 1.0
+
+    def __init__(self, local, shared=None, listing_ttl=None):
+        self.local  = local
+        self.shared = shared
+        self.listing_ttl    = listing_ttl   # None: the tiers' own TTL
+        self._generation    = 0
+        self._generation_at = 0.0
+
+    # ── Tiered get/set ───────────────────────────────────────────────────────
+    def get(self, key):
+        value = self.local.get(key, _MISSING)
+        if value is _MISSING and self.shared is not None:
+            value = self.shared.get(key, _MISSING)
+            if value is not _MISSING:
+                self.local.set(key, value)
+        return None if value is _MISSING else value
+
+    def set(self, key, value, ttl=None):
+        self.local.set(key, value, ttl)
+        if self.shared is not None:
+            self.shared.set(key, value, ttl)
+
+    def set_listing(self, key, value):
+        """Store a listing under a key from `listing_key()`."""
+        self.set(key, value, self.listing_ttl)
+
+    def filling(self):
+        """
+        Context for reading what an entry is cached from: the primary, as
+        the entry is served to other clients too (see rooms/db/replicas.py).
+        """
+        return primary_reads()
+
+    def get_or_load(self, key, loader):
+        """Return the cached value for `key`, calling `loader()` on a miss."""
+        value = self.get(key)
+        if value is None:
+            with self.filling():
+                value = loader()
+            if value is not None:
+                self.set(key, value)
+        return value
+
+    # ── Rooms ────────────────────────────────────────────────────────────────
+    def room(self, room_id):
+        """Join data ({id, password, whatsapp_link}) for one room, or None."""
+        def load():
+            room = db.session.get(Room, room_id)
+            if room is None:
+                return None
+            return {"id": room.id, "password": room.password,
+                    "whatsapp_link": room.whatsapp_link}
+        return self.get_or_load(f"room:{room_id}", load)
+
+    def listing_key(self, name):
+        """
+        Cache key for listing `name` under the current generation. Compute
+        it once before loading, so a write racing the load stores the
+        result under the already-stale generation.
+        """
+        return f"rooms:g{self._current_generation()}:{name}"
+
+    def shared_generation(self):
+        """The listing generation shared by all workers, or None without a shared tier."""
+        return self._current_generation() if self.shared is not None else None
+
+    def _current_generation(self):
+        if self.shared is None:
+            return self._generation
+        now = time.monotonic()
+        if now - self._generation_at > self.GENERATION_TTL:
+            generation = self.shared.get_int("rooms:generation")
+            if generation is not None:
+                self._generation = generation
+            self._generation_at = now
+        return self._generation
+
+    def invalidate(self, room_ids=()):
+        """Drop the given rooms and every cached listing."""
+        for room_id in room_ids:
+            self.local.delete(f"room:{room_id}")
+            if self.shared is not None:
+                self.shared.delete(f"room:{room_id}")
+        self._generation += 1
+        if self.shared is not None:
+            generation = self.shared.incr("rooms:generation")
+            if generation is not None:
+                self._generation    = generation
+                self._generation_at = time.monotonic()
+
+    def stats(self):
+        stats = {"local": self.local.stats()}
+        if self.shared is not None:
+            stats["shared"] = self.shared.stats()
+        return stats
+
+
+class NullRoomCache(RoomCache):
+    """Pass-through used when CACHE_ENABLED is off."""
+
+    def __init__(self):
+        super().__init__(local=None)
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, ttl=None):
+        pass
+
+    def filling(self):
+        return nullcontext()     # nothing is kept: reads may use a replica
+
+    def invalidate(self, room_ids=()):
+        pass
+
+    def stats(self):
+        return {}
+
+
+# ── Invalidation (SQLAlchemy events) ──────────────────────────────────────────
+# Rooms touched in a session are collected by mapper events and only
+# invalidated once the transaction commits; invalidating earlier would let
+# a concurrent request re-cache the pre-commit state.
+def _mark_room_dirty(mapper, connection, room):
+    session = object_session(room)
+    if session is not None:
+        session.info.setdefault("dirty_room_ids", set()).add(room.id)
+
+
+def _invalidate_after_commit(session):
+    room_ids = session.info.pop("dirty_room_ids", None)
+    cache    = current_app.extensions.get("room_cache") if has_app_context() else None
+    if room_ids is not None and cache is not None:
+        cache.invalidate(room_ids)
+
+
+def _discard_after_rollback(session, previous_transaction):
+    session.info.pop("dirty_room_ids", None)
+
+
+for _event in ("after_insert", "after_update", "after_delete"):
+    event.listen(Room, _event, _mark_room_dirty)
+event.listen(Session, "after_commit", _invalidate_after_commit)
+event.listen(Session, "after_soft_rollback", _discard_after_rollback)
+
+
+def init_cache(app):
+    """Create the app's RoomCache from its config."""
+    config = app.config
+    if not config["CACHE_ENABLED"]:
+        cache = NullRoomCache()
+    else:
+        local  = LRUCache(config["CACHE_MAX_ENTRIES"], config["CACHE_TTL"])
+        url    = config["CACHE_REDIS_URL"]
+        shared = RedisCache(url, config["CACHE_TTL"]) if url else None
+        # Per-process generations can't see other workers' writes: keep listings briefly.
+        listing_ttl = None
+        if shared is None and (config["SERVER_WORKERS"] or os.cpu_count() or 1) > 1:
+            listing_ttl = min(config["CACHE_TTL"], config["CACHE_LOCAL_LISTING_TTL"])
+        cache  = RoomCache(local, shared, listing_ttl)
+    app.extensions["room_cache"] = cache
+    return cache
+
+
+def room_cache():
+    """The RoomCache of the current app."""
+    return current_app.extensions["room_cache"]
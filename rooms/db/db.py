@@ -3,21 +3,23 @@ rooms/db/db.py
 ──────────────
 PostgreSQL database initialisation helper.
 Called by build.py before the Flask app starts to ensure the target
-database exists.
+database exists. Tables are created by the migrations (rooms/db/migrate.py).
 """
 
 import os
 import psycopg2
 from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
-from dotenv import load_dotenv
 
-load_dotenv()
+from rooms.Config import load_env
+
+load_env()
 
 
 def db_create(db_folder=None):
     """
-    Connect to the PostgreSQL *server* (using the default 'postgres' database)
-    and create the application database if it doesn't already exist.
+    Ensure the application database exists. Connects to it directly first;
+    only when that fails because it is missing does it go through the
+    server's default 'postgres' database to create it.
 
     Environment variables used:
         DB_HOST     – e.g. localhost
@@ -32,6 +34,17 @@ def db_create(db_folder=None):
     db_user     = os.getenv("DB_USER",     "postgres")
     db_password = os.getenv("DB_PASSWORD", "postgres")
 
+    # Common case: the database exists, and one connection to it proves it.
+    try:
+        psycopg2.connect(host=db_host, port=db_port, user=db_user,
+                         password=db_password, dbname=db_name).close()
+        return
+    except psycopg2.OperationalError as e:
+        if "does not exist" not in str(e):
+            print(f"❌ Could not connect to PostgreSQL server: {e}")
+            print("   Make sure PostgreSQL is running and your .env credentials are correct.")
+            raise
+
     try:
         # Connect to the default 'postgres' database so we can create ours
         conn = psycopg2.connect(
@@ -0,0 +1,196 @@
+"""
+rooms/db/migrate.py
+───────────────────
+Applies the versioned schema in rooms/db/migrations.py.
+
+    flask db upgrade   apply pending migrations
+    flask db status    schema version, pending migrations, model drift
+
+Startup (app.py, gunicorn when_ready) calls `ensure_schema()`. When the
+schema is current – every start but the first after a deploy – that
+costs two catalog-sized queries and takes no lock. Otherwise the runner holds a
+PostgreSQL advisory lock while migrating, so when several processes
+start together exactly one migrates; the rest wait for the lock, then
+find nothing left to do.
+
+Applied versions are recorded in `schema_migrations`. Other dialects
+(SQLite in development) have no migrations and get `create_all()`.
+"""
+
+import sys
+import time
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import inspect
+
+from rooms.db.migrations import MIGRATIONS
+from rooms.Models import db
+
+LOCK_ID   = 0x70726F726F6F6D73   # "proroom s" – pg_advisory_lock key
+LOCK_POLL = 0.5                  # seconds between attempts while another process migrates
+HEAD      = MIGRATIONS[-1].version
+
+VERSION_TABLE_DDL = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version     INTEGER PRIMARY KEY,
+        name        TEXT NOT NULL,
+        applied_at  TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+        duration_ms INTEGER NOT NULL
+    )
+"""
+
+
+def _version(cursor):
+    cursor.execute("SELECT to_regclass('schema_migrations') IS NOT NULL")
+    if not cursor.fetchone()[0]:
+        return 0
+    cursor.execute("SELECT coalesce(max(version), 0) FROM schema_migrations")
+    return cursor.fetchone()[0]
+
+
+def schema_version(engine):
+    """Highest applied migration (0 for a database never migrated)."""
+    conn = engine.raw_connection()
+    try:
+        with conn.cursor() as cursor:
+            version = _version(cursor)
+        conn.rollback()
+        return version
+    finally:
+        conn.close()
+
+
+def pending(version):
+    return [m for m in MIGRATIONS if m.version > version]
+
+
+def _apply(cursor, migration):
+    started = time.perf_counter()
+    if not migration.concurrent:
+        cursor.execute("BEGIN")
+    try:
+        for step in migration.steps:
+            if callable(step):
+                step(cursor)
+            else:
+                cursor.execute(step)
+        cursor.execute(
+            "INSERT INTO schema_migrations (version, name, duration_ms) VALUES (%s, %s, %s)",
+            (migration.version, migration.name, round((time.perf_counter() - started) * 1000)),
+        )
+        if not migration.concurrent:
+            cursor.execute("COMMIT")
+    except Exception:
+        if not migration.concurrent:
+            cursor.execute("ROLLBACK")
+        raise
+    print(f"✅ Migration {migration.version:04d} applied: {migration.name} "
+          f"({(time.perf_counter() - started) * 1000:.0f} ms)")
+
+
+def _acquire_lock(cursor):
+    """
+    Poll pg_try_advisory_lock rather than block in pg_advisory_lock: a
+    waiter blocked inside a statement has an open transaction, and
+    CREATE INDEX CONCURRENTLY in the migrating process waits for every
+    open transaction – a deadlock. Idle between polls, waiters hold none.
+    """
+    waiting = False
+    while True:
+        cursor.execute("SELECT pg_try_advisory_lock(%s)", (LOCK_ID,))
+        if cursor.fetchone()[0]:
+            return
+        if not waiting:
+            print("⏳ Another process is migrating the database; waiting…")
+            waiting = True
+        time.sleep(LOCK_POLL)
+
+
+def upgrade(engine):
+    """Apply pending migrations under the advisory lock; returns those applied."""
+    if engine.dialect.name != "postgresql":
+        db.metadata.create_all(engine)
+        return []
+    if schema_version(engine) >= HEAD:
+        return []
+
+    # A connection of its own: it runs in autocommit (CREATE INDEX
+    # CONCURRENTLY refuses transactions) and owns a session-level lock,
+    # neither of which may leak back into the pool.
+    conn = engine.raw_connection()
+    conn.detach()
+    conn.dbapi_connection.autocommit = True
+    applied = []
+    try:
+        with conn.cursor() as cursor:
+            _acquire_lock(cursor)
+            try:
+                cursor.execute(VERSION_TABLE_DDL)
+                for migration in pending(_version(cursor)):
+                    _apply(cursor, migration)
+                    applied.append(migration)
+            finally:
+                cursor.execute("SELECT pg_advisory_unlock(%s)", (LOCK_ID,))
+    finally:
+        conn.close()
+    return applied
+
+
+def ensure_schema(engine, apply=True):
+    """
+    Startup hook: migrate (apply=True, DB_MIGRATE_ON_START) or only warn
+    when the schema is behind, for deploys that run `flask db upgrade`
+    as a separate release step.
+    """
+    if apply:
+        upgrade(engine)
+        print("✅ Database schema is current.")
+        return
+    if engine.dialect.name == "postgresql":
+        missing = pending(schema_version(engine))
+        if missing:
+            print(f"❌ Database schema is {len(missing)} migration(s) behind; run `flask db upgrade`.")
+
+
+def schema_drift(engine):
+    """Tables, columns and indexes of the ORM models missing from the database."""
+    inspector = inspect(engine)
+    missing = []
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            missing.append(table.name)
+            continue
+        columns = {c["name"] for c in inspector.get_columns(table.name)}
+        indexes = ({i["name"] for i in inspector.get_indexes(table.name)} |
+                   {u["name"] for u in inspector.get_unique_constraints(table.name)})
+        missing += [f"{table.name}.{c.name}" for c in table.columns if c.name not in columns]
+        missing += [f"{table.name} index {i.name}" for i in table.indexes if i.name not in indexes]
+    return missing
+
+
+# ── CLI: flask db … ───────────────────────────────────────────────────────────
+db_cli = AppGroup("db", help="Schema migrations.")
+
+
+@db_cli.command("upgrade")
+def upgrade_command():
+    """Apply pending migrations."""
+    if not upgrade(db.engine):
+        click.echo("✅ Nothing to migrate.")
+
+
+@db_cli.command("status")
+def status_command():
+    """Show the schema version; exit 1 if migrations are pending or models drifted."""
+    version = schema_version(db.engine) if db.engine.dialect.name == "postgresql" else HEAD
+    waiting = pending(version)
+    drift   = schema_drift(db.engine)
+    click.echo(f"Schema version {version} of {HEAD}.")
+    for migration in waiting:
+        click.echo(f"❌ pending {migration.version:04d}: {migration.name}")
+    for name in drift:
+        click.echo(f"❌ missing from database: {name}")
+    if not waiting and not drift:
+        click.echo("✅ Schema is current and matches the models.")
+    sys.exit(1 if waiting or drift else 0)
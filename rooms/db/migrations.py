@@ -0,0 +1,211 @@
+"""
+rooms/db/migrations.py
+──────────────────────
+The PostgreSQL schema, as an ordered list of versioned migrations.
+
+Applied by rooms/db/migrate.py. Append new migrations at the end and
+never edit one that has shipped. Every step is written to be safe to
+re-run (IF NOT EXISTS, guarded data moves), because databases created
+by the old `db.create_all()` startup are adopted by replaying the list
+from version 1.
+
+Each step is an SQL string or a callable taking a psycopg2 cursor.
+Migrations marked `concurrent` run outside a transaction, one statement
+at a time, so they can use `CREATE INDEX CONCURRENTLY` and build
+indexes on live tables without blocking writes.
+"""
+
+from collections import namedtuple
+
+Migration = namedtuple("Migration", "version name steps concurrent")
+
+
+def migration(version, name, *steps, concurrent=False):
+    return Migration(version, name, steps, concurrent)
+
+
+def concurrent_index(name, table, definition, unique=False, where=None):
+    """
+    Step building an index without locking out writes. A failed concurrent
+    build leaves an INVALID index behind that IF NOT EXISTS would keep
+    forever, so such a leftover is dropped and rebuilt.
+    """
+    sql = (f"CREATE {'UNIQUE ' if unique else ''}INDEX CONCURRENTLY IF NOT EXISTS "
+           f"{name} ON {table} {definition}" + (f" WHERE {where}" if where else ""))
+
+    def step(cursor):
+        cursor.execute("""
+            SELECT NOT i.indisvalid FROM pg_index i
+              JOIN pg_class c ON c.oid = i.indexrelid
+             WHERE c.relname = %s AND pg_table_is_visible(c.oid)
+        """, (name,))
+        row = cursor.fetchone()
+        if row and row[0]:
+            cursor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+        cursor.execute(sql)
+
+    step.sql = sql
+    return step
+
+
+# ── 0002: users + sso_users → accounts + credentials ──────────────────────────
+_LEGACY_USERS = [
+    "ALTER TABLE rooms ALTER COLUMN creator_id DROP NOT NULL",
+
+    # Google users first: their emails are verified.
+    """INSERT INTO accounts (email, display_name, picture, created_at, last_login)
+       SELECT DISTINCT ON (lower(email)) email, name, picture, created_at, last_login
+         FROM sso_users ORDER BY lower(email), id""",
+
+    # Local users without a Google account; a username already taken
+    # case-insensitively by an older user is left NULL (email login only).
+    """INSERT INTO accounts (username, email, display_name, created_at)
+       SELECT CASE WHEN username_rank = 1 THEN username END, email, username, created_at
+         FROM (SELECT DISTINCT ON (lower(email)) u.*,
+                      row_number() OVER (PARTITION BY lower(username) ORDER BY id) AS username_rank
+                 FROM users u
+                ORDER BY lower(email), id) AS u
+        WHERE NOT EXISTS (SELECT 1 FROM accounts a WHERE lower(a.email) = lower(u.email))""",
+
+    """INSERT INTO credentials (account_id, provider, subject, created_at)
+       SELECT a.id, 'google', s.google_id, s.created_at
+         FROM sso_users s JOIN accounts a ON lower(a.email) = lower(s.email)
+       ON CONFLICT DO NOTHING""",
+
+    """INSERT INTO credentials (account_id, provider, secret, created_at)
+       SELECT a.id, 'password', u.password, u.created_at
+         FROM users u JOIN accounts a ON lower(a.email) = lower(u.email)
+        WHERE NOT EXISTS (SELECT 1 FROM credentials c
+                           WHERE c.account_id = a.id AND c.provider = 'google')
+       ON CONFLICT DO NOTHING""",
+
+    # Re-point rooms at accounts; rooms of unknown creators keep no creator.
+    """UPDATE rooms r SET creator_id = CASE r.creator_type
+           WHEN 'sso' THEN (SELECT a.id FROM sso_users s
+                              JOIN accounts a ON lower(a.email) = lower(s.email)
+                             WHERE s.id = r.creator_id)
+           ELSE            (SELECT a.id FROM users u
+                              JOIN accounts a ON lower(a.email) = lower(u.email)
+                             WHERE u.id = r.creator_id)
+       END""",
+    "ALTER TABLE rooms DROP COLUMN creator_type",
+    """ALTER TABLE rooms ADD CONSTRAINT fk_rooms_creator_id FOREIGN KEY (creator_id)
+           REFERENCES accounts (id) ON DELETE SET NULL""",
+]
+
+
+def _migrate_legacy_users(cursor):
+    """Only databases from before accounts existed still have rooms.creator_type."""
+    cursor.execute("""
+        SELECT 1 FROM information_schema.columns
+         WHERE table_schema = current_schema() AND table_name = 'rooms'
+           AND column_name = 'creator_type'
+    """)
+    if cursor.fetchone() is None:
+        return
+    for statement in _LEGACY_USERS:
+        cursor.execute(statement)
+    cursor.execute("SELECT (SELECT count(*) FROM accounts), (SELECT count(*) FROM credentials)")
+    accounts, credentials = cursor.fetchone()
+    print(f"✅ Migrated legacy users: {accounts} accounts, {credentials} credentials.")
+
+
+# ── The schema ────────────────────────────────────────────────────────────────
+MIGRATIONS = [
+    migration(1, "accounts, credentials and rooms tables", """
+        CREATE TABLE IF NOT EXISTS accounts (
+            id           SERIAL PRIMARY KEY,
+            username     VARCHAR(100),
+            email        VARCHAR(255) NOT NULL,
+            display_name VARCHAR(255) NOT NULL,
+            picture      VARCHAR(500),
+            created_at   TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            last_login   TIMESTAMP WITHOUT TIME ZONE
+        )""",
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_accounts_username_lower ON accounts (lower(username))",
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_accounts_email_lower ON accounts (lower(email))",
+        """
+        CREATE TABLE IF NOT EXISTS credentials (
+            id         SERIAL PRIMARY KEY,
+            account_id INTEGER NOT NULL REFERENCES accounts (id) ON DELETE CASCADE,
+            provider   VARCHAR(20) NOT NULL,
+            subject    VARCHAR(255),
+            secret     VARCHAR(255),
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            CONSTRAINT ux_credentials_account_provider UNIQUE (account_id, provider)
+        )""",
+        """CREATE UNIQUE INDEX IF NOT EXISTS ux_credentials_provider_subject
+               ON credentials (provider, subject) WHERE subject IS NOT NULL""",
+        """
+        CREATE TABLE IF NOT EXISTS rooms (
+            id            SERIAL PRIMARY KEY,
+            name          VARCHAR(100) NOT NULL,
+            description   TEXT,
+            whatsapp_link VARCHAR(500) NOT NULL,
+            password      VARCHAR(6) NOT NULL,
+            creator_id    INTEGER CONSTRAINT fk_rooms_creator_id
+                                  REFERENCES accounts (id) ON DELETE SET NULL,
+            created_at    TIMESTAMP WITHOUT TIME ZONE NOT NULL
+        )""",
+    ),
+
+    migration(2, "move users / sso_users into accounts", _migrate_legacy_users),
+
+    # Full-text search (rooms/search/postgres.py). A STORED generated
+    # column: PostgreSQL keeps it current without triggers. Adding it
+    # rewrites rooms once.
+    migration(3, "rooms.search_vector", """
+        ALTER TABLE rooms ADD COLUMN IF NOT EXISTS search_vector tsvector
+            GENERATED ALWAYS AS (
+                setweight(to_tsvector('simple'::regconfig, coalesce(name, '')), 'A') ||
+                setweight(to_tsvector('simple'::regconfig, coalesce(description, '')), 'B')
+            ) STORED
+    """),
+
+    migration(4, "rooms indexes",
+        concurrent_index("ix_rooms_created_at_id", "rooms", "(created_at, id)"),
+        concurrent_index("ix_rooms_creator_id", "rooms", "(creator_id)"),
+        concurrent_index("ix_rooms_search_vector", "rooms", "USING gin (search_vector)"),
+        concurrent=True,
+    ),
+
+    # Durable background jobs (rooms/jobs.py), claimed with FOR UPDATE SKIP LOCKED.
+    migration(5, "jobs table", """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id           BIGSERIAL PRIMARY KEY,
+            kind         VARCHAR(100) NOT NULL,
+            payload      JSONB NOT NULL,
+            coalesce_key VARCHAR(255),
+            attempts     INTEGER NOT NULL DEFAULT 0,
+            run_at       TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            created_at   TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            failed_at    TIMESTAMP WITHOUT TIME ZONE,
+            last_error   TEXT
+        )""",
+        "CREATE INDEX IF NOT EXISTS ix_jobs_due ON jobs (run_at, id) WHERE failed_at IS NULL",
+    ),
+
+    # Hourly join counters per room (rooms/analytics.py), upserted in batches.
+    migration(6, "room_stats table", """
+        CREATE TABLE IF NOT EXISTS room_stats (
+            room_id      INTEGER NOT NULL REFERENCES rooms (id) ON DELETE CASCADE,
+            bucket       TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            joins        BIGINT NOT NULL DEFAULT 0,
+            failed_joins BIGINT NOT NULL DEFAULT 0,
+            PRIMARY KEY (room_id, bucket)
+        )""",
+        "CREATE INDEX IF NOT EXISTS ix_room_stats_bucket ON room_stats (bucket)",
+    ),
+
+    # Version of a room's cached dashboard card (rooms/templating.py).
+    # Nullable without a default: adding it doesn't rewrite rooms.
+    migration(7, "rooms.updated_at",
+        "ALTER TABLE rooms ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITHOUT TIME ZONE",
+    ),
+
+    # max(updated_at) for the listing ETag (rooms/pagination.py), read off the index.
+    migration(8, "rooms.updated_at index",
+        concurrent_index("ix_rooms_updated_at", "rooms", "(updated_at)"),
+        concurrent=True,
+    ),
+]
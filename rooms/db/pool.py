@@ -0,0 +1,126 @@
+"""
+rooms/db/pool.py
+────────────────
+Shared PostgreSQL connection pool.
+
+Both the ORM (`db.session`) and the raw psycopg2 paths in rooms/views.py borrow
+connections from the single SQLAlchemy engine pool built here, so each
+worker holds one set of server connections instead of two.
+"""
+
+import threading
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.util import queue as sqla_queue
+
+
+class _TimedQueue(sqla_queue.Queue):
+    """
+    The pool's idle-connection queue, timing blocking gets: that is where a
+    checkout waits for a connection. Opening a new (overflow) connection
+    and the pre-ping happen outside it and are not counted as waiting.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_lock  = threading.Lock()
+        self.wait_total = 0.0
+        self.wait_max   = 0.0
+
+    def get(self, block=True, timeout=None):
+        if not block:
+            return super().get(block, timeout)
+        start = time.perf_counter()
+        try:
+            return super().get(block, timeout)
+        finally:
+            waited = time.perf_counter() - start
+            with self.wait_lock:
+                self.wait_total += waited
+                self.wait_max    = max(self.wait_max, waited)
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long callers wait to check a connection out."""
+
+    _queue_class = _TimedQueue
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self._checkouts  = 0
+        self._timeouts   = 0
+
+    def connect(self):
+        try:
+            conn = super().connect()
+        except exc.TimeoutError:
+            with self._stats_lock:
+                self._timeouts += 1
+            raise
+        with self._stats_lock:
+            self._checkouts += 1
+        return conn
+
+    def stats(self):
+        """Return a snapshot of the pool gauges and checkout wait counters."""
+        with self._stats_lock:
+            checkouts = self._checkouts
+            timeouts  = self._timeouts
+        with self._pool.wait_lock:
+            wait_total = self._pool.wait_total
+            wait_max   = self._pool.wait_max
+        attempts = checkouts + timeouts
+        return {
+            "size":              self.size(),
+            "checked_out":       self.checkedout(),
+            "idle":              self.checkedin(),
+            "overflow":          self.overflow(),
+            "checkouts":         checkouts,
+            "checkout_timeouts": timeouts,
+            "wait_seconds_total": wait_total,
+            "wait_seconds_max":   wait_max,
+            "wait_seconds_avg":   wait_total / attempts if attempts else 0.0,
+        }
+
+
+def engine_options(config):
+    """
+    Build SQLALCHEMY_ENGINE_OPTIONS from the DB_POOL_* settings on `config`.
+
+    SQLite URIs are left to Flask-SQLAlchemy's own driver defaults, since
+    the in-memory database cannot use a QueuePool.
+    """
+    if config.SQLALCHEMY_DATABASE_URI.startswith("sqlite"):
+        return {}
+    return {
+        "poolclass":     InstrumentedQueuePool,
+        "pool_size":     config.DB_POOL_SIZE,
+        "max_overflow":  config.DB_POOL_MAX_OVERFLOW,
+        "pool_recycle":  config.DB_POOL_RECYCLE,
+        "pool_pre_ping": config.DB_POOL_PRE_PING,
+        "pool_timeout":  config.DB_POOL_TIMEOUT,
+    }
+
+
+def warm_pool(engine, min_size):
+    """Open `min_size` connections up front so the first requests skip the handshake."""
+    if not isinstance(engine.pool, InstrumentedQueuePool):
+        return
+    conns = []
+    try:
+        for _ in range(min(min_size, engine.pool.size())):
+            conns.append(engine.raw_connection())
+    finally:
+        for conn in conns:
+            conn.close()
+
+
+def pool_stats(engine):
+    """Return the gauges of `engine`'s pool (empty for pools we don't instrument)."""
+    pool = engine.pool
+    if isinstance(pool, InstrumentedQueuePool):
+        return pool.stats()
+    return {}
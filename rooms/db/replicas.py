@@ -0,0 +1,262 @@
+"""
+rooms/db/replicas.py
+────────────────────
+Read-replica routing.
+
+With DB_REPLICA_URIS set, views marked @replica_reads send their SELECTs –
+ORM queries and get_db_connection(read_only=True) – to a replica instead
+of the primary:
+
+    • one replica per request, taken in turn (DB_REPLICA_POLICY=round_robin)
+      or the one with the fewest connections checked out (least_busy)
+    • replicas are checked at most every DB_REPLICA_CHECK_INTERVAL seconds,
+      by whichever request gets there first; one that is unreachable or
+      more than DB_REPLICA_MAX_LAG seconds behind is skipped, and with no
+      replica left the reads go to the primary
+    • writes, and reads in a transaction that already wrote, stay on the
+      primary
+    • read-your-writes: a successful POST/PUT/PATCH/DELETE to any other
+      view (create a room, sign up, …) pins the client's session to the
+      primary for DB_REPLICA_PIN_SECONDS
+
+A replica that fails between checks costs the requests already routed to
+it; it is taken out of rotation as soon as a connection to it fails.
+
+Pinning only covers the client's own reads, so anything kept for other
+requests must not come from a replica: a listing cached from one that
+hasn't replayed a write yet would be served to everyone, the writer
+included once the pin expires, until the cache drops it. Cache fills
+therefore read from the primary (`primary_reads()`, used by
+RoomCache.filling()); with CACHE_ENABLED=false listings read replicas.
+Without replicas every query goes to the primary, as before.
+"""
+
+import itertools
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import current_app, g, has_request_context, request, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, event, exc, text
+from sqlalchemy.engine import make_url
+
+POLICIES     = ("round_robin", "least_busy")
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+PIN_KEY      = "primary_until"
+
+# Seconds behind the primary; 0 when everything received is replayed
+# (an idle primary leaves the last replay timestamp old but the replica current).
+LAG_SQL = """
+    SELECT CASE WHEN NOT pg_is_in_recovery() THEN 0
+                WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+                ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+           END
+"""
+
+
+class Replica:
+    """One replica: its engine (built on first use) and last known health."""
+
+    def __init__(self, url, options):
+        parsed = make_url(url)
+        self.name    = f"{parsed.host or 'localhost'}:{parsed.port or 5432}/{parsed.database}"
+        self.url     = url
+        self.options = options
+        self.healthy = None      # unknown until the first check
+        self.lag     = None
+        self._engine = None
+        self._lock   = threading.Lock()
+
+    @property
+    def engine(self):
+        if self._engine is None:
+            with self._lock:
+                if self._engine is None:
+                    engine = create_engine(self.url, **self.options)
+                    event.listen(engine, "handle_error", self._on_error)
+                    self._engine = engine
+        return self._engine
+
+    def busy(self):
+        """Connections this process has checked out of the replica."""
+        return self._engine.pool.checkedout() if self._engine is not None else 0
+
+    def check(self, max_lag):
+        try:
+            with self.engine.connect() as conn:
+                lag = float(conn.execute(text(LAG_SQL)).scalar())
+        except exc.SQLAlchemyError as e:
+            self.mark_down(e)
+            return
+        if lag > max_lag and self.healthy is not False:
+            print(f"⚠️  Replica {self.name} is {lag:.1f} s behind (max {max_lag:g} s), reading from the primary")
+        elif lag <= max_lag and self.healthy is False:
+            print(f"✅ Replica {self.name} is back in rotation")
+        self.healthy, self.lag = lag <= max_lag, lag
+
+    def mark_down(self, error):
+        if self.healthy is not False:
+            reason = str(getattr(error, "orig", None) or error).strip().splitlines()[0]
+            print(f"⚠️  Replica {self.name} is unreachable, reading from the primary: {reason}")
+        self.healthy, self.lag = False, None
+
+    def _on_error(self, context):
+        if context.is_disconnect:
+            self.mark_down(context.original_exception)
+
+
+class ReplicaSet:
+    """The app's replicas, their health checks and the per-request pick."""
+
+    def __init__(self, urls, options, policy="round_robin", max_lag=5.0, check_interval=5.0):
+        self.replicas       = [Replica(url, options) for url in urls]
+        self.policy         = policy
+        self.max_lag        = max_lag
+        self.check_interval = check_interval
+        self.reads          = Counter()     # routed requests by target
+        self._turn          = itertools.count()
+        self._lock          = threading.Lock()
+        self._checked_at    = float("-inf")
+
+    def check(self, force=False):
+        """Re-check every replica if the last check is older than the interval."""
+        with self._lock:
+            now = time.monotonic()
+            if not force and now - self._checked_at < self.check_interval:
+                return
+            self._checked_at = now      # claimed: concurrent callers use the last result
+        for replica in self.replicas:
+            replica.check(self.max_lag)
+
+    def pick(self):
+        """A healthy replica, or None when reads must go to the primary."""
+        self.check()
+        healthy = [r for r in self.replicas if r.healthy]
+        replica = None
+        if healthy:
+            start   = next(self._turn) % len(healthy)
+            healthy = healthy[start:] + healthy[:start]
+            replica = min(healthy, key=Replica.busy) if self.policy == "least_busy" else healthy[0]
+        self.reads[replica.name if replica else "primary"] += 1
+        return replica
+
+    def stats(self):
+        return {
+            "replicas": {r.name: {"healthy": bool(r.healthy), "lag_seconds": r.lag,
+                                  "checked_out": r.busy()} for r in self.replicas},
+            "reads": dict(self.reads),
+        }
+
+
+# ── Request routing ───────────────────────────────────────────────────────────
+def replica_reads(view):
+    """Mark `view` read-only: its SELECTs may be served by a replica."""
+    @wraps(view)
+    def read_only_view(*args, **kwargs):
+        g.db_read_only = True
+        return view(*args, **kwargs)
+    return read_only_view
+
+
+@contextmanager
+def primary_reads():
+    """Within the block, this request's reads go to the primary."""
+    if not has_request_context():
+        yield
+        return
+    read_only, g.db_read_only = g.get("db_read_only"), False
+    try:
+        yield
+    finally:
+        g.db_read_only = read_only
+
+
+def pinned_to_primary():
+    """True while the client's last write is too recent to read from a replica."""
+    return session.get(PIN_KEY, 0) > time.time()
+
+
+def _request_replica():
+    """This request's replica (picked once per request), or None for the primary."""
+    if not has_request_context() or not g.get("db_read_only"):
+        return None
+    if "db_replica" not in g:
+        replicas = current_app.extensions.get("db_replicas")
+        g.db_replica = replicas.pick() if replicas and not pinned_to_primary() else None
+    return g.db_replica
+
+
+def read_connection():
+    """A raw DBAPI connection to this request's replica, or None to use the primary."""
+    replica = _request_replica()
+    if replica is None:
+        return None
+    try:
+        return replica.engine.raw_connection()
+    except exc.DBAPIError as e:
+        replica.mark_down(e)
+        g.db_replica = None
+        return None
+
+
+class RoutingSession(Session):
+    """Flask-SQLAlchemy session that sends a read-only view's SELECTs to its replica."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and clause is not None:
+            if clause.is_dml:
+                self.info["db_wrote"] = True
+            elif clause.is_select and not self.info.get("db_wrote"):
+                replica = _request_replica()
+                if replica is not None:
+                    return replica.engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _mark_wrote(session, flush_context):
+    session.info["db_wrote"] = True
+
+
+def _transaction_over(session, *args):
+    session.info.pop("db_wrote", None)
+
+
+event.listen(RoutingSession, "after_flush", _mark_wrote)
+event.listen(RoutingSession, "after_commit", _transaction_over)
+event.listen(RoutingSession, "after_soft_rollback", _transaction_over)
+
+
+def _pin_after_write(response):
+    if (request.method not in SAFE_METHODS and response.status_code < 400
+            and not g.get("db_read_only")):
+        session[PIN_KEY] = time.time() + current_app.config["DB_REPLICA_PIN_SECONDS"]
+    return response
+
+
+def init_replicas(app):
+    """Attach the ReplicaSet for DB_REPLICA_URIS to `app` (None without replicas)."""
+    config = app.config
+    policy = config["DB_REPLICA_POLICY"]
+    if policy not in POLICIES:
+        raise ValueError(f"❌ Unknown DB_REPLICA_POLICY '{policy}' (choose from {', '.join(POLICIES)})")
+    urls = config["DB_REPLICA_URIS"]
+    if not urls:
+        app.extensions["db_replicas"] = None
+        return None
+
+    options = dict(config["SQLALCHEMY_ENGINE_OPTIONS"])
+    if urls[0].startswith("postgresql"):
+        options["connect_args"] = {"connect_timeout": config["DB_REPLICA_CONNECT_TIMEOUT"]}
+    replicas = app.extensions["db_replicas"] = ReplicaSet(
+        urls, options, policy, config["DB_REPLICA_MAX_LAG"], config["DB_REPLICA_CHECK_INTERVAL"]
+    )
+    app.after_request(_pin_after_write)
+    return replicas
+
+
+def replica_set():
+    """The ReplicaSet of the current app, or None without replicas."""
+    return current_app.extensions.get("db_replicas")
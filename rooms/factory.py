@@ -0,0 +1,96 @@
+"""
+rooms/factory.py
+────────────────
+Application factory.
+
+    app = create_app()           # settings from the environment (rooms.Config)
+    app = create_app(MyConfig)   # any object with upper-case settings
+
+Creating an app opens no connections and imports none of the optional
+heavy dependencies; each loads on first use:
+
+    • the database engine (dialect + psycopg2)  first query     rooms/Models.py
+    • the Google OAuth client (Authlib)         first sign-in   rooms/oauth.py
+    • redis                                     only when a *_REDIS_URL is set
+
+`python benchmarks/bench_startup.py` measures import and creation time;
+it and tests/test_startup.py fail if one of those imports creeps back in.
+"""
+
+import os
+
+from flask import Flask
+from werkzeug.middleware.proxy_fix import ProxyFix
+
+from rooms.Config import Config
+from rooms.Models import db
+from rooms.analytics import init_analytics
+from rooms.assets import assets_cli, init_assets
+from rooms.bulk import rooms_cli
+from rooms.cache import init_cache
+from rooms.db.migrate import db_cli
+from rooms.db.pool import engine_options
+from rooms.db.replicas import init_replicas
+from rooms.feed import init_feed
+from rooms.identity import accounts_cli
+from rooms.jobs import init_jobs, jobs_cli
+from rooms.metrics import init_metrics
+from rooms.oauth import init_oauth
+from rooms.passwords import init_passwords
+from rooms.ratelimit import init_rate_limiter
+from rooms.search import init_search
+from rooms.serialization import init_serialization
+from rooms.sessions import init_sessions
+from rooms.templating import init_templating
+from rooms.views import main
+
+# Must not be imported by `import app` / create_app().
+LAZY_MODULES = (
+    "sqlalchemy.dialects.postgresql", "sqlalchemy.dialects.sqlite", "psycopg2", "asyncpg",
+    "authlib", "requests", "httpx", "redis",
+)
+
+# templates/ and static/ sit next to app.py, one level up.
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def create_app(config=None):
+    """Build a configured Pro-Rooms app."""
+    config = config or Config
+    app = Flask(__name__, root_path=PROJECT_ROOT)
+    app.config.from_object(config)
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(config)
+
+    if app.config["TRUSTED_PROXIES"]:
+        # Take the client IP from X-Forwarded-For so rate limits are per client.
+        proxies = app.config["TRUSTED_PROXIES"]
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=proxies, x_proto=proxies)
+
+    # SQLAlchemy (accounts, credentials, rooms); its engine pool also backs
+    # get_db_connection() for the raw psycopg2 routes.
+    db.init_app(app)
+    init_replicas(app)       # read replicas for @replica_reads views, if configured
+
+    init_sessions(app)       # signed cookie by default, or a server-side store
+    init_metrics(app)        # latency histograms, SQL counters
+    init_passwords(app)      # bounded KDF thread pool
+    init_search(app)         # full-text index / in-process inverted index
+    init_cache(app)          # local LRU + optional shared Redis tier
+    init_rate_limiter(app)   # login / room-join brute-force throttle
+    init_oauth(app)          # Google sign-in, built on first use
+    init_feed(app)           # /api/rooms/stream fan-out hub (LISTEN starts on first subscriber)
+    init_jobs(app)           # background job queues (threads start on first use)
+    init_analytics(app)      # join counters, trending ranking
+    init_assets(app)         # fingerprinted, precompressed static files
+    init_templating(app)     # shared bytecode cache, cached room-card fragments
+    init_serialization(app)  # orjson provider (JSON_FAST), gzip / brotli responses
+
+    app.register_blueprint(main)
+
+    # `flask rooms …` bulk commands, `flask accounts …`, `flask db …`, `flask assets …`, `flask jobs …`
+    app.cli.add_command(rooms_cli)
+    app.cli.add_command(accounts_cli)
+    app.cli.add_command(db_cli)
+    app.cli.add_command(assets_cli)
+    app.cli.add_command(jobs_cli)
+    return app
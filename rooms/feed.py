@@ -0,0 +1,306 @@
+"""
+rooms/feed.py
+─────────────
+Live room feed: GET /api/rooms/stream as Server-Sent Events.
+
+    create_room ── pg_notify(FEED_CHANNEL, room JSON) ──▶ PostgreSQL
+        ── LISTEN, one connection per worker ──▶ hub ──▶ that worker's subscribers
+
+The notification is sent inside the creating transaction, so it goes
+out when – and only if – the room commits. Each worker's hub keeps the
+last FEED_BUFFER events as ready-encoded SSE frames in a ring buffer;
+subscribers only follow a sequence number through it, so an idle
+subscriber costs its connection and nothing else.
+
+Every event carries its room id as the SSE id. A reconnecting
+EventSource sends the last one back as Last-Event-ID, and the rooms
+created since are replayed from the database (up to FEED_REPLAY_LIMIT)
+before live events resume. A subscriber that falls further behind than
+the buffer, or whose worker lost its LISTEN connection, is disconnected
+and resumes the same way.
+
+Under WSGI every subscriber holds a worker thread, so the route is
+opt-in (FEED_WSGI) and accepts at most FEED_WSGI_SUBSCRIBERS per worker;
+the ASGI entry-point serves the stream natively async (rooms/asgi.py)
+and holds thousands of idle subscribers per worker. The dashboard only
+opens the stream when `feed_available()` says a subscriber would be
+accepted, and otherwise polls /api/rooms every FEED_POLL_INTERVAL
+seconds. Other dialects (SQLite in development)
+have no LISTEN/NOTIFY: events go to the local hub after commit.
+"""
+
+import json
+import select
+import threading
+import time
+from collections import deque
+from itertools import islice
+
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from rooms.Models import db
+
+NOTIFY_MAX_BYTES = 7900     # PostgreSQL caps a NOTIFY payload at 8000 bytes
+LISTEN_PING      = 30       # seconds of silence before the listener checks its connection
+RECONNECT_DELAY  = 2        # seconds between listener reconnect attempts
+
+# Rooms created after a client's Last-Event-ID, oldest first. `:name`
+# placeholders: SQLAlchemy text() here, asyncpg via identity.numbered().
+REPLAY_SQL = """
+    SELECT id, name, description, created_at, creator_id
+      FROM rooms
+     WHERE id > :last_id
+     ORDER BY id
+     LIMIT :limit
+"""
+REPLAY_PARAMS = ("last_id", "limit")
+LATEST_SQL = "SELECT coalesce(max(id), 0) FROM rooms"
+
+
+# ── Events ────────────────────────────────────────────────────────────────────
+def room_payload(data):
+    """
+    JSON payload of a room event (`Room.to_dict()` shape). An over-long
+    description is cut to fit a NOTIFY; the full room is one /api/rooms
+    call away.
+    """
+    payload = json.dumps(data, separators=(",", ":"))
+    excess  = len(payload.encode()) - NOTIFY_MAX_BYTES
+    if excess > 0 and data.get("description"):
+        data["description"] = data["description"].encode()[:-excess - 16].decode("utf-8", "ignore")
+        data["truncated"]   = True
+        payload = json.dumps(data, separators=(",", ":"))
+    return payload
+
+
+def sse_frame(payload, event_type="room"):
+    """One SSE message for a room payload, with the room id as its event id."""
+    room_id = json.loads(payload)["id"]
+    return room_id, f"id: {room_id}\nevent: {event_type}\ndata: {payload}\n\n".encode()
+
+
+def sse_preamble(retry_ms, anchor=None):
+    """
+    First bytes of a stream: the reconnect delay, and for a fresh client
+    the newest room id – an id-only message sets EventSource's
+    lastEventId without firing an event, so even a client that saw no
+    event resumes from the right place.
+    """
+    return f"retry: {retry_ms}\n".encode() + (f"id: {anchor}\n\n".encode() if anchor is not None else b"\n")
+
+
+HEARTBEAT = b": keep-alive\n\n"
+
+
+def announce_room(room):
+    """
+    Publish `room` (added and flushed, not yet committed) to the feed
+    when the current transaction commits.
+    """
+    payload = room_payload(room.to_dict())
+    if db.session.get_bind().dialect.name == "postgresql":
+        db.session.execute(db.text("SELECT pg_notify(:channel, :payload)"),
+                           {"channel": current_app.config["FEED_CHANNEL"], "payload": payload})
+    else:
+        db.session.info.setdefault("feed_payloads", []).append(payload)
+
+
+def _publish_after_commit(session):
+    payloads = session.info.pop("feed_payloads", None)
+    if payloads:
+        hub = current_app.extensions.get("room_feed")
+        for payload in payloads if hub is not None else ():
+            hub.publish(payload)
+
+
+def _discard_after_rollback(session, previous_transaction):
+    session.info.pop("feed_payloads", None)
+
+
+event.listen(Session, "after_commit", _publish_after_commit)
+event.listen(Session, "after_soft_rollback", _discard_after_rollback)
+
+
+# ── Fan-out ───────────────────────────────────────────────────────────────────
+class FeedBuffer:
+    """Ring buffer of (seq, room id, SSE frame) shared by a worker's subscribers."""
+
+    def __init__(self, size):
+        self.events = deque(maxlen=size)
+        self.seq    = 0
+
+    def _append(self, payload):
+        room_id, frame = sse_frame(payload)
+        self.seq += 1
+        self.events.append((self.seq, room_id, frame))
+
+    def _reset(self):
+        """Invalidate every subscriber's position; they reconnect and replay."""
+        self.events.clear()
+        self.seq += 1
+
+    def since(self, seq):
+        """Events after `seq`, or None when some of them are no longer buffered."""
+        if seq == self.seq:
+            return []
+        if not self.events or self.events[0][0] > seq + 1:
+            return None
+        return list(islice(self.events, seq + 1 - self.events[0][0], None))
+
+
+class FeedHub(FeedBuffer):
+    """
+    Thread-based hub for the WSGI route: one LISTEN connection in a
+    daemon thread, started with the first subscriber (so never in a
+    pre-fork master), and a condition variable subscribers wait on.
+    """
+
+    def __init__(self, channel, size, max_subscribers):
+        super().__init__(size)
+        self.channel         = channel
+        self.max_subscribers = max_subscribers
+        self.subscribers     = 0
+        self._cond   = threading.Condition()
+        self._thread = None
+        self._ready  = threading.Event()    # set once LISTEN is active
+
+    def publish(self, payload):
+        with self._cond:
+            self._append(payload)
+            self._cond.notify_all()
+
+    def has_room(self):
+        """True while another subscriber would be accepted (a hint: slots aren't reserved)."""
+        return not self.max_subscribers or self.subscribers < self.max_subscribers
+
+    def subscribe(self, engine):
+        """
+        Reserve a subscriber slot; returns the current seq, or None when
+        full. The first subscriber starts the listener and waits (briefly)
+        for LISTEN, so no commit slips between its replay and the feed.
+        """
+        with self._cond:
+            if self.max_subscribers and self.subscribers >= self.max_subscribers:
+                return None
+            self.subscribers += 1
+            if self._thread is None and engine.dialect.name == "postgresql":
+                self._thread = threading.Thread(target=self._listen, args=(engine,),
+                                                name="room-feed-listener", daemon=True)
+                self._thread.start()
+            elif self._thread is None:
+                self._ready.set()
+        self._ready.wait(RECONNECT_DELAY)
+        with self._cond:
+            return self.seq
+
+    def unsubscribe(self):
+        with self._cond:
+            self.subscribers -= 1
+
+    def wait(self, seq, timeout):
+        with self._cond:
+            if seq == self.seq:
+                self._cond.wait(timeout)
+            return self.since(seq)
+
+    def _listen(self, engine):
+        while True:
+            conn = None
+            try:
+                conn = engine.raw_connection()
+                conn.detach()
+                dbapi = conn.dbapi_connection
+                dbapi.autocommit = True
+                with dbapi.cursor() as cursor:
+                    cursor.execute(f'LISTEN "{self.channel}"')
+                    self._ready.set()
+                    while True:
+                        if select.select([dbapi], [], [], LISTEN_PING) == ([], [], []):
+                            cursor.execute("SELECT 1")
+                        dbapi.poll()
+                        while dbapi.notifies:
+                            self.publish(dbapi.notifies.pop(0).payload)
+            except Exception as e:
+                print(f"❌ Room feed listener lost its connection ({e}); reconnecting…")
+                self._ready.clear()
+                with self._cond:
+                    self._reset()
+                    self._cond.notify_all()
+                time.sleep(RECONNECT_DELAY)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+
+def replay_rooms(last_id, limit):
+    """Payloads of the rooms created after `last_id`, oldest first."""
+    rows = db.session.execute(db.text(REPLAY_SQL), {"last_id": last_id, "limit": limit}).mappings()
+    return [room_payload({**row, "created_at": row["created_at"].isoformat()}) for row in rows]
+
+
+def latest_room_id():
+    return db.session.execute(db.text(LATEST_SQL)).scalar()
+
+
+def last_event_id(headers, args):
+    """The client's resume point (Last-Event-ID header, or ?last_event_id=), or None."""
+    raw = headers.get("Last-Event-ID") or args.get("last_event_id")
+    try:
+        return int(raw) if raw else None
+    except ValueError:
+        return None
+
+
+def stream_events(hub, seq, backlog, preamble, heartbeat):
+    """
+    Generator of SSE bytes for one WSGI subscriber: the preamble, the
+    replayed backlog, then live events (minus rooms already replayed)
+    with heartbeat comments while idle.
+    """
+    replayed = set()
+    try:
+        chunk = [preamble]
+        for payload in backlog:
+            room_id, frame = sse_frame(payload)
+            replayed.add(room_id)
+            chunk.append(frame)
+        yield b"".join(chunk)
+        while True:
+            events = hub.wait(seq, heartbeat)
+            if events is None:
+                return                      # fell behind: the client resumes by replay
+            if not events:
+                yield HEARTBEAT
+                continue
+            seq = events[-1][0]
+            yield b"".join(frame for _, room_id, frame in events if room_id not in replayed)
+    finally:
+        hub.unsubscribe()
+
+
+def init_feed(app):
+    """Attach the worker's room feed hub to `app`."""
+    max_subscribers = app.config["FEED_WSGI_SUBSCRIBERS"] or max(1, app.config["SERVER_THREADS"] // 2)
+    app.extensions["room_feed"] = FeedHub(app.config["FEED_CHANNEL"], app.config["FEED_BUFFER"],
+                                          max_subscribers)
+
+
+def room_feed():
+    """The room feed hub of the current app."""
+    return current_app.extensions["room_feed"]
+
+
+def feed_available():
+    """
+    Whether a dashboard should open /api/rooms/stream: always when the
+    ASGI entry-point serves it, under WSGI only with FEED_WSGI and a free
+    subscriber slot in this worker.
+    """
+    config = current_app.config
+    if not config["FEED_ENABLED"]:
+        return False
+    if current_app.extensions.get("room_feed_async"):
+        return True
+    return config["FEED_WSGI"] and room_feed().has_room()
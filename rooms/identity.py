@@ -0,0 +1,222 @@
+"""
+rooms/identity.py
+─────────────────
+Accounts and their sign-in queries.
+
+Every person is one `accounts` row; each way they sign in is a
+`credentials` row (a password hash, or a Google subject). Rooms point at
+accounts with a real foreign key.
+
+Login resolves an identifier with a single index lookup: identifiers
+containing "@" are emails, anything else a username (sign-up rejects
+"@" in usernames), matched through the case-insensitive unique indexes
+on lower(email) / lower(username).
+
+A Google sign-in proves ownership of its email. When it matches an
+existing account by email, the account is linked and any password
+credential on it is dropped, since local sign-ups never verified that
+address and someone else may have registered it first.
+"""
+
+import re
+import sys
+from datetime import datetime
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy.exc import IntegrityError
+
+from rooms.jobs import enqueue, job
+from rooms.Models import db
+
+# ── Sign-in queries ───────────────────────────────────────────────────────────
+_LOGIN_LOOKUP = """
+    SELECT a.id, a.username, a.email, a.display_name, c.id AS credential_id, c.secret
+      FROM accounts a
+      JOIN credentials c ON c.account_id = a.id AND c.provider = 'password'
+     WHERE lower(a.{column}) = lower(%s)
+"""
+
+
+def login_lookup(identifier):
+    """(sql, params) finding the password credential for a username or email."""
+    column = "email" if "@" in identifier else "username"
+    return _LOGIN_LOOKUP.format(column=column), (identifier,)
+
+
+CREATE_LOCAL_ACCOUNT = """
+    WITH account AS (
+        INSERT INTO accounts (username, email, display_name, created_at)
+        VALUES (%(username)s, %(email)s, %(username)s, %(now)s)
+        RETURNING id
+    )
+    INSERT INTO credentials (account_id, provider, secret, created_at)
+    SELECT id, 'password', %(secret)s, %(now)s FROM account
+"""
+
+UPDATE_PASSWORD_HASH = "UPDATE credentials SET secret = %s WHERE id = %s"
+
+# One round trip for every Google sign-in: find the account by Google
+# subject, else link by verified email, else create it, and return the
+# account. A returning user's profile snapshot is only rewritten when
+# Google reports a different name or picture; last_login is buffered
+# (record_sign_in). A concurrent first sign-in can lose the race on the
+# unique indexes; callers retry once.
+GOOGLE_SIGN_IN = """
+    WITH cred AS (
+        SELECT account_id FROM credentials
+         WHERE provider = 'google' AND subject = :sub
+    ),
+    linked AS (
+        SELECT id AS account_id FROM accounts
+         WHERE lower(email) = lower(:email) AND :email_verified
+           AND NOT EXISTS (SELECT 1 FROM cred)
+    ),
+    existing AS (
+        SELECT account_id FROM cred UNION ALL SELECT account_id FROM linked
+    ),
+    updated AS (
+        UPDATE accounts
+           SET display_name = :name, picture = :picture
+         WHERE id IN (SELECT account_id FROM existing)
+           AND (display_name IS DISTINCT FROM :name OR picture IS DISTINCT FROM :picture)
+    ),
+    created AS (
+        INSERT INTO accounts (email, display_name, picture, created_at, last_login)
+        SELECT :email, :name, :picture, :now, :now
+         WHERE NOT EXISTS (SELECT 1 FROM existing)
+        RETURNING id, email, display_name, TRUE AS inserted
+    ),
+    account AS (
+        SELECT id, email, CAST(:name AS varchar) AS display_name, FALSE AS inserted
+          FROM accounts WHERE id IN (SELECT account_id FROM existing)
+        UNION ALL
+        SELECT * FROM created
+    ),
+    new_cred AS (
+        INSERT INTO credentials (account_id, provider, subject, created_at)
+        SELECT id, 'google', :sub, :now FROM account WHERE NOT EXISTS (SELECT 1 FROM cred)
+        ON CONFLICT DO NOTHING
+    ),
+    dropped_password AS (
+        DELETE FROM credentials
+         WHERE provider = 'password' AND account_id IN (SELECT account_id FROM linked)
+    )
+    SELECT id, email, display_name AS name, inserted FROM account
+"""
+GOOGLE_SIGN_IN_PARAMS = ("sub", "email", "email_verified", "name", "picture", "now")
+
+
+def google_sign_in_params(user_info, now):
+    return {
+        "sub":            user_info.get("sub"),
+        "email":          user_info.get("email"),
+        "email_verified": bool(user_info.get("email_verified", False)),
+        "name":           user_info.get("name") or user_info.get("email"),
+        "picture":        user_info.get("picture"),
+        "now":            now,
+    }
+
+
+def google_sign_in(user_info):
+    """Run GOOGLE_SIGN_IN on the ORM session and commit; returns the account row."""
+    params = google_sign_in_params(user_info, datetime.utcnow())
+    for attempt in range(2):
+        try:
+            account = db.session.execute(db.text(GOOGLE_SIGN_IN), params).mappings().one()
+            db.session.commit()
+            if not account["inserted"]:
+                record_sign_in(account["id"], params["now"])
+            return account
+        except IntegrityError:
+            db.session.rollback()
+            if attempt:
+                raise
+
+
+def numbered(sql, names):
+    """Rewrite `:name` placeholders as asyncpg's `$n`, numbered by `names`."""
+    return re.sub(r"(?<!:):(\w+)", lambda m: f"${names.index(m.group(1)) + 1}", sql)
+
+
+# ── Background bookkeeping (rooms/jobs.py) ────────────────────────────────────
+# A whole batch of sign-ins in one statement; an older timestamp never
+# overwrites a newer one.
+TOUCH_LAST_LOGIN = """
+    UPDATE accounts a SET last_login = v.at
+      FROM unnest(CAST(:ids AS integer[]), CAST(:ats AS timestamp[])) AS v (id, at)
+     WHERE a.id = v.id AND (a.last_login IS NULL OR a.last_login < v.at)
+"""
+
+
+@job("accounts.touch_last_login", coalesce=True, durable=False)
+def touch_last_login(payloads):
+    """Write buffered sign-ins ({"account_id", "at"} payloads, one per account)."""
+    db.session.execute(db.text(TOUCH_LAST_LOGIN), {
+        "ids": [p["account_id"] for p in payloads],
+        "ats": [datetime.fromisoformat(p["at"]) for p in payloads],
+    })
+    db.session.commit()
+
+
+def record_sign_in(account_id, at=None):
+    """
+    Buffer `account_id`'s last_login in this process. Sign-ins are
+    flushed every LAST_LOGIN_FLUSH_INTERVAL seconds, one UPDATE per
+    batch, and repeat sign-ins of an account in between cost nothing.
+    """
+    enqueue("accounts.touch_last_login",
+            {"account_id": account_id, "at": (at or datetime.utcnow()).isoformat()},
+            key=account_id, delay=current_app.config["LAST_LOGIN_FLUSH_INTERVAL"])
+
+
+# ── EXPLAIN check ─────────────────────────────────────────────────────────────
+def _index_scans(plan):
+    """Yield (node type, relation, index) for every node in an EXPLAIN JSON plan."""
+    yield plan["Node Type"], plan.get("Relation Name"), plan.get("Index Name")
+    for child in plan.get("Plans", ()):
+        yield from _index_scans(child)
+
+
+def check_login_plans():
+    """
+    EXPLAIN both login lookups and confirm accounts is reached through its
+    lower() unique index. Sequential scans are disabled for the check so
+    the answer doesn't depend on table size: a predicate no index can
+    serve still plans as a Seq Scan.
+    """
+    expected = {"username": "ux_accounts_username_lower", "email": "ux_accounts_email_lower"}
+    results  = {}
+    conn = db.engine.raw_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            for column, identifier in (("username", "someone"), ("email", "someone@example.com")):
+                sql, params = login_lookup(identifier)
+                cursor.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+                nodes = list(_index_scans(cursor.fetchone()[0][0]["Plan"]))
+                results[column] = any(
+                    relation == "accounts" and index == expected[column]
+                    for _, relation, index in nodes
+                ), nodes
+        conn.rollback()
+    finally:
+        conn.close()
+    return results
+
+
+# ── CLI: flask accounts … ─────────────────────────────────────────────────────
+accounts_cli = AppGroup("accounts", help="Account maintenance.")
+
+
+@accounts_cli.command("check-login-plan")
+def check_login_plan_command():
+    """Fail unless both login lookups use an index on accounts."""
+    ok = True
+    for column, (uses_index, nodes) in check_login_plans().items():
+        plan = ", ".join(f"{node}({relation or ''}{'/' + index if index else ''})"
+                         for node, relation, index in nodes)
+        click.echo(f"{'✅' if uses_index else '❌'} login by {column}: {plan}")
+        ok &= uses_index
+    sys.exit(0 if ok else 1)
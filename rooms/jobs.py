@@ -0,0 +1,513 @@
+"""
+rooms/jobs.py
+─────────────
+Background jobs: work a request causes but shouldn't wait for.
+
+    @job("accounts.touch_last_login", coalesce=True, durable=False)
+    def touch_last_login(payloads): ...
+
+    enqueue("accounts.touch_last_login", {"account_id": 7, "at": …}, key=7)
+
+Two queues:
+    thread    – in-process: a heap of pending jobs served by JOBS_WORKERS
+                daemon threads per process, started by the first enqueue.
+                Lost on a crash; drained once at a clean exit.
+    postgres  – the `jobs` table (JOBS_BACKEND=postgres). enqueue() joins
+                the caller's db.session transaction, so a job exists only
+                if what caused it commits. Consumers – JOBS_PG_CONSUMERS
+                threads per web worker and/or `flask jobs work` – claim
+                due rows with SELECT … FOR UPDATE SKIP LOCKED and hold the
+                row locks while running them: a consumer that dies hands
+                its jobs back on rollback.
+
+Jobs registered with durable=False (cheap, idempotent bookkeeping) always
+use the thread queue; the rest use the durable queue when there is one.
+
+A coalescing job waits JOBS_COALESCE_DELAY for company: pending jobs
+with the same key merge (newest payload wins) and due jobs of the kind
+run as one handler call of up to JOBS_BATCH_SIZE payloads – a burst of
+logins becomes one UPDATE. A failed batch is retried up to
+JOBS_MAX_ATTEMPTS times, JOBS_RETRY_BACKOFF seconds apart, doubling;
+the postgres queue then keeps it as dead (`flask jobs retry`).
+
+Queue depth, age of the oldest job and outcomes per kind are exported
+on /metrics and printed by `flask jobs stats`.
+"""
+
+import atexit
+import heapq
+import itertools
+import json
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from rooms.Models import db
+
+BACKENDS    = ("thread", "postgres")
+MAX_BACKOFF = 3600      # seconds; cap of the doubling retry delay
+
+JobType = namedtuple("JobType", "name handler coalesce durable")
+JOBS    = {}            # name → JobType
+
+
+def job(name, coalesce=False, durable=True):
+    """
+    Register the decorated function as job `name`. A coalescing job's
+    handler takes a list of payloads; any other handler one payload.
+    Payloads are JSON-serialisable dicts.
+    """
+    def register(handler):
+        JOBS[name] = JobType(name, handler, coalesce, durable)
+        return handler
+    return register
+
+
+def backoff(attempts, base):
+    """Seconds before retry number `attempts` (1-based)."""
+    return min(MAX_BACKOFF, base * 2 ** (attempts - 1))
+
+
+def run_batch(app, kind, payloads):
+    """Run one batch of `kind` in an app context; returns the exception, or None."""
+    spec = JOBS.get(kind)
+    if spec is None:
+        return LookupError(f"unknown job kind '{kind}'")
+    with app.app_context():
+        try:
+            if spec.coalesce:
+                spec.handler(payloads)
+            else:
+                spec.handler(payloads[0])
+        except Exception as e:
+            db.session.rollback()
+            return e
+    return None
+
+
+class QueueStats:
+    """Outcome counters of one queue: (kind, succeeded | retried | failed) → jobs."""
+
+    def __init__(self):
+        self.processed = {}
+        self._lock = threading.Lock()
+
+    def count(self, kind, outcome, n=1):
+        with self._lock:
+            self.processed[(kind, outcome)] = self.processed.get((kind, outcome), 0) + n
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.processed)
+
+
+# ── In-process queue ──────────────────────────────────────────────────────────
+class ThreadQueue:
+    """Pending jobs in a heap ordered by due time, served by daemon threads."""
+
+    name = "thread"
+
+    def __init__(self, app, workers=1, batch_size=100, max_attempts=5,
+                 retry_backoff=5.0, coalesce_delay=1.0):
+        self.app            = app
+        self.workers        = max(1, workers)
+        self.batch_size     = batch_size
+        self.max_attempts   = max_attempts
+        self.retry_backoff  = retry_backoff
+        self.coalesce_delay = coalesce_delay
+        self.counters       = QueueStats()
+        self._cond    = threading.Condition()
+        self._heap    = []     # (due, token)
+        self._entries = {}     # token → [kind, key, payload, attempts, enqueued_at, seq]
+        self._keys    = {}     # (kind, key) → token of the pending coalescable job
+        self._tokens  = itertools.count()
+        self._seqs    = itertools.count()   # enqueue order of payloads, kept across retries
+        self._threads = []
+
+    def enqueue(self, kind, payload, key=None, delay=0, attempts=0, seq=None):
+        """Queue `payload`; a retry passes its attempts and original `seq`."""
+        coalesce = JOBS[kind].coalesce
+        with self._cond:
+            if seq is None:
+                seq = next(self._seqs)
+            token = self._keys.get((kind, key)) if coalesce and key is not None else None
+            if token is not None:
+                entry = self._entries[token]
+                if seq > entry[5]:              # newest payload wins, retried or not
+                    entry[2], entry[5] = payload, seq
+                return
+            if coalesce and not attempts:
+                delay = max(delay, self.coalesce_delay)
+            token = next(self._tokens)
+            self._entries[token] = [kind, key, payload, attempts, time.monotonic(), seq]
+            if coalesce and key is not None:
+                self._keys[(kind, key)] = token
+            heapq.heappush(self._heap, (time.monotonic() + delay, token))
+            if self._heap[0][1] == token:      # only a new earliest job changes a worker's wait
+                self._cond.notify()
+        self.start()
+
+    def start(self):
+        """Start the worker threads (once, in the process that enqueues)."""
+        if self._threads:
+            return
+        with self._cond:
+            if self._threads:
+                return
+            for n in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"jobs-{n}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            atexit.register(self.drain)
+
+    def _pop(self, token):
+        entry = self._entries.pop(token)
+        kind, key = entry[0], entry[1]
+        if key is not None and self._keys.get((kind, key)) == token:
+            del self._keys[(kind, key)]
+        return entry
+
+    def _take(self):
+        """Block until a job is due; returns it with the due jobs it batches with."""
+        with self._cond:
+            while not self._heap or self._heap[0][0] > time.monotonic():
+                self._cond.wait(self._heap[0][0] - time.monotonic() if self._heap else None)
+            now = time.monotonic()
+            _, token = heapq.heappop(self._heap)
+            kind = self._entries[token][0]
+            tokens = [token]
+            if JOBS[kind].coalesce and self.batch_size > 1:
+                due = sorted(item for item in self._heap
+                             if item[0] <= now and self._entries[item[1]][0] == kind)
+                more = {t for _, t in due[:self.batch_size - 1]}
+                if more:
+                    self._heap = [item for item in self._heap if item[1] not in more]
+                    heapq.heapify(self._heap)
+                    tokens += [t for _, t in due[:self.batch_size - 1]]
+            return kind, [self._pop(t) for t in tokens]
+
+    def _work(self):
+        while True:
+            kind, entries = self._take()
+            self._settle(kind, entries, run_batch(self.app, kind, [e[2] for e in entries]))
+
+    def _settle(self, kind, entries, error):
+        if error is None:
+            self.counters.count(kind, "succeeded", len(entries))
+            return
+        for _, key, payload, attempts, _, seq in entries:
+            attempts += 1
+            if attempts < self.max_attempts:
+                self.counters.count(kind, "retried")
+                self.enqueue(kind, payload, key, backoff(attempts, self.retry_backoff), attempts, seq)
+            else:
+                self.counters.count(kind, "failed")
+        print(f"❌ Job {kind} failed ({len(entries)} payload(s), attempt {entries[0][3] + 1}): {error}")
+
+    def drain(self):
+        """Run whatever is still pending, once (at interpreter exit)."""
+        with self._cond:
+            entries = [self._pop(token) for _, token in sorted(self._heap)]
+            self._heap = []
+        by_kind = {}
+        for entry in entries:
+            by_kind.setdefault(entry[0], []).append(entry)
+        for kind, group in by_kind.items():
+            size = self.batch_size if JOBS[kind].coalesce else 1
+            for i in range(0, len(group), size):
+                batch = group[i:i + size]
+                error = run_batch(self.app, kind, [e[2] for e in batch])
+                self.counters.count(kind, "failed" if error else "succeeded", len(batch))
+
+    def stats(self):
+        with self._cond:
+            now = time.monotonic()
+            queued, oldest = {}, {}
+            for kind, _, _, _, enqueued_at, _ in self._entries.values():
+                queued[kind] = queued.get(kind, 0) + 1
+                oldest[kind] = max(oldest.get(kind, 0.0), now - enqueued_at)
+        return {"queued": queued, "oldest_seconds": oldest, "dead": {},
+                "processed": self.counters.snapshot()}
+
+
+# ── PostgreSQL queue ──────────────────────────────────────────────────────────
+ENQUEUE_SQL = """
+    INSERT INTO jobs (kind, payload, coalesce_key, run_at, created_at)
+    VALUES (:kind, CAST(:payload AS jsonb), :key, :run_at, :now)
+"""
+
+# Rows locked by another consumer are skipped, not waited for.
+CLAIM_SQL = """
+    SELECT id, kind, payload, coalesce_key, attempts
+      FROM jobs
+     WHERE failed_at IS NULL AND run_at <= %(now)s
+     ORDER BY run_at, id
+     LIMIT %(limit)s
+       FOR UPDATE SKIP LOCKED
+"""
+DONE_SQL  = "DELETE FROM jobs WHERE id = ANY(%s)"
+RETRY_SQL = "UPDATE jobs SET attempts = attempts + 1, run_at = %s, last_error = %s WHERE id = ANY(%s)"
+BURY_SQL  = "UPDATE jobs SET attempts = attempts + 1, failed_at = %s, last_error = %s WHERE id = ANY(%s)"
+
+STATS_SQL = """
+    SELECT kind,
+           count(*) FILTER (WHERE failed_at IS NULL),
+           count(*) FILTER (WHERE failed_at IS NOT NULL),
+           min(created_at) FILTER (WHERE failed_at IS NULL)
+      FROM jobs
+     GROUP BY kind
+"""
+REVIVE_SQL = """
+    UPDATE jobs SET failed_at = NULL, attempts = 0, run_at = :now
+     WHERE failed_at IS NOT NULL AND (CAST(:kind AS varchar) IS NULL OR kind = :kind)
+"""
+
+
+class PostgresQueue:
+    """Durable queue on the `jobs` table; any number of consumers."""
+
+    name = "postgres"
+
+    def __init__(self, app, batch_size=100, max_attempts=5, retry_backoff=5.0,
+                 coalesce_delay=1.0, poll_interval=1.0):
+        self.app            = app
+        self.batch_size     = batch_size
+        self.max_attempts   = max_attempts
+        self.retry_backoff  = retry_backoff
+        self.coalesce_delay = coalesce_delay
+        self.poll_interval  = poll_interval
+        self.counters       = QueueStats()
+        self._lock    = threading.Lock()
+        self._stop    = threading.Event()
+        self._threads = []
+
+    def enqueue(self, kind, payload, key=None, delay=0):
+        """Insert the job in the current db.session transaction; it's queued on commit."""
+        if JOBS[kind].coalesce:
+            delay = max(delay, self.coalesce_delay)
+        now = datetime.utcnow()
+        db.session.execute(db.text(ENQUEUE_SQL), {
+            "kind": kind, "payload": json.dumps(payload),
+            "key": None if key is None else str(key),
+            "run_at": now + timedelta(seconds=delay), "now": now,
+        })
+
+    def start(self, consumers):
+        """Start `consumers` consumer threads in this process (once)."""
+        if self._threads:
+            return
+        with self._lock:
+            if self._threads:
+                return
+            for n in range(consumers):
+                thread = threading.Thread(target=self._work, name=f"jobs-pg-{n}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout=None):
+        """Let the consumers finish their current batch and exit."""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _work(self):
+        while not self._stop.is_set():
+            try:
+                claimed = self.run_once()
+            except Exception as e:
+                print(f"❌ Job consumer error ({e}); retrying…")
+                claimed = 0
+            if claimed < self.batch_size:
+                self._stop.wait(self.poll_interval)
+
+    def _batches(self, rows):
+        """
+        (kind, rows, payloads) per handler call: every job on its own,
+        except coalescing kinds – one call, one payload per key (the
+        newest); the superseded rows share its outcome.
+        """
+        by_kind = {}
+        for row in rows:
+            by_kind.setdefault(row[1], []).append(row)
+        for kind, group in by_kind.items():
+            spec = JOBS.get(kind)
+            if spec is None or not spec.coalesce:
+                for row in group:
+                    yield kind, [row], [row[2]]
+                continue
+            newest = {}
+            for row in group:
+                # By id, not claim order: a retried older row can be due after a newer one.
+                key = row[3] if row[3] is not None else f"#{row[0]}"
+                if key not in newest or row[0] > newest[key][0]:
+                    newest[key] = row
+            yield kind, group, [row[2] for row in sorted(newest.values())]
+
+    def run_once(self):
+        """Claim and run one batch of due jobs; returns how many were claimed."""
+        with self.app.app_context():
+            conn = db.engine.raw_connection()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(CLAIM_SQL, {"now": datetime.utcnow(), "limit": self.batch_size})
+                rows = cursor.fetchall()
+                for kind, batch, payloads in self._batches(rows):
+                    self._settle(cursor, kind, batch, run_batch(self.app, kind, payloads))
+            conn.commit()
+            return len(rows)
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def _settle(self, cursor, kind, rows, error):
+        if error is None:
+            cursor.execute(DONE_SQL, ([row[0] for row in rows],))
+            self.counters.count(kind, "succeeded", len(rows))
+            return
+        now, message = datetime.utcnow(), f"{type(error).__name__}: {error}"
+        retry, bury = {}, []
+        for row in rows:
+            attempts = row[4] + 1
+            if attempts < self.max_attempts:
+                retry.setdefault(now + timedelta(seconds=backoff(attempts, self.retry_backoff)), []).append(row[0])
+            else:
+                bury.append(row[0])
+        for run_at, ids in retry.items():
+            cursor.execute(RETRY_SQL, (run_at, message, ids))
+        if bury:
+            cursor.execute(BURY_SQL, (now, message, bury))
+        self.counters.count(kind, "retried", len(rows) - len(bury))
+        self.counters.count(kind, "failed", len(bury))
+        print(f"❌ Job {kind} failed ({len(rows)} row(s), {len(bury)} dead): {message}")
+
+    def revive(self, kind=None):
+        """Requeue dead jobs (of `kind`); returns how many."""
+        result = db.session.execute(db.text(REVIVE_SQL), {"now": datetime.utcnow(), "kind": kind})
+        db.session.commit()
+        return result.rowcount
+
+    def stats(self):
+        queued, oldest, dead = {}, {}, {}
+        now = datetime.utcnow()
+        try:
+            with self.app.app_context(), db.engine.connect() as conn:
+                for kind, waiting, failed, first in conn.execute(db.text(STATS_SQL)):
+                    queued[kind], dead[kind] = waiting, failed
+                    if first is not None:
+                        oldest[kind] = max(0.0, (now - first).total_seconds())
+        except Exception as e:
+            print(f"⚠️  Job queue stats unavailable: {e}")
+        return {"queued": queued, "oldest_seconds": oldest, "dead": dead,
+                "processed": self.counters.snapshot()}
+
+
+# ── The app's queues ──────────────────────────────────────────────────────────
+class JobQueues:
+    """The thread queue, and the durable queue when JOBS_BACKEND=postgres."""
+
+    def __init__(self, local, durable=None):
+        self.local   = local
+        self.durable = durable
+
+    def queue_for(self, kind):
+        spec = JOBS.get(kind)
+        if spec is None:
+            raise ValueError(f"❌ Unknown job kind '{kind}'")
+        return self.durable if spec.durable and self.durable is not None else self.local
+
+    def enqueue(self, kind, payload, key=None, delay=0):
+        self.queue_for(kind).enqueue(kind, payload, key, delay)
+
+    def stats(self):
+        """Per queue name: queued / oldest_seconds / dead by kind, processed by (kind, outcome)."""
+        queues = (self.local, self.durable) if self.durable is not None else (self.local,)
+        return {queue.name: queue.stats() for queue in queues}
+
+
+def init_jobs(app):
+    """Attach the job queues to `app`; durable consumers start with the first request."""
+    config  = app.config
+    backend = config["JOBS_BACKEND"]
+    if backend not in BACKENDS:
+        raise ValueError(f"❌ Unknown JOBS_BACKEND '{backend}' (choose from {', '.join(BACKENDS)})")
+    if backend == "postgres" and not config["SQLALCHEMY_DATABASE_URI"].startswith("postgresql"):
+        raise ValueError("❌ JOBS_BACKEND=postgres needs a PostgreSQL database.")
+
+    common = dict(batch_size=config["JOBS_BATCH_SIZE"], max_attempts=config["JOBS_MAX_ATTEMPTS"],
+                  retry_backoff=config["JOBS_RETRY_BACKOFF"], coalesce_delay=config["JOBS_COALESCE_DELAY"])
+    local   = ThreadQueue(app, workers=config["JOBS_WORKERS"], **common)
+    durable = PostgresQueue(app, poll_interval=config["JOBS_POLL_INTERVAL"], **common) \
+        if backend == "postgres" else None
+    app.extensions["jobs"] = JobQueues(local, durable)
+
+    if durable is not None and config["JOBS_PG_CONSUMERS"]:
+        # Not at creation: a pre-fork master would start threads its workers don't inherit.
+        def start_consumers():
+            durable.start(config["JOBS_PG_CONSUMERS"])
+        app.before_request(start_consumers)
+
+
+def job_queues():
+    """The JobQueues of the current app."""
+    return current_app.extensions["jobs"]
+
+
+def enqueue(kind, payload, key=None, delay=0):
+    """
+    Queue job `kind` with `payload`. On the postgres queue the job is
+    part of the current db.session transaction: commit it.
+    """
+    job_queues().enqueue(kind, payload, key, delay)
+
+
+# ── CLI: flask jobs … ─────────────────────────────────────────────────────────
+jobs_cli = AppGroup("jobs", help="Background job queues.")
+
+
+def _durable_queue():
+    durable = job_queues().durable
+    if durable is None:
+        raise click.ClickException("JOBS_BACKEND is not 'postgres'; there is no durable queue.")
+    return durable
+
+
+@jobs_cli.command("work")
+@click.option("--consumers", default=1, show_default=True, help="Consumer threads.")
+def work_command(consumers):
+    """Consume the durable queue until interrupted."""
+    durable = _durable_queue()
+    durable.start(consumers)
+    click.echo(f"ℹ️  Consuming jobs with {consumers} thread(s); Ctrl-C to stop.")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        click.echo("ℹ️  Finishing the current batch…")
+        durable.stop()
+
+
+@jobs_cli.command("stats")
+def stats_command():
+    """Queue depth, oldest job and outcomes per kind."""
+    for name, stats in job_queues().stats().items():
+        kinds = sorted(set(stats["queued"]) | set(stats["dead"]))
+        click.echo(f"{name}: {sum(stats['queued'].values())} queued" +
+                   (f", {sum(stats['dead'].values())} dead" if stats["dead"] else ""))
+        for kind in kinds:
+            click.echo(f"  {kind:<32} {stats['queued'].get(kind, 0):>8} queued"
+                       f"  oldest {stats['oldest_seconds'].get(kind, 0.0):>8.1f} s"
+                       f"  {stats['dead'].get(kind, 0):>6} dead")
+
+
+@jobs_cli.command("retry")
+@click.option("--kind", default=None, help="Only jobs of this kind.")
+def retry_command(kind):
+    """Requeue dead jobs of the durable queue."""
+    click.echo(f"✅ Requeued {_durable_queue().revive(kind)} dead job(s).")
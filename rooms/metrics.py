@@ -0,0 +1,348 @@
+"""
+rooms/metrics.py
+────────────────
+Request instrumentation and the Prometheus `/metrics` exposition.
+
+    • per-endpoint request counters and latency histograms
+    • SQL statements counted and timed per request, for both the ORM
+      (engine events) and the raw psycopg2 routes (cursor proxy returned
+      by `get_db_connection()`)
+    • slow-request / slow-query log lines (SLOW_REQUEST_MS, SLOW_QUERY_MS)
+    • a `Server-Timing` header with app and database time
+    • optional cProfile of 1 in PROFILE_EVERY requests, dumped to PROFILE_DIR
+
+Metrics are per process: under gunicorn each scrape sees one worker, so
+aggregate with `sum()` / `rate()` across scrapes rather than reading a
+single sample.
+"""
+
+import cProfile
+import itertools
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from rooms.db.pool import pool_stats
+
+# Seconds; chosen around the app's own targets (cached API ≈ ms, KDF ≈ 50 ms).
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts  = [0] * (len(buckets) + 1)   # last slot is +Inf
+        self.sum     = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def samples(self):
+        """(le, cumulative count) pairs, ending with +Inf."""
+        return zip([*map(_fmt, self.buckets), "+Inf"], itertools.accumulate(self.counts))
+
+
+class Registry:
+    """All counters and histograms of one process."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests       = {}   # (endpoint, method, status) → count
+        self.latency        = {}   # endpoint → Histogram
+        self.query_counts   = {}   # endpoint → Histogram of queries per request
+        self.queries        = {"orm": 0, "psycopg2": 0}
+        self.query_seconds  = {"orm": 0.0, "psycopg2": 0.0}
+        self.slow_requests  = 0
+        self.slow_queries   = 0
+        self.profiles       = 0
+
+    def observe_request(self, endpoint, method, status, seconds, queries):
+        with self.lock:
+            key = (endpoint, method, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.latency.setdefault(endpoint, Histogram(LATENCY_BUCKETS)).observe(seconds)
+            self.query_counts.setdefault(endpoint, Histogram(QUERY_COUNT_BUCKETS)).observe(queries)
+
+    def observe_query(self, source, seconds):
+        with self.lock:
+            self.queries[source]       += 1
+            self.query_seconds[source] += seconds
+
+
+REGISTRY = Registry()
+
+
+# ── SQL timing ────────────────────────────────────────────────────────────────
+def record_query(source, statement, seconds):
+    """Count a statement globally and against the current request."""
+    REGISTRY.observe_query(source, seconds)
+    if not has_request_context():
+        return
+    g.sql_queries = g.get("sql_queries", 0) + 1
+    g.sql_seconds = g.get("sql_seconds", 0.0) + seconds
+    threshold = current_app.config["SLOW_QUERY_MS"]
+    if threshold and seconds * 1000 >= threshold:
+        REGISTRY.slow_queries += 1
+        print(f"[slow-query] {seconds * 1000:.1f} ms {request.endpoint}: "
+              f"{' '.join(str(statement).split())[:500]}")
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._prorooms_started = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_prorooms_started", None)
+    if started is not None:
+        record_query("orm", statement, time.perf_counter() - started)
+
+
+class TimedCursor:
+    """psycopg2 cursor proxy that times execute/executemany."""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def _timed(self, method, statement, *args):
+        started = time.perf_counter()
+        try:
+            return method(statement, *args)
+        finally:
+            record_query("psycopg2", statement, time.perf_counter() - started)
+
+    def execute(self, statement, *args):
+        return self._timed(self._cursor.execute, statement, *args)
+
+    def executemany(self, statement, *args):
+        return self._timed(self._cursor.executemany, statement, *args)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._cursor.close()
+
+
+class TimedConnection:
+    """Pooled psycopg2 connection proxy whose cursors are TimedCursors."""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def cursor(self, *args, **kwargs):
+        return TimedCursor(self._conn.cursor(*args, **kwargs))
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+# ── Request hooks ─────────────────────────────────────────────────────────────
+_request_counter = itertools.count(1)
+_profile_lock    = threading.Lock()
+
+
+def start_request():
+    """Begin timing the current request (also used by the ASGI callback)."""
+    g.request_started = time.perf_counter()
+    g.sql_queries = 0
+    g.sql_seconds = 0.0
+    every = current_app.config["PROFILE_EVERY"]
+    if every and next(_request_counter) % every == 0 and _profile_lock.acquire(blocking=False):
+        g.profiler = cProfile.Profile()
+        g.profiler.enable()
+
+
+def finish_request(response):
+    """Record the request, log it if slow and attach Server-Timing."""
+    started = g.pop("request_started", None)
+    if started is None:
+        return response
+    seconds  = time.perf_counter() - started
+    queries  = g.get("sql_queries", 0)
+    sql_time = g.get("sql_seconds", 0.0)
+    endpoint = request.endpoint or "unmatched"
+
+    profiler = g.pop("profiler", None)
+    if profiler is not None:
+        profiler.disable()
+        _profile_lock.release()
+        _dump_profile(profiler, endpoint)
+
+    REGISTRY.observe_request(endpoint, request.method, response.status_code, seconds, queries)
+    threshold = current_app.config["SLOW_REQUEST_MS"]
+    if threshold and seconds * 1000 >= threshold:
+        REGISTRY.slow_requests += 1
+        print(f"[slow-request] {seconds * 1000:.1f} ms {request.method} {request.path} "
+              f"→ {response.status_code} ({queries} queries, {sql_time * 1000:.1f} ms SQL)")
+    response.headers.add("Server-Timing", f"app;dur={seconds * 1000:.1f}")
+    response.headers.add("Server-Timing", f"db;dur={sql_time * 1000:.1f};desc=\"{queries} queries\"")
+    return response
+
+
+def _dump_profile(profiler, endpoint):
+    directory = current_app.config["PROFILE_DIR"]
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{endpoint}-{os.getpid()}-{time.time():.6f}.prof")
+    profiler.dump_stats(path)
+    REGISTRY.profiles += 1
+
+
+def _abandon_profile(exc):
+    """Teardown: stop a profiler left running by a request that raised."""
+    profiler = g.pop("profiler", None)
+    if profiler is not None:
+        profiler.disable()
+        _profile_lock.release()
+
+
+def init_metrics(app):
+    """Install the request hooks on `app`."""
+    if not app.config["METRICS_ENABLED"]:
+        return
+    app.before_request(start_request)
+    app.after_request(finish_request)
+    app.teardown_request(_abandon_profile)
+    app.extensions["metrics"] = REGISTRY
+
+
+# ── Prometheus exposition ─────────────────────────────────────────────────────
+def _fmt(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _labels(**labels):
+    if not labels:
+        return ""
+    escape = lambda v: str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _component_families(app, engine):
+    """Pool, cache and rate-limiter gauges/counters from their own stats()."""
+    pool = pool_stats(engine)
+    if pool:
+        for key in ("size", "checked_out", "idle", "overflow"):
+            yield f"prorooms_db_pool_{key}", "gauge", f"Connection pool {key}.", [({}, pool[key])]
+        yield ("prorooms_db_pool_checkouts_total", "counter", "Successful pool checkouts.",
+               [({}, pool["checkouts"])])
+        yield ("prorooms_db_pool_checkout_timeouts_total", "counter", "Pool checkout timeouts.",
+               [({}, pool["checkout_timeouts"])])
+        yield ("prorooms_db_pool_wait_seconds_total", "counter", "Time checkouts spent waiting for an idle connection.",
+               [({}, pool["wait_seconds_total"])])
+
+    replicas = app.extensions.get("db_replicas")
+    if replicas is not None:
+        stats = replicas.stats()
+        yield ("prorooms_db_replica_healthy", "gauge", "1 while a replica is in rotation.",
+               [({"replica": name}, int(r["healthy"])) for name, r in stats["replicas"].items()])
+        yield ("prorooms_db_replica_lag_seconds", "gauge", "Replication lag at the last check.",
+               [({"replica": name}, r["lag_seconds"]) for name, r in stats["replicas"].items()
+                if r["lag_seconds"] is not None])
+        yield ("prorooms_db_replica_reads_total", "counter", "Read-only requests by the database they read.",
+               [({"target": target}, n) for target, n in sorted(stats["reads"].items())])
+
+    cache = app.extensions.get("room_cache")
+    tiers = dict(cache.stats()) if cache is not None else {}
+    fragments = app.extensions.get("fragments")
+    if fragments is not None and fragments.stats():
+        tiers["fragments"] = fragments.stats()
+    for stat in ("hits", "misses", "evictions", "expirations", "errors"):
+        samples = [({"tier": tier}, s[stat]) for tier, s in tiers.items() if stat in s]
+        if samples:
+            yield f"prorooms_cache_{stat}_total", "counter", f"Room cache {stat}.", samples
+    entries = [({"tier": tier}, tiers[tier]["entries"]) for tier in ("local", "fragments") if tier in tiers]
+    if entries:
+        yield ("prorooms_cache_entries", "gauge", "Entries in the in-process caches.", entries)
+
+    limiter = app.extensions.get("rate_limiter")
+    if limiter is not None:
+        stats = limiter.stats()
+        for outcome in ("allowed", "rejected"):
+            yield (f"prorooms_ratelimit_{outcome}_total", "counter", f"Rate-limit checks {outcome}.",
+                   [({"rule": rule}, n) for rule, n in sorted(stats[outcome].items())])
+
+    room_stats = app.extensions.get("room_stats")
+    stats = room_stats.stats() if room_stats is not None else {}
+    if stats:
+        yield ("prorooms_room_joins_total", "counter", "Room join attempts counted by this process.",
+               [({"outcome": "ok"}, stats["joins"]), ({"outcome": "failed"}, stats["failed_joins"])])
+        yield ("prorooms_room_stats_pending_rooms", "gauge", "Rooms with join counts not yet flushed.",
+               [({}, stats["pending_rooms"])])
+        yield ("prorooms_rooms_trending_ranked", "gauge", "Rooms in this process's trending ranking.",
+               [({}, stats["ranked_rooms"])])
+
+    jobs = app.extensions.get("jobs")
+    if jobs is not None:
+        queues = jobs.stats()
+        for stat, kind, help_text in (
+            ("queued", "gauge", "Background jobs waiting to run."),
+            ("oldest_seconds", "gauge", "Age of the oldest waiting job."),
+            ("dead", "gauge", "Jobs that ran out of attempts (postgres queue)."),
+        ):
+            yield (f"prorooms_jobs_{stat}", kind, help_text,
+                   [({"queue": q, "kind": k}, n) for q, s in queues.items() for k, n in sorted(s[stat].items())])
+        yield ("prorooms_jobs_processed_total", "counter", "Jobs run in this process, by outcome.",
+               [({"queue": q, "kind": k, "outcome": o}, n)
+                for q, s in queues.items() for (k, o), n in sorted(s["processed"].items())])
+
+
+def render_prometheus(app, engine):
+    """Prometheus text exposition of this process's metrics."""
+    lines = []
+
+    def family(name, kind, help_text, samples):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            lines.append(f"{name}{_labels(**labels)} {_fmt(value)}")
+
+    def histograms(name, help_text, by_endpoint):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} histogram")
+        for endpoint, hist in sorted(by_endpoint.items()):
+            for le, count in hist.samples():
+                lines.append(f"{name}_bucket{_labels(endpoint=endpoint, le=le)} {count}")
+            lines.append(f"{name}_sum{_labels(endpoint=endpoint)} {_fmt(float(hist.sum))}")
+            lines.append(f"{name}_count{_labels(endpoint=endpoint)} {sum(hist.counts)}")
+
+    r = REGISTRY
+    with r.lock:
+        family("prorooms_http_requests_total", "counter", "HTTP requests by endpoint.",
+               [({"endpoint": e, "method": m, "status": s}, n)
+                for (e, m, s), n in sorted(r.requests.items())])
+        histograms("prorooms_http_request_duration_seconds",
+                   "Time to produce the response (streamed bodies: until the first byte).",
+                   r.latency)
+        histograms("prorooms_sql_queries_per_request", "SQL statements issued per request.",
+                   r.query_counts)
+        family("prorooms_sql_queries_total", "counter", "SQL statements executed.",
+               [({"source": s}, n) for s, n in r.queries.items()])
+        family("prorooms_sql_query_seconds_total", "counter", "Time spent in SQL statements.",
+               [({"source": s}, t) for s, t in r.query_seconds.items()])
+        family("prorooms_slow_requests_total", "counter", "Requests over SLOW_REQUEST_MS.",
+               [({}, r.slow_requests)])
+        family("prorooms_slow_queries_total", "counter", "Statements over SLOW_QUERY_MS.",
+               [({}, r.slow_queries)])
+        family("prorooms_profiles_total", "counter", "cProfile dumps written.",
+               [({}, r.profiles)])
+    for name, kind, help_text, samples in _component_families(app, engine):
+        family(name, kind, help_text, samples)
+    return "\n".join(lines) + "\n"
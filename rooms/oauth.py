@@ -0,0 +1,56 @@
+"""
+rooms/oauth.py
+──────────────
+Google OAuth client, built on first use.
+
+Authlib – with requests and the JOSE / cryptography stack behind it –
+is the heaviest import in the app, and only the /auth/google routes
+need it. `init_oauth(app)` therefore only reserves the slot; the client
+is registered, its credentials validated and the OIDC metadata cache
+(rooms/oidc_cache.py) warmed the first time `google_client()` is called.
+gunicorn's when_ready calls it in the master, so preloaded workers
+inherit a ready client.
+"""
+
+import threading
+
+from flask import current_app
+
+from rooms.Config import Config
+
+_lock = threading.Lock()
+
+
+def init_oauth(app):
+    """Register lazy Google OAuth on `app`."""
+    app.extensions["google_oauth"] = None
+
+
+def google_client(app=None):
+    """The app's Authlib Google client, created on the first call."""
+    app = app or current_app._get_current_object()
+    client = app.extensions["google_oauth"]
+    if client is None:
+        with _lock:
+            client = app.extensions["google_oauth"]
+            if client is None:
+                client = app.extensions["google_oauth"] = _register(app)
+    return client
+
+
+def _register(app):
+    from authlib.integrations.flask_client import OAuth
+    from rooms.oidc_cache import init_oidc_cache
+
+    Config.validate(app.config)
+    oauth = OAuth(app)
+    oauth.register(
+        name="google",
+        client_id=app.config["GOOGLE_CLIENT_ID"],
+        client_secret=app.config["GOOGLE_CLIENT_SECRET"],
+        server_metadata_url=app.config["GOOGLE_DISCOVERY_URL"],
+        client_kwargs={"scope": "openid email profile"},
+    )
+    # Serve discovery + JWKS from the shared on-disk cache, warmed now.
+    init_oidc_cache(app, oauth.google)
+    return oauth.google
@@ -0,0 +1,174 @@
+"""
+rooms/oidc_cache.py
+───────────────────
+Persistent cache of Google's OpenID discovery document and JWKS.
+
+Without it every worker fetches both lazily on its first OAuth callback,
+putting two outbound round trips on the login path and failing outright
+when the network hiccups. Here they are kept in one JSON file shared by
+all workers and restarts:
+
+    • fresh file      → used as is, no network
+    • stale file      → refreshed by whichever process takes the lock
+                        first; the others re-read its result
+    • refresh fails   → the stale copy keeps serving (logged)
+
+A daemon thread in each process refreshes ahead of expiry and pushes the
+result into the Authlib client, so callbacks never wait on discovery.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+import requests
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, refreshes may overlap
+    fcntl = None
+
+
+def default_cache_path(discovery_url):
+    digest = hashlib.sha1(discovery_url.encode()).hexdigest()[:12]
+    return os.path.join(tempfile.gettempdir(), f"prorooms-oidc-{digest}.json")
+
+
+class OIDCMetadataCache:
+    """Discovery document + JWKS, cached on disk with a TTL."""
+
+    def __init__(self, discovery_url, path=None, ttl=3600.0, timeout=5.0):
+        self.discovery_url = discovery_url
+        self.path    = path or default_cache_path(discovery_url)
+        self.ttl     = ttl
+        self.timeout = timeout
+        self._memo   = None          # (mtime, metadata)
+        self._clients = []
+        self._thread_pid = None
+
+    # ── Disk ─────────────────────────────────────────────────────────────────
+    def _read(self):
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except FileNotFoundError:
+            return None
+        if self._memo and self._memo[0] == mtime:
+            return self._memo[1]
+        try:
+            with open(self.path) as f:
+                metadata = json.load(f)
+        except (OSError, ValueError):
+            return None
+        self._memo = (mtime, metadata)
+        return metadata
+
+    def _write(self, metadata):
+        directory = os.path.dirname(self.path) or "."
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=".oidc-")
+        with os.fdopen(fd, "w") as f:
+            json.dump(metadata, f)
+        os.replace(tmp, self.path)      # atomic: readers never see a partial file
+
+    def _fresh(self, metadata, max_age=None):
+        max_age = self.ttl if max_age is None else max_age
+        return metadata is not None and time.time() - metadata["_loaded_at"] < max_age
+
+    # ── Network ──────────────────────────────────────────────────────────────
+    def fetch(self):
+        """Download the discovery document and the JWKS it points to."""
+        resp = requests.get(self.discovery_url, timeout=self.timeout)
+        resp.raise_for_status()
+        metadata = resp.json()
+        resp = requests.get(metadata["jwks_uri"], timeout=self.timeout)
+        resp.raise_for_status()
+        metadata["jwks"] = resp.json()
+        metadata["_loaded_at"] = time.time()
+        return metadata
+
+    def refresh(self, force=False, max_age=None):
+        """Fetch and store new metadata, unless another process just did.
+
+        The file counts as fresh for `max_age` seconds (default: the TTL).
+        """
+        with open(self.path + ".lock", "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                metadata = self._read()
+                if force or not self._fresh(metadata, max_age):
+                    metadata = self.fetch()
+                    self._write(metadata)
+                return metadata
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def get(self):
+        """Return metadata, refreshing if stale; falls back to a stale copy on errors."""
+        metadata = self._read()
+        if self._fresh(metadata):
+            return metadata
+        try:
+            return self.refresh()
+        except (requests.RequestException, OSError, ValueError, KeyError) as e:
+            if metadata is None:
+                raise
+            print(f"[oidc_cache] Refresh failed, serving stale metadata: {e}")
+            return metadata
+
+    # ── Authlib integration ──────────────────────────────────────────────────
+    def attach(self, client):
+        """Keep `client.server_metadata` filled from this cache."""
+        self._clients.append(client)
+        self._push()
+        self._start_refresher()
+
+    def _push(self, max_age=None):
+        """Refresh metadata older than `max_age` and hand it to the clients."""
+        metadata = self._read()
+        if not self._fresh(metadata, max_age):
+            try:
+                metadata = self.refresh(max_age=max_age)
+            except (requests.RequestException, OSError, ValueError, KeyError) as e:
+                if metadata is None:
+                    # Authlib will fetch lazily on the first callback instead.
+                    print(f"[oidc_cache] Could not load OpenID metadata: {e}")
+                    return
+                print(f"[oidc_cache] Refresh failed, serving stale metadata: {e}")
+        for client in self._clients:
+            client.server_metadata.update(metadata)
+
+    def _start_refresher(self):
+        if self._thread_pid == os.getpid():
+            return
+        self._thread_pid = os.getpid()
+        threading.Thread(target=self._refresh_loop, name="oidc-refresh", daemon=True).start()
+
+    def _refresh_loop(self):
+        while True:
+            metadata = self._read()
+            age      = time.time() - metadata["_loaded_at"] if metadata else self.ttl
+            # Wake a little before expiry; retry a failed refresh every minute.
+            time.sleep(max(60.0, self.ttl * 0.9 - age))
+            # Still fresh for get(): refresh ahead, or requests would fetch
+            # inline once it expires. The first worker to wake does it.
+            self._push(max_age=self.ttl * 0.9)
+
+
+def init_oidc_cache(app, client):
+    """Warm the metadata cache at startup and attach it to the OAuth `client`."""
+    cache = OIDCMetadataCache(
+        app.config["GOOGLE_DISCOVERY_URL"],
+        path=app.config["OIDC_CACHE_PATH"] or None,
+        ttl=app.config["OIDC_CACHE_TTL"],
+        timeout=app.config["OAUTH_HTTP_TIMEOUT"],
+    )
+    cache.attach(client)
+    if hasattr(os, "register_at_fork"):
+        # Threads don't survive fork(): restart the refresher in each worker.
+        os.register_at_fork(after_in_child=cache._start_refresher)
+    app.extensions["oidc_cache"] = cache
+    return cache
@@ -0,0 +1,207 @@
+"""
+rooms/pagination.py
+───────────────────
+Keyset (cursor) pagination, field projection and ETag helpers for the
+room listing API.
+
+Cursors are opaque, URL-safe tokens wrapping the (created_at, id) of the
+last row on a page; the next page continues strictly after that key, so
+deep pages cost the same as the first one. Ranked results (search,
+trending) have no stable key, so their cursors wrap a result offset instead.
+"""
+
+import base64
+import hashlib
+from contextlib import nullcontext
+from datetime import datetime
+
+from sqlalchemy import func, select, tuple_
+
+from rooms.Models import db, Room
+
+ROOM_SORTS = ("newest", "trending")
+
+# The key columns are always loaded because the cursor is built from them.
+_KEY_FIELDS = ("id", "created_at")
+
+
+def encode_cursor(created_at, room_id):
+    """Pack a (created_at, id) key into an opaque cursor token."""
+    raw = f"{created_at.isoformat()}|{room_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    """Unpack a cursor token; raises ValueError if it is malformed."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        created_at, room_id = base64.urlsafe_b64decode(padded).decode().split("|")
+        return datetime.fromisoformat(created_at), int(room_id)
+    except (TypeError, UnicodeDecodeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def _encode_offset(offset):
+    return base64.urlsafe_b64encode(f"+{offset}".encode()).decode().rstrip("=")
+
+
+def _decode_offset(token):
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode(padded).decode()
+        if not raw.startswith("+"):
+            raise ValueError
+        return int(raw[1:])
+    except (TypeError, UnicodeDecodeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def parse_fields(raw):
+    """
+    Turn a comma-separated `fields=` value into a tuple of column names.
+    Returns None (all fields) when empty; raises ValueError on unknown names.
+    """
+    if not raw:
+        return None
+    fields = tuple(dict.fromkeys(f.strip() for f in raw.split(",") if f.strip()))
+    unknown = [f for f in fields if f not in Room.API_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+    return fields
+
+
+def _projection(fields):
+    """(selected fields, columns): the requested fields first, then any missing key column."""
+    fields = tuple(fields or Room.API_FIELDS)
+    return fields, Room.api_columns(fields + tuple(k for k in _KEY_FIELDS if k not in fields))
+
+
+def paginate_rooms(limit, cursor=None, fields=None, native_datetimes=False):
+    """
+    Return (rows, next_cursor) for one page of rooms, newest first.
+
+    Only the requested `fields` (plus the key columns) are selected, and
+    rows are serialised straight from the result tuples (see
+    `Room.rows_to_dicts`). `next_cursor` is None on the last page.
+    """
+    fields, columns = _projection(fields)
+    stmt = select(*columns)
+    if cursor:
+        created_at, room_id = decode_cursor(cursor)
+        stmt = stmt.where(tuple_(Room.created_at, Room.id) < (created_at, room_id))
+
+    rows = db.session.execute(
+        stmt.order_by(Room.created_at.desc(), Room.id.desc()).limit(limit + 1)
+    ).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]._mapping
+        next_cursor = encode_cursor(last[Room.created_at], last[Room.id])
+    return Room.rows_to_dicts(rows, fields, native_datetimes), next_cursor
+
+
+def paginate_search(backend, text, limit, cursor=None, fields=None, native_datetimes=False):
+    """
+    Return (rows, next_cursor) for one page of ranked search results.
+
+    The backend ranks ids; the page is then loaded in one IN query with
+    the same projection as `paginate_rooms` and put back in rank order.
+    """
+    offset = _decode_offset(cursor) if cursor else 0
+    return _ranked_page(backend.search(text, limit + 1, offset), offset, limit, fields, native_datetimes)
+
+
+def paginate_trending(ranking, limit, cursor=None, fields=None, native_datetimes=False):
+    """
+    Return (rows, next_cursor) for one page of the trending ranking
+    (rooms/analytics.py), cursors as for search results.
+    """
+    offset = _decode_offset(cursor) if cursor else 0
+    return _ranked_page(ranking.ids[offset:offset + limit + 1], offset, limit, fields, native_datetimes)
+
+
+def _ranked_page(ids, offset, limit, fields, native_datetimes):
+    """One page of ranked room `ids` (up to limit + 1, from `offset`), loaded in rank order."""
+    page_ids = list(ids[:limit])
+    if not page_ids:
+        return [], None
+
+    fields, columns = _projection(fields)
+    id_index = [c.key for c in columns].index("id")
+    by_id = {row[id_index]: row
+             for row in db.session.execute(select(*columns).where(Room.id.in_(page_ids)))}
+    rows = [by_id[i] for i in page_ids if i in by_id]
+    next_cursor = _encode_offset(offset + limit) if len(ids) > limit else None
+    return Room.rows_to_dicts(rows, fields, native_datetimes), next_cursor
+
+
+class RoomPageStream:
+    """
+    Lazily-fetched first page of rooms for (streamed) templates.
+
+    Rows are pulled from the database in `chunk_size` batches while the
+    template iterates, so a streamed response can flush the page shell
+    before the query has finished. `next_cursor` is set once the page has
+    been fully iterated. With a `cache`, the rendered rows are kept as
+    dicts and replayed until the next room write.
+    """
+
+    def __init__(self, limit, chunk_size=50, cache=None):
+        self.limit       = limit
+        self.chunk_size  = chunk_size
+        self.cache       = cache
+        self.next_cursor = None
+
+    def __iter__(self):
+        key = None
+        if self.cache is not None:
+            key    = self.cache.listing_key(f"dashboard:{self.limit}")
+            cached = self.cache.get(key)
+            if cached is not None:
+                rows, self.next_cursor = cached
+                yield from rows
+                return
+
+        # Column tuples, not ORM instances: templates only read attributes,
+        # which result rows provide.
+        stmt = (
+            select(*Room.api_columns(Room.CARD_FIELDS))
+            .order_by(Room.created_at.desc(), Room.id.desc())
+            .limit(self.limit + 1)
+            .execution_options(yield_per=self.chunk_size)
+        )
+        with self.cache.filling() if key is not None else nullcontext():
+            result = db.session.execute(stmt)
+        rows   = []
+        try:
+            last = None
+            for n, room in enumerate(result):
+                if n == self.limit:
+                    self.next_cursor = encode_cursor(last.created_at, last.id)
+                    break
+                last = room
+                rows.append(room)
+                yield room
+        finally:
+            result.close()
+        if key is not None:
+            self.cache.set_listing(key, (Room.rows_to_dicts(rows, Room.CARD_FIELDS), self.next_cursor))
+
+
+def rooms_etag(query_string=b"", generation=None):
+    """
+    Weak ETag for a room listing: changes whenever a room is added or
+    edited, and differs per query string so each page/projection gets
+    its own validator. The three maxima are read off indexes, so a poll
+    costs no scan. Deletes don't move them; `generation` (the shared
+    cache generation, bumped by every room write) covers those when a
+    cache tier is shared between workers.
+    """
+    max_id, newest, edited = db.session.query(
+        func.max(Room.id), func.max(Room.created_at), func.max(Room.updated_at)
+    ).one()
+    stamp  = "-".join(t.isoformat() if t else "-" for t in (newest, edited))
+    prefix = f"rooms-g{generation}" if generation is not None else "rooms"
+    digest = hashlib.blake2b(query_string, digest_size=6).hexdigest()
+    return f"{prefix}-{max_id or 0}-{stamp}-{digest}"
@@ -0,0 +1,171 @@
+"""
+rooms/passwords.py
+──────────────────
+Password hashing for local accounts.
+
+Hashes are self-describing strings, so the scheme and cost can change at
+any time: anything not matching the configured `PASSWORD_HASHER` and
+cost parameters is upgraded the next time that user logs in.
+
+    scrypt$<n>$<r>$<p>$<salt>$<hash>
+    pbkdf2_sha256$<iterations>$<salt>$<hash>
+    $argon2id$...                      (argon2-cffi, optional)
+    <64 hex chars>                     (legacy unsalted SHA-256)
+
+Hashing runs on a small bounded thread pool (hashlib's scrypt/PBKDF2 and
+argon2 release the GIL), so a burst of logins queues there instead of
+pinning every request thread.
+"""
+
+import base64
+import hashlib
+import hmac
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+
+try:
+    import argon2
+except ImportError:  # optional dependency
+    argon2 = None
+
+SCHEMES = ("scrypt", "pbkdf2_sha256", "argon2")
+
+
+class HasherBusyError(RuntimeError):
+    """Raised when the hashing queue is full and a request gave up waiting."""
+
+
+def _b64(raw):
+    return base64.b64encode(raw).decode().rstrip("=")
+
+
+def _unb64(text):
+    return base64.b64decode(text + "=" * (-len(text) % 4))
+
+
+class PasswordHasher:
+    """Hash/verify passwords with the configured scheme on a bounded pool."""
+
+    def __init__(self, scheme="scrypt", scrypt_n=2**14, scrypt_r=8, scrypt_p=1,
+                 pbkdf2_iterations=600_000, argon2_time_cost=3,
+                 argon2_memory_cost=65536, argon2_parallelism=1,
+                 workers=None, max_pending=64, queue_timeout=5.0):
+        if scheme not in SCHEMES:
+            raise ValueError(f"❌ Unknown PASSWORD_HASHER '{scheme}' (choose from {', '.join(SCHEMES)})")
+        if scheme == "argon2" and argon2 is None:
+            raise ValueError("❌ PASSWORD_HASHER=argon2 needs the 'argon2-cffi' package.")
+
+        self.scheme            = scheme
+        self.scrypt_params     = (scrypt_n, scrypt_r, scrypt_p)
+        self.pbkdf2_iterations = pbkdf2_iterations
+        self._argon2 = argon2.PasswordHasher(
+            time_cost=argon2_time_cost, memory_cost=argon2_memory_cost,
+            parallelism=argon2_parallelism,
+        ) if argon2 is not None else None
+
+        workers = workers or os.cpu_count() or 1
+        self.queue_timeout = queue_timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pwhash")
+        self._slots    = threading.BoundedSemaphore(workers + max_pending)
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            scheme=config["PASSWORD_HASHER"],
+            scrypt_n=config["SCRYPT_N"],
+            scrypt_r=config["SCRYPT_R"],
+            scrypt_p=config["SCRYPT_P"],
+            pbkdf2_iterations=config["PBKDF2_ITERATIONS"],
+            argon2_time_cost=config["ARGON2_TIME_COST"],
+            argon2_memory_cost=config["ARGON2_MEMORY_COST"],
+            argon2_parallelism=config["ARGON2_PARALLELISM"],
+            workers=config["PASSWORD_HASH_WORKERS"],
+            max_pending=config["PASSWORD_HASH_MAX_PENDING"],
+            queue_timeout=config["PASSWORD_HASH_TIMEOUT"],
+        )
+
+    # ── Pool ─────────────────────────────────────────────────────────────────
+    def _run(self, fn, *args):
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            raise HasherBusyError("Password hashing queue is full")
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future.result()
+
+    # ── Public API ───────────────────────────────────────────────────────────
+    def hash(self, password):
+        """Return an encoded hash of `password` using the configured scheme."""
+        return self._run(self._hash, password)
+
+    def verify(self, password, encoded):
+        """Constant-time check of `password` against any supported `encoded` hash."""
+        return self._run(self._verify, password, encoded)
+
+    def needs_rehash(self, encoded):
+        """True if `encoded` uses another scheme or other cost parameters."""
+        if self.scheme == "scrypt":
+            return not encoded.startswith("scrypt$%d$%d$%d$" % self.scrypt_params)
+        if self.scheme == "pbkdf2_sha256":
+            return not encoded.startswith(f"pbkdf2_sha256${self.pbkdf2_iterations}$")
+        if not encoded.startswith("$argon2"):
+            return True
+        return self._argon2.check_needs_rehash(encoded)
+
+    # ── Schemes ──────────────────────────────────────────────────────────────
+    def _hash(self, password):
+        secret = password.encode()
+        salt   = os.urandom(16)
+        if self.scheme == "scrypt":
+            n, r, p = self.scrypt_params
+            digest = hashlib.scrypt(secret, salt=salt, n=n, r=r, p=p,
+                                    maxmem=256 * n * r + 2**20)
+            return f"scrypt${n}${r}${p}${_b64(salt)}${_b64(digest)}"
+        if self.scheme == "pbkdf2_sha256":
+            digest = hashlib.pbkdf2_hmac("sha256", secret, salt, self.pbkdf2_iterations)
+            return f"pbkdf2_sha256${self.pbkdf2_iterations}${_b64(salt)}${_b64(digest)}"
+        return self._argon2.hash(password)
+
+    def _verify(self, password, encoded):
+        secret = password.encode()
+        try:
+            if encoded.startswith("scrypt$"):
+                _, n, r, p, salt, expected = encoded.split("$")
+                n, r, p = int(n), int(r), int(p)
+                digest = hashlib.scrypt(secret, salt=_unb64(salt), n=n, r=r, p=p,
+                                        maxmem=256 * n * r + 2**20)
+                return hmac.compare_digest(digest, _unb64(expected))
+            if encoded.startswith("pbkdf2_sha256$"):
+                _, iterations, salt, expected = encoded.split("$")
+                digest = hashlib.pbkdf2_hmac("sha256", secret, _unb64(salt), int(iterations))
+                return hmac.compare_digest(digest, _unb64(expected))
+            if encoded.startswith("$argon2"):
+                if self._argon2 is None:
+                    return False
+                try:
+                    return self._argon2.verify(encoded, password)
+                except argon2.exceptions.VerificationError:
+                    return False
+            # Legacy: unsalted SHA-256 hex digest.
+            legacy = hashlib.sha256(secret).hexdigest()
+            return hmac.compare_digest(legacy.encode(), encoded.encode())
+        except (ValueError, TypeError):
+            return False
+
+
+def init_passwords(app):
+    """Create the app's PasswordHasher from its config."""
+    hasher = PasswordHasher.from_config(app.config)
+    app.extensions["password_hasher"] = hasher
+    return hasher
+
+
+def password_hasher():
+    """The PasswordHasher of the current app."""
+    return current_app.extensions["password_hasher"]
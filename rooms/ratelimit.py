@@ -0,0 +1,214 @@
+"""
+rooms/ratelimit.py
+──────────────────
+Token-bucket rate limiting for the brute-forceable endpoints.
+
+Room passwords are 6 digits and login guesses cost a query plus a KDF
+run, so `/login` and `/api/rooms/join` consult the limiter before doing
+any database or hashing work. Each rule ("5/minute") is a bucket of
+`limit` tokens refilled continuously over `period`, kept per key (client
+IP, account, user, room). A request takes a token from each of its
+buckets or from none: a request one rule rejects costs the others nothing.
+
+Two backends:
+    memory – per-process buckets, O(1) per hit, bounded by RATELIMIT_MAX_KEYS
+    redis  – one atomic Lua call per request, shared by all workers
+             (`RATELIMIT_REDIS_URL`); falls back to memory if Redis fails
+"""
+
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, request
+
+from rooms.redis_client import import_redis
+
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+def parse_rate(text):
+    """'5/minute' → (capacity, tokens per second)."""
+    try:
+        count, unit = text.strip().split("/")
+        capacity, period = int(count), PERIODS[unit.strip().rstrip("s")]
+    except (ValueError, KeyError):
+        raise ValueError(f"❌ Invalid rate limit {text!r}; expected e.g. '5/minute'.") from None
+    if capacity <= 0:
+        raise ValueError(f"❌ Invalid rate limit {text!r}; the count must be positive.")
+    return capacity, capacity / period
+
+
+class MemoryBuckets:
+    """key → (tokens, last refill) with LRU eviction past `max_keys`."""
+
+    name = "memory"
+
+    def __init__(self, max_keys=100_000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock    = threading.Lock()
+        self.evictions = 0
+
+    def take(self, hits):
+        """
+        Take one token from every (key, capacity, rate) bucket, or none if
+        one is empty. Returns (None, 0.0) if allowed, else (index of the
+        first empty bucket, seconds until it has a token).
+        """
+        now = time.monotonic()
+        with self._lock:
+            levels = []
+            for key, capacity, rate in hits:
+                tokens, stamp = self._buckets.get(key, (capacity, now))
+                levels.append(min(capacity, tokens + (now - stamp) * rate))
+            empty = next((i for i, tokens in enumerate(levels) if tokens < 1), None)
+            for (key, _, _), tokens in zip(hits, levels):
+                self._buckets[key] = (tokens - 1 if empty is None else tokens, now)
+                self._buckets.move_to_end(key)
+                if len(self._buckets) > self.max_keys:
+                    # The least recently hit bucket has refilled the longest.
+                    self._buckets.popitem(last=False)
+                    self.evictions += 1
+        if empty is None:
+            return None, 0.0
+        return empty, (1 - levels[empty]) / hits[empty][2]
+
+    def stats(self):
+        return {"keys": len(self._buckets), "evictions": self.evictions}
+
+
+# KEYS = buckets; ARGV = capacity, rate (tokens/s) per bucket. Takes a token
+# from every bucket or from none; returns {first empty bucket (1-based, 0 if
+# allowed), seconds to wait}. Uses the server clock so workers with skewed
+# clocks agree.
+_TAKE_LUA = """
+local t      = redis.call('TIME')
+local now    = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local levels = {}
+local empty  = 0
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[2 * i - 1])
+    local rate     = tonumber(ARGV[2 * i])
+    local bucket   = redis.call('HMGET', key, 'tokens', 'stamp')
+    local tokens   = tonumber(bucket[1]) or capacity
+    local stamp    = tonumber(bucket[2]) or now
+    levels[i] = math.min(capacity, tokens + (now - stamp) * rate)
+    if empty == 0 and levels[i] < 1 then
+        empty = i
+    end
+end
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[2 * i - 1])
+    local rate     = tonumber(ARGV[2 * i])
+    local tokens   = levels[i]
+    if empty == 0 then
+        tokens = tokens - 1
+    end
+    redis.call('HSET', key, 'tokens', tostring(tokens), 'stamp', tostring(now))
+    redis.call('PEXPIRE', key, math.ceil(capacity / rate * 1000))
+end
+if empty == 0 then
+    return {0, '0'}
+end
+return {empty, tostring((1 - levels[empty]) / tonumber(ARGV[2 * empty]))}
+"""
+
+
+class RedisBuckets:
+    """Buckets in any Redis-protocol server, updated by one Lua script call."""
+
+    name = "redis"
+
+    def __init__(self, url, fallback, prefix="prorooms:rl:"):
+        redis = import_redis("RATELIMIT_REDIS_URL")
+        self.RedisError = redis.RedisError
+        self._client    = redis.Redis.from_url(url)
+        self._take      = self._client.register_script(_TAKE_LUA)
+        self.fallback   = fallback
+        self.prefix     = prefix
+        self.errors     = 0
+
+    def take(self, hits):
+        """See MemoryBuckets.take()."""
+        try:
+            empty, retry_after = self._take(
+                keys=[self.prefix + key for key, _, _ in hits],
+                args=[arg for _, capacity, rate in hits for arg in (capacity, rate)],
+            )
+        except self.RedisError:
+            # Keep throttling per worker rather than failing open.
+            self.errors += 1
+            return self.fallback.take(hits)
+        return (None, 0.0) if empty == 0 else (empty - 1, float(retry_after))
+
+    def stats(self):
+        return {"errors": self.errors, "fallback": self.fallback.stats()}
+
+
+class RateLimiter:
+    """Named rules over a bucket backend, with allowed/rejected counters."""
+
+    def __init__(self, rules, buckets, enabled=True):
+        self.rules   = {name: parse_rate(rate) for name, rate in rules.items()}
+        self.buckets = buckets
+        self.enabled = enabled
+        self.allowed  = dict.fromkeys(self.rules, 0)
+        self.rejected = dict.fromkeys(self.rules, 0)
+
+    def check(self, *hits):
+        """
+        Consume one token from each (rule, key) bucket, or none if any is
+        empty, so a rejected request spends nothing. Returns 0.0 when the
+        request may proceed, otherwise the seconds to wait for the first
+        empty bucket.
+        """
+        if not self.enabled:
+            return 0.0
+        empty, retry_after = self.buckets.take(
+            [(f"{rule}:{key}", *self.rules[rule]) for rule, key in hits]
+        )
+        if empty is not None:
+            self.rejected[hits[empty][0]] += 1
+            return retry_after
+        for rule, _ in hits:
+            self.allowed[rule] += 1
+        return 0.0
+
+    def stats(self):
+        return {"backend": self.buckets.name, "allowed": self.allowed,
+                "rejected": self.rejected, **self.buckets.stats()}
+
+
+def retry_after_header(seconds):
+    """Retry-After value: whole seconds, rounded up."""
+    return str(max(1, math.ceil(seconds)))
+
+
+def client_ip():
+    """Client address (set TRUSTED_PROXIES when running behind a proxy)."""
+    return request.remote_addr or "unknown"
+
+
+def init_rate_limiter(app):
+    """Create the app's RateLimiter from its config."""
+    rules = {
+        "login_ip":      app.config["RATELIMIT_LOGIN_IP"],
+        "login_account": app.config["RATELIMIT_LOGIN_ACCOUNT"],
+        "join_ip":       app.config["RATELIMIT_JOIN_IP"],
+        "join_user":     app.config["RATELIMIT_JOIN_USER"],
+        "join_room":     app.config["RATELIMIT_JOIN_ROOM"],
+    }
+    buckets = MemoryBuckets(app.config["RATELIMIT_MAX_KEYS"])
+    if app.config["RATELIMIT_REDIS_URL"]:
+        buckets = RedisBuckets(app.config["RATELIMIT_REDIS_URL"], fallback=buckets)
+    limiter = RateLimiter(rules, buckets, enabled=app.config["RATELIMIT_ENABLED"])
+    app.extensions["rate_limiter"] = limiter
+    return limiter
+
+
+def rate_limiter():
+    """The RateLimiter of the current app."""
+    return current_app.extensions["rate_limiter"]
@@ -0,0 +1,16 @@
+"""
+rooms/redis_client.py
+─────────────────────
+The optional redis package, shared by every Redis-backed tier (room
+cache, sessions, rate limits). It is imported only when one of the
+*_REDIS_URL settings is set, so apps without Redis never load it.
+"""
+
+
+def import_redis(setting):
+    """The redis module, or a config error naming `setting` when it isn't installed."""
+    try:
+        import redis
+    except ImportError:
+        raise ValueError(f"❌ {setting} is set but the 'redis' package is not installed.") from None
+    return redis
@@ -0,0 +1,39 @@
+"""
+rooms/search
+────────────
+Pluggable room search. The backend is picked by `SEARCH_BACKEND`:
+
+    postgres – tsvector GIN index with ts_rank (production)
+    memory   – in-process inverted index (SQLite / tests)
+    auto     – postgres on PostgreSQL URIs, memory otherwise
+"""
+
+from flask import current_app
+
+from rooms.search.base import SearchBackend, tokenize
+from rooms.search.memory import InvertedIndexBackend
+from rooms.search.postgres import PostgresSearchBackend
+
+BACKENDS = {
+    PostgresSearchBackend.name: PostgresSearchBackend,
+    InvertedIndexBackend.name:  InvertedIndexBackend,
+}
+
+
+def init_search(app):
+    """Create the configured search backend and attach it to `app`."""
+    name = app.config.get("SEARCH_BACKEND", "auto")
+    if name == "auto":
+        uri  = app.config["SQLALCHEMY_DATABASE_URI"]
+        name = "postgres" if uri.startswith("postgresql") else "memory"
+    if name not in BACKENDS:
+        raise ValueError(f"❌ Unknown SEARCH_BACKEND '{name}' (choose from {', '.join(BACKENDS)})")
+    backend = BACKENDS[name]()
+    backend.init_app(app)
+    app.extensions["room_search"] = backend
+    return backend
+
+
+def search_backend():
+    """The search backend of the current app."""
+    return current_app.extensions["room_search"]
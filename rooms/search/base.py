@@ -0,0 +1,35 @@
+"""
+rooms/search/base.py
+────────────────────
+Interface shared by the room search backends.
+"""
+
+import re
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text):
+    """Lower-case word tokens of `text` (used for documents and queries alike)."""
+    return _TOKEN_RE.findall((text or "").lower())
+
+
+class SearchBackend:
+    """
+    Ranked full-text search over room name + description.
+
+    Every query token is matched as a prefix, so "pyth dev" finds
+    "Python Developers" while the user is still typing.
+    """
+
+    name = "base"
+
+    def init_app(self, app):
+        """Hook for backends that need the app (events, warm-up)."""
+
+    def invalidate(self):
+        """Forget derived state after writes that bypassed ORM events (bulk import)."""
+
+    def search(self, text, limit, offset=0):
+        """Return up to `limit` matching room ids, best match first."""
+        raise NotImplementedError
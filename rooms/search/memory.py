@@ -0,0 +1,163 @@
+"""
+rooms/search/memory.py
+──────────────────────
+In-process inverted index for SQLite / test deployments.
+
+The index is built from the rooms table on first use and then kept in
+step with SQLAlchemy events: mapper events collect a transaction's room
+changes in `session.info`, applied to the committing app's index after
+commit and dropped on rollback, so a rolled-back insert never shows up
+in search. It only sees writes made by its own process, so multi-worker
+PostgreSQL deployments should use the `postgres` backend instead.
+"""
+
+import bisect
+import threading
+from collections import defaultdict
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from rooms.Models import db, Room
+from rooms.search.base import SearchBackend, tokenize
+
+NAME_WEIGHT        = 2.0
+DESCRIPTION_WEIGHT = 1.0
+
+
+class InvertedIndexBackend(SearchBackend):
+    """token → {room_id: weight} postings with a sorted vocabulary for prefix lookups."""
+
+    name = "memory"
+
+    def __init__(self):
+        self._lock     = threading.Lock()
+        self._postings = defaultdict(dict)
+        self._docs     = {}       # room_id → tokens, so updates can unindex
+        self._vocab    = []       # sorted tokens
+        self._vocab_dirty = False
+        self._loaded   = False
+
+    # ── Maintenance ──────────────────────────────────────────────────────────
+    def invalidate(self):
+        """Drop the index; it is rebuilt from the database on the next search."""
+        with self._lock:
+            self._postings.clear()
+            self._docs.clear()
+            self._vocab = []
+            self._vocab_dirty = False
+            self._loaded = False
+
+    def apply(self, changes):
+        """Apply committed (room_id, name, description) changes; name None means deleted."""
+        with self._lock:
+            if not self._loaded:
+                return          # the first search loads them from the database
+            for room_id, name, description in changes:
+                if name is None:
+                    self._unindex(room_id)
+                else:
+                    self._index(room_id, name, description)
+
+    def _index(self, room_id, name, description):
+        self._unindex(room_id)
+        weights = defaultdict(float)
+        for token in tokenize(name):
+            weights[token] += NAME_WEIGHT
+        for token in tokenize(description):
+            weights[token] += DESCRIPTION_WEIGHT
+        for token, weight in weights.items():
+            if token not in self._postings:
+                self._vocab_dirty = True
+            self._postings[token][room_id] = weight
+        self._docs[room_id] = tuple(weights)
+
+    def _unindex(self, room_id):
+        for token in self._docs.pop(room_id, ()):
+            postings = self._postings[token]
+            postings.pop(room_id, None)
+            if not postings:
+                del self._postings[token]
+                self._vocab_dirty = True
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        rows = db.session.execute(
+            db.select(Room.id, Room.name, Room.description)
+        ).all()
+        for room_id, name, description in rows:
+            self._index(room_id, name, description)
+        self._loaded = True
+
+    def _expand(self, prefix):
+        """All vocabulary tokens starting with `prefix`."""
+        if self._vocab_dirty:
+            self._vocab = sorted(self._postings)
+            self._vocab_dirty = False
+        start = bisect.bisect_left(self._vocab, prefix)
+        end   = bisect.bisect_left(self._vocab, prefix + "\U0010ffff")
+        return self._vocab[start:end]
+
+    # ── Query ────────────────────────────────────────────────────────────────
+    def search(self, text, limit, offset=0):
+        terms = tokenize(text)
+        if not terms:
+            return []
+        with self._lock:
+            self._ensure_loaded()
+            scores = None
+            for term in terms:
+                term_scores = defaultdict(float)
+                for token in self._expand(term):
+                    for room_id, weight in self._postings[token].items():
+                        term_scores[room_id] += weight
+                if scores is None:
+                    scores = term_scores
+                else:
+                    # Every term must match (same semantics as `a:* & b:*`).
+                    scores = {rid: s + term_scores[rid]
+                              for rid, s in scores.items() if rid in term_scores}
+                if not scores:
+                    return []
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], -item[0]))
+        return [room_id for room_id, _ in ranked[offset:offset + limit]]
+
+
+# ── Events (registered once, for every app) ──────────────────────────────────
+def _memory_index():
+    backend = current_app.extensions.get("room_search") if has_app_context() else None
+    return backend if isinstance(backend, InvertedIndexBackend) else None
+
+
+def _collect(room, name, description):
+    session = object_session(room)
+    if session is not None and _memory_index() is not None:
+        session.info.setdefault("search_changes", []).append((room.id, name, description))
+
+
+def _on_upsert(mapper, connection, room):
+    _collect(room, room.name, room.description)
+
+
+def _on_delete(mapper, connection, room):
+    _collect(room, None, None)
+
+
+def _apply_after_commit(session):
+    changes = session.info.pop("search_changes", None)
+    index   = _memory_index() if changes else None
+    if index is not None:
+        index.apply(changes)
+
+
+def _discard_after_rollback(session, previous_transaction):
+    session.info.pop("search_changes", None)
+
+
+event.listen(Room, "after_insert", _on_upsert)
+event.listen(Room, "after_update", _on_upsert)
+event.listen(Room, "after_delete", _on_delete)
+event.listen(Session, "after_commit", _apply_after_commit)
+event.listen(Session, "after_soft_rollback", _discard_after_rollback)
@@ -0,0 +1,50 @@
+"""
+rooms/search/postgres.py
+────────────────────────
+PostgreSQL full-text backend: a GIN-indexed, weighted tsvector of
+name (A) + description (B), queried with prefix tsqueries and ts_rank.
+
+The tsvector lives in a STORED generated column, so PostgreSQL keeps it
+current on every INSERT/UPDATE without triggers, and ranking reads the
+stored vector instead of re-parsing the text of every matching row. The
+column and index are created by migrations 0003/0004 (rooms/db/migrations.py);
+the column is PostgreSQL-only and deliberately absent from the ORM model.
+"""
+
+from sqlalchemy import func, literal_column, select
+
+from rooms.Models import db, Room
+from rooms.search.base import SearchBackend, tokenize
+
+# 'simple' keeps room names intact (no stemming / stop-word removal).
+TS_CONFIG = literal_column("'simple'::regconfig")
+
+SEARCH_VECTOR = literal_column("rooms.search_vector")
+
+
+def prefix_tsquery(text):
+    """Build a to_tsquery() string matching every token of `text` as a prefix."""
+    return " & ".join(f"{token}:*" for token in tokenize(text))
+
+
+class PostgresSearchBackend(SearchBackend):
+    """Search via the `ix_rooms_search_vector` GIN index."""
+
+    name = "postgres"
+
+    def search(self, text, limit, offset=0):
+        # Registers to_tsquery() & co.; imported here so create_app() doesn't load the dialect.
+        import sqlalchemy.dialects.postgresql  # noqa: F401
+        tsquery = prefix_tsquery(text)
+        if not tsquery:
+            return []
+        query = func.to_tsquery(TS_CONFIG, tsquery)
+        stmt = (
+            select(Room.id)
+            .where(SEARCH_VECTOR.op("@@")(query))
+            .order_by(func.ts_rank(SEARCH_VECTOR, query).desc(),
+                      Room.created_at.desc(), Room.id.desc())
+            .limit(limit)
+            .offset(offset)
+        )
+        return list(db.session.scalars(stmt))
@@ -0,0 +1,159 @@
+"""
+rooms/serialization.py
+──────────────────────
+JSON encoding fast path and response compression.
+
+    JSON_FAST=true        orjson-backed JSON provider (opt-in)
+    COMPRESS_ENABLED      gzip / brotli for responses of COMPRESS_MIN_SIZE bytes and up
+
+The fast provider uses orjson when it is installed and the stdlib
+encoder otherwise; both encode datetimes as ISO 8601, so the room API
+hands created_at over as a datetime instead of formatting every row
+(`Room.rows_to_dicts(native_datetimes=True)`). Without JSON_FAST Flask's
+default provider is kept.
+
+Compression is negotiated from Accept-Encoding: brotli when the client
+accepts it and the `brotli` package is installed, gzip otherwise. File
+responses (already precompressed by rooms/assets.py), streamed pages
+and small bodies are passed through unchanged.
+"""
+
+import gzip
+from datetime import date
+
+from flask import request
+from flask.json.provider import DefaultJSONProvider
+
+
+def _import_orjson():
+    """The optional orjson module; the provider falls back to the stdlib without it."""
+    try:
+        import orjson
+    except ImportError:
+        return None
+    return orjson
+
+
+def _import_brotli():
+    """The optional brotli module; responses are gzipped without it."""
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+# ── JSON ──────────────────────────────────────────────────────────────────────
+def _default_iso(o):
+    if isinstance(o, date):
+        return o.isoformat()
+    return DefaultJSONProvider.default(o)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider on orjson, with the stdlib encoder as fallback."""
+
+    default = staticmethod(_default_iso)
+    native_datetimes = True     # created_at may be left to the encoder
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.orjson = _import_orjson()
+
+    def _options(self, pretty=False):
+        orjson = self.orjson
+        options = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if pretty:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def dumps(self, obj, **kwargs):
+        # Explicit json.dumps options (indent, separators, …) need the stdlib.
+        if self.orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return self.orjson.dumps(obj, default=self.default, option=self._options()).decode()
+
+    def loads(self, s, **kwargs):
+        if self.orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return self.orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if self.orjson is None:
+            return super().response(*args, **kwargs)
+        obj    = self._prepare_response_obj(args, kwargs)
+        pretty = self.compact is False or (self.compact is None and self._app.debug)
+        body   = self.orjson.dumps(obj, default=self.default, option=self._options(pretty))
+        return self._app.response_class(body + b"\n", mimetype=self.mimetype)
+
+
+def native_datetimes(app):
+    """Whether `app`'s JSON provider encodes datetimes itself (see Room.rows_to_dicts)."""
+    return getattr(app.json, "native_datetimes", False)
+
+
+# ── Compression ───────────────────────────────────────────────────────────────
+COMPRESSIBLE_MIMETYPES = {
+    "application/json", "text/html", "text/css", "text/plain", "text/csv",
+    "text/javascript", "application/javascript", "application/xml", "image/svg+xml",
+}
+
+
+class Compressor:
+    """after_request hook compressing eligible responses."""
+
+    def __init__(self, min_size, gzip_level, brotli_quality):
+        self.min_size       = min_size
+        self.gzip_level     = gzip_level
+        self.brotli_quality = brotli_quality
+        self.brotli         = _import_brotli()
+        self.encodings      = ("br", "gzip") if self.brotli else ("gzip",)
+
+    def choose(self, accept):
+        """Best supported encoding by client preference (br on ties), or None."""
+        quality, encoding = max(((accept[e], -i), e) for i, e in enumerate(self.encodings))
+        return encoding if quality[0] > 0 else None
+
+    def compress(self, data, encoding):
+        if encoding == "br":
+            return self.brotli.compress(data, quality=self.brotli_quality)
+        return gzip.compress(data, self.gzip_level, mtime=0)
+
+    def __call__(self, response):
+        if (response.direct_passthrough or response.is_streamed
+                or response.status_code < 200 or response.status_code in (204, 304)
+                or response.content_encoding
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES
+                or "no-transform" in response.headers.get("Cache-Control", "")):
+            return response
+        response.vary.add("Accept-Encoding")
+        if (response.content_length or 0) < self.min_size:
+            return response
+        encoding = self.choose(request.accept_encodings)
+        if encoding is None:
+            return response
+
+        response.set_data(self.compress(response.get_data(), encoding))
+        response.content_encoding = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            # A strong validator must differ per representation.
+            response.set_etag(f"{etag}-{encoding}")
+        return response
+
+
+def init_serialization(app):
+    """Install the fast JSON provider (JSON_FAST) and response compression."""
+    if app.config["JSON_FAST"]:
+        app.json = FastJSONProvider(app)
+        if app.json.orjson is None:
+            print("⚠️  JSON_FAST is set but 'orjson' is not installed; using the stdlib encoder.")
+    if app.config["COMPRESS_ENABLED"]:
+        compressor = app.extensions["compressor"] = Compressor(
+            app.config["COMPRESS_MIN_SIZE"],
+            app.config["COMPRESS_GZIP_LEVEL"],
+            app.config["COMPRESS_BROTLI_QUALITY"],
+        )
+        app.after_request(compressor)
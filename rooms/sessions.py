@@ -0,0 +1,274 @@
+"""
+rooms/sessions.py
+─────────────────
+Optional server-side sessions (SESSION_BACKEND = memory | filesystem | redis).
+
+With the default `cookie` backend Flask signs the whole session (user
+ids, flashes, the cached profile) into the cookie, so every request
+ships it and re-verifies its HMAC. The server-side backends keep the
+data in a store and put only a random 256-bit session id in the cookie:
+
+    • lazy     – the store is only read when a route touches `session`
+    • dirty    – it is only written when the session was modified
+    • compact  – the cookie is a fixed 43-character id
+
+Stores (values are Flask's tagged-JSON session payloads):
+    memory     – per-process LRU (single worker / development only)
+    filesystem – one file per session under SESSION_FILE_DIR
+    redis      – any Redis-protocol server (SESSION_REDIS_URL)
+
+Logins call `regenerate_session()` first: the data moves to a new id, so
+an id issued before login can't be fixed on a victim and later reused.
+
+`current_user()` returns the logged-in user's profile, cached in the
+session at login so pages don't re-query accounts.
+"""
+
+import os
+import re
+import secrets
+import tempfile
+import time
+
+from flask import session
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+
+from rooms.cache import LRUCache, RedisCache
+from rooms.Models import db, Account
+
+SESSION_BACKENDS = ("cookie", "memory", "filesystem", "redis")
+_SID_RE = re.compile(r"^[A-Za-z0-9_-]{43}$")   # secrets.token_urlsafe(32)
+
+
+class FileSessionStore:
+    """One file per session id; expiry is checked against the file's mtime."""
+
+    PURGE_EVERY = 1000   # writes between sweeps of expired files
+
+    def __init__(self, directory, ttl):
+        self.directory = directory
+        self.ttl       = ttl
+        self._writes   = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key)
+
+    def get(self, key, default=None):
+        path = self._path(key)
+        try:
+            if time.time() - os.stat(path).st_mtime > self.ttl:
+                os.remove(path)
+                return default
+            with open(path, encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            return default
+
+    def set(self, key, value, ttl=None):
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=".session-")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(value)
+        os.replace(tmp, self._path(key))   # atomic: readers never see a partial file
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            self.purge()
+
+    def purge(self):
+        """Remove expired session files."""
+        cutoff = time.time() - self.ttl
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                try:
+                    if entry.stat().st_mtime < cutoff:
+                        os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+
+class ServerSideSession(SessionMixin):
+    """Session whose data is fetched from the store on first access."""
+
+    def __init__(self, sid=None, loader=None):
+        self.sid      = sid
+        self.new      = sid is None
+        self.modified = False
+        self.accessed = False
+        self._loader  = loader
+        self._data    = None if loader else {}
+        self.discarded_sid = None
+
+    @property
+    def loaded(self):
+        return self._data is not None
+
+    def _mapping(self):
+        self.accessed = True
+        if self._data is None:
+            self._data = self._loader()
+            if self._data is None:
+                # Unknown or expired id: never adopt an id the client chose.
+                self._data, self.sid, self.new = {}, None, True
+        return self._data
+
+    def __getitem__(self, key):
+        return self._mapping()[key]
+
+    def __setitem__(self, key, value):
+        self._mapping()[key] = value
+        self.modified = True
+
+    def __delitem__(self, key):
+        del self._mapping()[key]
+        self.modified = True
+
+    def __iter__(self):
+        return iter(self._mapping())
+
+    def __len__(self):
+        return len(self._mapping())
+
+    def clear(self):
+        # No need to load what is about to be discarded. Whatever is stored
+        # next (e.g. the logout flash) gets a fresh id.
+        self.accessed = True
+        self._data    = {}
+        self.modified = True
+        if self.sid is not None:
+            self.discarded_sid, self.sid = self.sid, None
+
+
+    def regenerate(self):
+        """
+        Move the data to a new session id and drop the old one. Called at
+        login, so an id handed out before (e.g. with a failed login's
+        flash) never becomes an authenticated session.
+        """
+        data = dict(self._mapping())
+        self.clear()
+        self._data.update(data)
+
+
+class ServerSideSessionInterface(SessionInterface):
+    """Keeps session data in `store`; the cookie carries only the session id."""
+
+    serializer = TaggedJSONSerializer()
+
+    def __init__(self, store, ttl):
+        self.store = store
+        self.ttl   = ttl
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if not sid or not _SID_RE.match(sid):
+            return ServerSideSession()
+        return ServerSideSession(sid, loader=lambda: self._load(sid))
+
+    def _load(self, sid):
+        raw = self.store.get(sid)
+        if raw is None:
+            return None
+        try:
+            return self.serializer.loads(raw)
+        except ValueError:
+            return None
+
+    def save_session(self, app, session, response):
+        if session.accessed:
+            response.vary.add("Cookie")
+        if not session.modified:
+            return
+
+        name   = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path   = self.get_cookie_path(app)
+        if session.discarded_sid is not None:
+            self.store.delete(session.discarded_sid)
+        if not session:
+            if session.sid is not None:
+                self.store.delete(session.sid)
+            if session.sid is not None or session.discarded_sid is not None:
+                response.delete_cookie(name, domain=domain, path=path,
+                                       secure=self.get_cookie_secure(app),
+                                       samesite=self.get_cookie_samesite(app),
+                                       httponly=self.get_cookie_httponly(app))
+            return
+
+        if session.sid is None:
+            session.sid = secrets.token_urlsafe(32)
+        self.store.set(session.sid, self.serializer.dumps(dict(session)), self.ttl)
+        response.set_cookie(
+            name, session.sid,
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=domain, path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+        )
+
+
+def make_session_store(config, ttl):
+    backend = config["SESSION_BACKEND"]
+    if backend == "memory":
+        return LRUCache(config["SESSION_MAX_ENTRIES"], ttl)
+    if backend == "filesystem":
+        directory = config["SESSION_FILE_DIR"] or os.path.join(tempfile.gettempdir(), "prorooms-sessions")
+        return FileSessionStore(directory, ttl)
+    if backend == "redis":
+        if not config["SESSION_REDIS_URL"]:
+            raise ValueError("❌ SESSION_BACKEND=redis requires SESSION_REDIS_URL.")
+        return RedisCache(config["SESSION_REDIS_URL"], ttl, prefix="prorooms:session:",
+                          setting="SESSION_REDIS_URL")
+    raise ValueError(f"❌ Unknown SESSION_BACKEND {backend!r}; expected one of {', '.join(SESSION_BACKENDS)}.")
+
+
+def init_sessions(app):
+    """Install the configured session backend (Flask's cookie sessions by default)."""
+    app.context_processor(lambda: {"current_user": current_user})
+    if app.config["SESSION_BACKEND"] == "cookie":
+        return None
+    ttl   = app.permanent_session_lifetime.total_seconds()
+    store = make_session_store(app.config, ttl)
+    app.session_interface = ServerSideSessionInterface(store, ttl)
+    return store
+
+
+def regenerate_session():
+    """
+    New session id for the current session, before a login stores the
+    account in it. Cookie sessions carry their data and have no id to fix.
+    """
+    if isinstance(session, ServerSideSession):
+        session.regenerate()
+
+
+# ── Cached user profile ───────────────────────────────────────────────────────
+def user_profile(account_id, email, name, picture=None):
+    """The profile snapshot stored in the session at login."""
+    return {"id": account_id, "email": email, "name": name, "picture": picture}
+
+
+def current_user():
+    """
+    Profile of the logged-in account, or None; loaded once per session.
+    The login handlers store it; sessions from before that are filled in
+    here, which only persists if it happens before the response headers
+    are sent – streamed views must call this before streaming.
+    """
+    account_id = session.get("account_id")
+    if account_id is None:
+        return None
+    profile = session.get("profile")
+    if profile is None or profile["id"] != account_id:
+        account = db.session.get(Account, account_id)
+        profile = account and user_profile(account.id, account.email,
+                                           account.display_name, account.picture)
+        session["profile"] = profile
+    return profile
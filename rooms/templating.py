@@ -0,0 +1,93 @@
+"""
+rooms/templating.py
+───────────────────
+Template compilation and room-card fragments.
+
+    bytecode cache   compiled templates are stored in JINJA_BYTECODE_DIR
+                     (default: Jinja's private per-user temp directory) and
+                     loaded from there by every other worker and restart,
+                     keyed by template name and source checksum – a template
+                     is compiled once per edit, not once per process. With
+                     SERVER_PRELOAD the master compiles them all before
+                     forking (gunicorn.conf.py).
+    room cards       {{ room_card(room) }} renders roomCard.html once per
+                     (room id, updated_at or created_at) and keeps the HTML
+                     in a per-process LRU of FRAGMENT_CACHE_MAX_ENTRIES
+                     cards, so the dashboard loop mostly joins cached
+                     strings. Editing a room changes its key; nothing needs
+                     invalidating.
+"""
+
+import os
+
+from flask import current_app
+from jinja2 import FileSystemBytecodeCache
+from markupsafe import Markup
+
+from rooms.cache import LRUCache
+
+CARD_TEMPLATE = "roomCard.html"
+
+
+def _field(room, name):
+    """`name` of a room row, ORM instance or cached dict alike."""
+    return room[name] if isinstance(room, dict) else getattr(room, name)
+
+
+def _version(room):
+    stamp = _field(room, "updated_at") or _field(room, "created_at")
+    return stamp.isoformat() if hasattr(stamp, "isoformat") else stamp
+
+
+class FragmentCache:
+    """Rendered room cards by (id, version); `max_entries=0` renders every time."""
+
+    def __init__(self, env, template=CARD_TEMPLATE, max_entries=20000):
+        self.env      = env
+        self.template = template
+        # Keys carry the room's version, so entries never go stale – only cold.
+        self.local    = LRUCache(max_entries, ttl=float("inf")) if max_entries else None
+
+    def render(self, room):
+        if self.local is None:
+            return self._render(room)
+        key  = (_field(room, "id"), _version(room))
+        html = self.local.get(key)
+        if html is None:
+            html = self._render(room)
+            self.local.set(key, html)
+        return html
+
+    def _render(self, room):
+        # A card reads only `room`: a shared context skips copying the globals per card.
+        template = self.env.get_template(self.template)
+        return Markup("".join(template.root_render_func(template.new_context({"room": room}, shared=True))))
+
+    def stats(self):
+        return self.local.stats() if self.local is not None else {}
+
+
+def room_card(room):
+    """Template global: the card HTML of `room`, from the fragment cache."""
+    return current_app.extensions["fragments"].render(room)
+
+
+def warm_templates(app):
+    """Compile every template now (from the bytecode cache when it has them)."""
+    env = app.jinja_env
+    for name in env.list_templates(extensions=("html",)):
+        env.get_template(name)
+
+
+def init_templating(app):
+    """Install the bytecode cache and the room_card() fragment cache on `app`."""
+    config = app.config
+    env    = app.jinja_env
+    if config["JINJA_BYTECODE_CACHE"]:
+        directory = config["JINJA_BYTECODE_DIR"] or None
+        if directory:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+        env.bytecode_cache = FileSystemBytecodeCache(directory, "prorooms-%s.cache")
+    max_entries = config["FRAGMENT_CACHE_MAX_ENTRIES"] if config["FRAGMENT_CACHE_ENABLED"] else 0
+    app.extensions["fragments"] = FragmentCache(env, max_entries=max_entries)
+    env.globals["room_card"] = room_card
@@ -0,0 +1,543 @@
+"""
+rooms/views.py
+──────────────
+Pro-Rooms routes, registered on the app by rooms/factory.py.
+
+Routes:
+    GET  /  or  /login   → Login page
+    POST /login           → Authenticate local user
+    GET  /signup          → Registration page
+    POST /signup          → Create new local user
+    GET  /auth/google     → Redirect to Google OAuth
+    GET  /auth/google/callback → Process Google OAuth token
+    GET  /dashboard       → Main chat page (auth required)
+    GET  /logout          → Clear session
+    GET  /healthz         → Liveness / DB readiness probe
+    GET  /metrics         → Prometheus metrics
+    POST /api/admin/rooms/import → Bulk import (NDJSON/CSV, admin token)
+    GET  /api/admin/rooms/export → Bulk export (NDJSON/CSV, admin token)
+
+Views marked @replica_reads may be served by a read replica
+(rooms/db/replicas.py). psycopg2 and Authlib are imported inside the routes that use them, so
+importing this module (and creating an app) doesn't load either.
+"""
+
+import hmac
+import io
+from datetime import datetime
+from urllib.parse import urlencode
+
+from flask import (
+    Blueprint, current_app, flash, jsonify, redirect,
+    render_template, request, session, stream_with_context, url_for
+)
+
+from rooms.Models import db, get_db_connection, Room
+from rooms.analytics import record_join, room_stats
+from rooms.bulk import export_rooms, import_rooms
+from rooms.cache import room_cache
+from rooms.db.pool import pool_stats
+from rooms.db.replicas import replica_reads, replica_set
+from rooms.feed import (
+    announce_room, feed_available, last_event_id, latest_room_id, replay_rooms, room_feed, sse_preamble,
+    stream_events,
+)
+from rooms.identity import (
+    CREATE_LOCAL_ACCOUNT, UPDATE_PASSWORD_HASH, google_sign_in, login_lookup, record_sign_in
+)
+from rooms.metrics import render_prometheus
+from rooms.oauth import google_client
+from rooms.pagination import (
+    ROOM_SORTS, RoomPageStream, paginate_rooms, paginate_search, paginate_trending, parse_fields, rooms_etag
+)
+from rooms.passwords import HasherBusyError, password_hasher
+from rooms.ratelimit import client_ip, rate_limiter, retry_after_header
+from rooms.search import search_backend
+from rooms.serialization import native_datetimes
+from rooms.sessions import current_user, regenerate_session, user_profile
+
+main = Blueprint("main", __name__)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# LOGIN
+# ─────────────────────────────────────────────────────────────────────────────
+@main.route("/")
+@main.route("/login", methods=["GET", "POST"])
+@replica_reads
+def login():
+    """Handle local username/email + password login."""
+    if request.method == "POST":
+        import psycopg2.extras
+
+        identifier = request.form.get("identifier", "").strip()
+        password   = request.form.get("password",   "").strip()
+
+        if not identifier or not password:
+            flash("Please enter your username/email and password ❗", "error")
+            return redirect(url_for(".login"))
+
+        # Throttle guessing before any query or hash is spent on it.
+        retry_after = rate_limiter().check(("login_ip", client_ip()),
+                                           ("login_account", identifier.lower()))
+        if retry_after:
+            flash("Too many login attempts, please wait a moment ⏳", "error")
+            return (render_template("login.html"), 429,
+                    {"Retry-After": retry_after_header(retry_after)})
+
+        conn = cursor = None
+        try:
+            conn   = get_db_connection(read_only=True)
+            cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+
+            # One index lookup: by lower(email) if it contains "@", else lower(username).
+            cursor.execute(*login_lookup(identifier))
+            user = cursor.fetchone()
+
+            if not user:
+                flash("No account found with that username or email 📧", "error")
+                return redirect(url_for(".login"))
+
+            hasher = password_hasher()
+            if hasher.verify(password, user["secret"]):
+                # Transparently upgrade legacy SHA-256 / outdated-cost hashes.
+                if hasher.needs_rehash(user["secret"]):
+                    primary = get_db_connection()    # the lookup may have read a replica
+                    try:
+                        with primary.cursor() as update:
+                            update.execute(UPDATE_PASSWORD_HASH,
+                                           (hasher.hash(password), user["credential_id"]))
+                        primary.commit()
+                    finally:
+                        primary.close()
+
+                record_sign_in(user["id"])     # last_login, written in batches
+
+                regenerate_session()
+                session["account_id"] = user["id"]
+                session["username"]   = user["username"]
+                session["profile"]    = user_profile(user["id"], user["email"], user["display_name"])
+                flash(f"Welcome back, {user['display_name']} 👋", "success")
+                return redirect(url_for(".dashboard"))
+            else:
+                flash("Incorrect password ❌", "error")
+
+        except HasherBusyError:
+            flash("The server is busy, please try again in a moment ⏳", "error")
+        except psycopg2.Error as err:
+            flash(f"Database error: {err}", "error")
+        finally:
+            if cursor: cursor.close()
+            if conn:   conn.close()
+
+    return render_template("login.html")
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# SIGNUP
+# ─────────────────────────────────────────────────────────────────────────────
+@main.route("/signup", methods=["GET", "POST"])
+def signup():
+    """Handle new user registration."""
+    if request.method == "POST":
+        import psycopg2
+
+        username   = request.form.get("username",        "").strip()
+        email      = request.form.get("email",           "").strip()
+        password   = request.form.get("password",        "").strip()
+        c_password = request.form.get("ConfirmPassword", "").strip()
+
+        if not username or not email or not password:
+            flash("All fields are required ❗", "error")
+            return redirect(url_for(".signup"))
+
+        if password != c_password:
+            flash("Passwords do not match ⚠️", "error")
+            return redirect(url_for(".signup", username=username, email=email))
+
+        # Login treats identifiers containing "@" as emails.
+        if "@" in username:
+            flash("Usernames cannot contain '@' ⚠️", "error")
+            return redirect(url_for(".signup", email=email))
+
+        conn = cursor = None
+        try:
+            conn   = get_db_connection()
+            cursor = conn.cursor()
+
+            hashed = password_hasher().hash(password)
+
+            # Account + password credential in one statement.
+            cursor.execute(CREATE_LOCAL_ACCOUNT, {
+                "username": username, "email": email,
+                "secret": hashed, "now": datetime.utcnow(),
+            })
+            conn.commit()
+
+            flash("Account created successfully ✅ Please log in.", "success")
+            return redirect(url_for(".login"))
+
+        except psycopg2.errors.UniqueViolation:
+            conn.rollback()
+            flash("An account with that username or email already exists 📧", "error")
+            return redirect(url_for(".signup", username=username))
+        except HasherBusyError:
+            flash("The server is busy, please try again in a moment ⏳", "error")
+        except psycopg2.Error as err:
+            if conn: conn.rollback()
+            flash(f"Database error: {err}", "error")
+        finally:
+            if cursor: cursor.close()
+            if conn:   conn.close()
+
+    username = request.args.get("username", "")
+    email    = request.args.get("email",    "")
+    return render_template("signup.html", username=username, email=email)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# GOOGLE OAUTH
+# ─────────────────────────────────────────────────────────────────────────────
+@main.route("/auth/google")
+def google_login():
+    """Redirect user to Google's OAuth consent screen."""
+    redirect_uri = url_for(".google_callback", _external=True)
+    return google_client().authorize_redirect(redirect_uri)
+
+
+@main.route("/auth/google/callback")
+def google_callback():
+    """Process the token returned by Google and create/update the user record."""
+    from authlib.integrations.base_client.errors import OAuthError
+    try:
+        token     = google_client().authorize_access_token()
+        user_info = token.get("userinfo")
+
+        if not user_info:
+            flash("Failed to fetch user info from Google 😞", "error")
+            return redirect(url_for(".login"))
+
+        # Find by Google subject, link by verified email, or create.
+        account = google_sign_in(user_info)
+
+        regenerate_session()
+        session["account_id"]  = account["id"]
+        session["user_email"]  = account["email"]
+        session["is_new_user"] = account["inserted"]
+        session["profile"]     = user_profile(account["id"], account["email"], account["name"],
+                                              user_info.get("picture"))
+        if account["inserted"]:
+            flash(f"Welcome to Pro Rooms, {account['name']}! 🎉", "success")
+        else:
+            flash(f"Welcome back, {account['name']}! 👋", "success")
+
+        return redirect(url_for(".dashboard"))
+
+    except OAuthError as e:
+        flash(f"OAuth error: {str(e)}", "error")
+        return redirect(url_for(".login"))
+    except Exception as e:
+        print(f"[google_callback] Unexpected error: {e}")
+        flash(f"Authentication failed: {str(e)}", "error")
+        return redirect(url_for(".login"))
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# DASHBOARD
+# ─────────────────────────────────────────────────────────────────────────────
+@main.route("/dashboard")
+@replica_reads
+def dashboard():
+    """Main dashboard page."""
+    if "account_id" not in session:
+        flash("Please log in first ❗", "error")
+        return redirect(url_for(".login"))
+    # Resolve the profile now: once the stream starts, the session is already sent.
+    if current_user() is None:
+        session.clear()
+        flash("Please log in first ❗", "error")
+        return redirect(url_for(".login"))
+
+    # Only the first slice is rendered here; the page fetches the rest lazily.
+    config = current_app.config
+    rooms  = RoomPageStream(
+        config["DASHBOARD_INITIAL_ROOMS"], config["DASHBOARD_STREAM_CHUNK"], room_cache()
+    )
+    context = {
+        "rooms": rooms, "page_size": config["ROOMS_PAGE_SIZE"],
+        "live_feed": feed_available(), "feed_poll_ms": int(config["FEED_POLL_INTERVAL"] * 1000),
+        "feed_retry_ms": config["FEED_RETRY_MS"],
+    }
+    if not config["DASHBOARD_STREAM"]:
+        return render_template("index.html", **context)
+
+    # Stream: the shell goes out immediately, then room cards in chunks.
+    current_app.update_template_context(context)
+    stream = current_app.jinja_env.get_template("index.html").stream(context)
+    stream.enable_buffering(config["DASHBOARD_STREAM_CHUNK"])
+    return current_app.response_class(stream_with_context(stream), mimetype="text/html")
+
+
+# ── Room API ──────────────────────────────────────────────────────────────────
+
+@main.route("/api/rooms", methods=["GET"])
+@replica_reads
+def get_rooms():
+    """
+    Fetch one page of rooms, newest first, with search and field projection.
+
+    Query parameters:
+        search  – ranked, prefix-matching full-text search on name/description
+        limit   – page size (capped at ROOMS_MAX_PAGE_SIZE)
+        cursor  – value of the previous page's X-Next-Cursor header
+        fields  – comma-separated subset of room fields to return
+        sort    – newest (default) or trending (joins, see rooms/analytics.py)
+    """
+    if "account_id" not in session:
+        return jsonify({"error": "Unauthorized"}), 401
+
+    sort = request.args.get("sort", "newest")
+    if sort not in ROOM_SORTS:
+        return jsonify({"error": f"Unknown sort '{sort}' (choose from {', '.join(ROOM_SORTS)})"}), 400
+    # The ranking's version keys the cache and ETag: a refreshed ranking is a new listing.
+    ranking = room_stats().ranking() if sort == "trending" else None
+    version = f":{ranking.version}" if ranking else ""
+
+    # A cached page carries its ETag, so a hit (304 or not) skips the DB.
+    cache     = room_cache()
+    cache_key = cache.listing_key("api:" + urlencode(sorted(request.args.items(multi=True))) + version)
+    cached    = cache.get(cache_key)
+    if cached:
+        etag = cached[0]
+    else:
+        with cache.filling():
+            etag = rooms_etag(request.query_string + version.encode(), cache.shared_generation())
+    if request.if_none_match.contains_weak(etag):
+        response = current_app.response_class(status=304)
+        response.set_etag(etag, weak=True)
+        return response
+
+    if cached:
+        _, rows, next_cursor = cached
+    else:
+        search_query = request.args.get("search", "").strip()
+        config = current_app.config
+        limit  = request.args.get("limit", config["ROOMS_PAGE_SIZE"], type=int)
+        limit  = max(1, min(limit, config["ROOMS_MAX_PAGE_SIZE"]))
+        cursor = request.args.get("cursor")
+        try:
+            fields = parse_fields(request.args.get("fields"))
+            native = native_datetimes(current_app)
+            if ranking and search_query:
+                raise ValueError("sort=trending can't be combined with search")
+            with cache.filling():
+                if ranking:
+                    rows, next_cursor = paginate_trending(ranking, limit, cursor, fields, native)
+                elif search_query:
+                    rows, next_cursor = paginate_search(
+                        search_backend(), search_query, limit, cursor, fields, native
+                    )
+                else:
+                    rows, next_cursor = paginate_rooms(limit, cursor, fields, native)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        cache.set_listing(cache_key, (etag, rows, next_cursor))
+
+    response = jsonify(rows)
+    response.set_etag(etag, weak=True)
+    if next_cursor:
+        args = request.args.to_dict()
+        args["cursor"] = next_cursor
+        response.headers["X-Next-Cursor"] = next_cursor
+        response.headers["Link"] = f'<{url_for(".get_rooms", **args)}>; rel="next"'
+    return response
+
+
+@main.route("/api/rooms", methods=["POST"])
+def create_room():
+    """Create a new room."""
+    if "account_id" not in session:
+        return jsonify({"error": "Unauthorized"}), 401
+    
+    data = request.get_json()
+    if not data:
+        return jsonify({"error": "Invalid data"}), 400
+    
+    name = data.get("name", "").strip()
+    description = data.get("description", "").strip()
+    whatsapp_link = data.get("whatsapp_link", "").strip()
+    password = data.get("password", "").strip()
+    
+    if not all([name, whatsapp_link, password]):
+        return jsonify({"error": "Missing required fields"}), 400
+    
+    if len(password) != 6 or not password.isdigit():
+        return jsonify({"error": "Password must be a 6-digit number"}), 400
+
+    try:
+        new_room = Room(
+            name=name,
+            description=description,
+            whatsapp_link=whatsapp_link,
+            password=password,
+            creator_id=session["account_id"],
+        )
+        db.session.add(new_room)
+        db.session.flush()
+        if current_app.config["FEED_ENABLED"]:
+            announce_room(new_room)      # NOTIFY, delivered on commit
+        db.session.commit()
+        return jsonify({"success": True, "room": new_room.to_dict()})
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 500
+
+
+@main.route("/api/rooms/stream")
+def room_stream():
+    """
+    Server-Sent Events feed of newly created rooms (see rooms/feed.py).
+    Resumes after the Last-Event-ID header (or ?last_event_id=).
+    """
+    if "account_id" not in session:
+        return jsonify({"error": "Unauthorized"}), 401
+    config = current_app.config
+    if not config["FEED_ENABLED"]:
+        return jsonify({"error": "Room feed is disabled"}), 404
+    if not config["FEED_WSGI"]:
+        return jsonify({"error": "Room feed is only served under ASGI (or with FEED_WSGI)"}), 404
+
+    hub = room_feed()
+    seq = hub.subscribe(db.engine)
+    if seq is None:
+        return (jsonify({"error": "Too many feed subscribers"}), 503,
+                {"Retry-After": retry_after_header(config["FEED_RETRY_MS"] / 1000)})
+    try:
+        # Subscribed first, then read the backlog: a room committed in
+        # between is in both, and the stream skips the duplicate.
+        last_id  = last_event_id(request.headers, request.args)
+        backlog  = replay_rooms(last_id, config["FEED_REPLAY_LIMIT"]) if last_id is not None else []
+        preamble = sse_preamble(config["FEED_RETRY_MS"], None if last_id is not None else latest_room_id())
+    except Exception:
+        hub.unsubscribe()
+        raise
+    finally:
+        db.session.remove()   # don't hold a pooled connection for the life of the stream
+
+    return current_app.response_class(
+        stream_events(hub, seq, backlog, preamble, config["FEED_HEARTBEAT"]),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@main.route("/api/rooms/join", methods=["POST"])
+@replica_reads
+def join_room():
+    """Verify password and return WhatsApp link."""
+    if "account_id" not in session:
+        return jsonify({"error": "Unauthorized"}), 401
+    
+    data = request.get_json()
+    room_id = data.get("room_id")
+    password = data.get("password", "").strip()
+
+    retry_after = rate_limiter().check(("join_user", session["account_id"]),
+                                       ("join_ip", client_ip()),
+                                       ("join_room", room_id))
+    if retry_after:
+        return (jsonify({"error": "Too many attempts, try again later"}), 429,
+                {"Retry-After": retry_after_header(retry_after)})
+
+    room = room_cache().room(room_id)
+    if not room:
+        return jsonify({"error": "Room not found"}), 404
+
+    ok = room["password"] == password
+    record_join(room["id"], ok)          # in memory; flushed to room_stats in batches
+    if ok:
+        return jsonify({"success": True, "link": room["whatsapp_link"]})
+    else:
+        return jsonify({"error": "Incorrect password"}), 403
+
+
+# ── Admin bulk API ────────────────────────────────────────────────────────────
+
+def bearer_authorized(token):
+    """True if the request carries `token` as its bearer token."""
+    supplied = request.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+    return bool(token) and hmac.compare_digest(supplied.encode(), token.encode())
+
+
+def admin_authorized():
+    """True if the request carries the configured ADMIN_API_TOKEN."""
+    return bearer_authorized(current_app.config["ADMIN_API_TOKEN"])
+
+
+@main.route("/api/admin/rooms/import", methods=["POST"])
+def admin_import_rooms():
+    """Stream an NDJSON (default) or CSV request body into the rooms table."""
+    if not admin_authorized():
+        return jsonify({"error": "Unauthorized"}), 401
+
+    fmt = request.args.get("format", "ndjson")
+    defaults = {k: request.args[k] for k in ("creator_id",) if k in request.args}
+    stream = io.TextIOWrapper(request.stream, encoding="utf-8", newline="")
+    try:
+        summary = import_rooms(stream, fmt, defaults)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(summary)
+
+
+@main.route("/api/admin/rooms/export", methods=["GET"])
+def admin_export_rooms():
+    """Stream every room out as NDJSON (default) or CSV."""
+    if not admin_authorized():
+        return jsonify({"error": "Unauthorized"}), 401
+
+    fmt = request.args.get("format", "ndjson")
+    try:
+        chunks = export_rooms(fmt)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    mimetype = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    return current_app.response_class(stream_with_context(chunks), mimetype=mimetype)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# LOGOUT
+# ─────────────────────────────────────────────────────────────────────────────
+@main.route("/logout")
+def logout():
+    session.clear()
+    flash("Logged out successfully 👋", "success")
+    return redirect(url_for(".login"))
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# HEALTH CHECK
+# ─────────────────────────────────────────────────────────────────────────────
+@main.route("/healthz")
+def healthz():
+    """Report worker liveness, database reachability and pool gauges."""
+    try:
+        db.session.execute(db.text("SELECT 1"))
+    except Exception as e:
+        return jsonify({"status": "error", "database": str(e)}), 503
+    body = {"status": "ok", "database": "ok", "pool": pool_stats(db.engine)}
+    if replica_set() is not None:
+        body["replicas"] = replica_set().stats()["replicas"]
+    return jsonify(body)
+
+
+@main.route("/metrics")
+def metrics():
+    """Prometheus exposition of this worker's request, SQL, pool and cache metrics."""
+    config = current_app.config
+    if not config["METRICS_ENABLED"]:
+        return jsonify({"error": "Not found"}), 404
+    if config["METRICS_TOKEN"] and not bearer_authorized(config["METRICS_TOKEN"]):
+        return jsonify({"error": "Unauthorized"}), 401
+    return current_app.response_class(render_prometheus(current_app, db.engine),
+                                      mimetype="text/plain; version=0.0.4")
@@ -0,0 +1,124 @@
+"""
+tests/conftest.py
+─────────────────
+Shared fixtures.
+
+The database tests need a PostgreSQL server. They run against
+TEST_DATABASE_URL (default: the DATABASE_URL server, database
+"<name>_test"), which is created and migrated on first use, and are
+skipped when no server is reachable.
+
+    python -m pytest -q
+"""
+
+import os
+import sys
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rooms.Config import Config            # noqa: E402
+from rooms.db.migrate import upgrade       # noqa: E402
+from rooms.factory import create_app       # noqa: E402
+from rooms.Models import db                # noqa: E402
+
+
+def database_url_for(suffix=""):
+    """TEST_DATABASE_URL (or DATABASE_URL's server, database "<name>_test"), its name + `suffix`."""
+    url = os.getenv("TEST_DATABASE_URL")
+    if url:
+        base = make_url(url)
+        name = base.database
+    else:
+        base = make_url(Config.SQLALCHEMY_DATABASE_URI)
+        name = f"{base.database}_test"
+    return base.set(database=name + suffix).render_as_string(hide_password=False)
+
+
+def create_database(url):
+    """Create the database of `url` unless it exists; False when the server is unreachable."""
+    url   = make_url(url)
+    admin = create_engine(url.set(database="postgres"), isolation_level="AUTOCOMMIT")
+    try:
+        with admin.connect() as conn:
+            exists = conn.execute(text("SELECT 1 FROM pg_database WHERE datname = :name"),
+                                  {"name": url.database}).scalar()
+            if not exists:
+                conn.execute(text(f'CREATE DATABASE "{url.database}"'))
+    except OperationalError:
+        return False
+    finally:
+        admin.dispose()
+    return True
+
+
+def make_config(**settings):
+    """A Config subclass for tests, with `settings` overridden."""
+    class TestConfig(Config):
+        TESTING              = True
+        SECRET_KEY           = "test"
+        GOOGLE_CLIENT_ID     = "test-client"
+        GOOGLE_CLIENT_SECRET = "test-secret"
+    for key, value in settings.items():
+        setattr(TestConfig, key, value)
+    return TestConfig
+
+
+def make_app(database_url, **settings):
+    """A migrated app on `database_url`."""
+    app = create_app(make_config(SQLALCHEMY_DATABASE_URI=database_url, **settings))
+    with app.app_context():
+        upgrade(db.engine)
+    return app
+
+
+@pytest.fixture(scope="session")
+def bare_app():
+    """An app for tests that never touch the database (nothing connects until a query)."""
+    return create_app(make_config())
+
+
+@pytest.fixture
+def sqlite_app(tmp_path):
+    """An app on a fresh SQLite database (the development setup)."""
+    return make_app(f"sqlite:///{tmp_path / 'rooms.db'}", SEARCH_BACKEND="memory")
+
+
+@pytest.fixture(scope="session")
+def database_url():
+    url = database_url_for()
+    if not url.startswith("postgresql"):
+        pytest.skip("the database tests need PostgreSQL (TEST_DATABASE_URL)")
+    if not create_database(url):
+        pytest.skip(f"PostgreSQL is not reachable at {make_url(url).render_as_string()}")
+    return url
+
+
+@pytest.fixture(scope="session")
+def app(database_url):
+    return make_app(database_url)
+
+
+@pytest.fixture(scope="session")
+def replica_database_url(database_url):
+    """A second database standing in for a read replica: same schema, its own rows."""
+    url = database_url_for("_replica")
+    create_database(url)
+    make_app(url)
+    return url
+
+
+@pytest.fixture
+def app_factory(database_url):
+    """make_app() on the test database, with `settings` overridden."""
+    return lambda **settings: make_app(database_url, **settings)
+
+
+@pytest.fixture
+def app_context(app):
+    with app.app_context():
+        yield app
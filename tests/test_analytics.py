@@ -0,0 +1,72 @@
+"""
+tests/test_analytics.py
+───────────────────────
+Join counters flush and rank the same on PostgreSQL and on SQLite, and
+GET /api/rooms?sort=trending works on both.
+"""
+
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from rooms.analytics import hour_bucket, room_stats
+from rooms.Models import db, Room, RoomStat
+
+
+@pytest.fixture(params=["sqlite", "postgresql"])
+def stats_app(request):
+    app = request.getfixturevalue("sqlite_app" if request.param == "sqlite" else "app")
+    with app.app_context():
+        rooms = [Room(name=f"test-{uuid.uuid4().hex[:12]}", whatsapp_link="https://chat.whatsapp.com/x",
+                      password="123456") for _ in range(3)]
+        db.session.add_all(rooms)
+        db.session.commit()
+        ids = [room.id for room in rooms]
+    yield app, ids
+    with app.app_context():
+        db.session.execute(db.delete(RoomStat).where(RoomStat.room_id.in_(ids)))
+        db.session.execute(db.delete(Room).where(Room.id.in_(ids)))
+        db.session.commit()
+
+
+def counts(ids):
+    rows = db.session.execute(db.select(RoomStat.room_id, RoomStat.joins, RoomStat.failed_joins)
+                              .where(RoomStat.room_id.in_(ids)).order_by(RoomStat.room_id))
+    return [tuple(row) for row in rows]
+
+
+def test_flush_upserts_hourly_counts(stats_app):
+    app, (a, b, _) = stats_app
+    with app.app_context():
+        stats = room_stats()
+        for room_id, ok in ((a, True), (a, True), (b, True), (b, False), (10 ** 9, True)):
+            stats.record(room_id, ok)
+        stats.flush()
+        stats.record(b, True)
+        stats.flush()
+        assert counts([a, b]) == [(a, 2, 0), (b, 2, 1)]     # the deleted/unknown room is skipped
+
+
+def test_trending_weighs_recent_joins(stats_app):
+    app, (a, b, c) = stats_app
+    now = datetime.utcnow()
+    with app.app_context():
+        db.session.add_all([
+            RoomStat(room_id=a, bucket=hour_bucket(now), joins=3, failed_joins=0),
+            RoomStat(room_id=b, bucket=hour_bucket(now), joins=2, failed_joins=0),
+            # 10 joins 20 hours ago weigh about one recent join (6 h half-life)
+            RoomStat(room_id=c, bucket=hour_bucket(now - timedelta(hours=20)), joins=10, failed_joins=0),
+        ])
+        db.session.commit()
+        stats = room_stats()
+        stats.rank()
+        ranked = [i for i in stats.ranking().ids if i in (a, b, c)]
+    assert ranked == [a, b, c]
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["account_id"] = 1
+    response = client.get("/api/rooms?sort=trending&limit=100&fields=id")
+    assert response.status_code == 200
+    assert [r["id"] for r in response.get_json() if r["id"] in (a, b, c)] == [a, b, c]
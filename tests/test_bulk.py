@@ -0,0 +1,57 @@
+"""
+tests/test_bulk.py
+──────────────────
+The PostgreSQL CSV export (COPY ... TO STDOUT) shuts its COPY thread
+down when the client goes away mid-stream.
+"""
+
+import threading
+import time
+import uuid
+
+import pytest
+from sqlalchemy import text
+
+from rooms import bulk
+from rooms.Models import db, Room
+
+
+@pytest.fixture
+def many_rooms(app_context):
+    prefix = f"test-{uuid.uuid4().hex[:8]}"
+    db.session.add_all(Room(name=f"{prefix}-{i}", whatsapp_link="https://chat.whatsapp.com/x",
+                            password="123456") for i in range(300))
+    db.session.commit()
+    yield
+    db.session.execute(db.delete(Room).where(Room.name.like(f"{prefix}-%")))
+    db.session.commit()
+
+
+def copy_threads():
+    return [t for t in threading.enumerate() if t.name.startswith("export-copy")]
+
+
+def running_copies():
+    return db.session.execute(text(
+        "SELECT count(*) FROM pg_stat_activity "
+        "WHERE query LIKE 'COPY (SELECT%' AND pid <> pg_backend_pid()"
+    )).scalar()
+
+
+def test_copy_export_streams_every_room(many_rooms):
+    body  = "".join(bulk._export_copy_csv(chunk_size=1))
+    lines = body.splitlines()
+    assert lines[0] == ",".join(bulk.EXPORT_COLUMNS)
+    assert len(lines) - 1 == db.session.scalar(db.select(db.func.count(Room.id)))
+    assert not copy_threads()
+
+
+def test_abandoned_copy_export_releases_thread_and_connection(many_rooms):
+    chunks = bulk._export_copy_csv(chunk_size=1)     # one row per chunk: the queue fills up
+    next(chunks)
+    time.sleep(0.5)                                  # let the COPY thread block on the full queue
+    chunks.close()                                   # the client disconnected
+
+    assert not copy_threads()
+    db.session.rollback()
+    assert running_copies() == 0
@@ -0,0 +1,69 @@
+"""
+tests/test_cache.py
+───────────────────
+The shared tier stores JSON, never pickles, and a commit invalidates the
+cache of the app it was made in.
+"""
+
+import pickle
+from datetime import datetime
+
+from rooms.cache import RedisCache, room_cache
+from rooms.Models import db, Room
+
+from conftest import make_app
+
+
+class FakeRedis:
+    """The few commands RedisCache uses, on a dict."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, px=None):
+        self.data[key] = value.encode() if isinstance(value, str) else value
+
+
+def shared_tier():
+    cache = RedisCache("redis://localhost:6379/0", ttl=60)     # from_url doesn't connect
+    cache._client = FakeRedis()
+    return cache
+
+
+def test_shared_tier_round_trips_listings_as_json():
+    cache   = shared_tier()
+    edited  = datetime(2026, 10, 17, 9, 30, 15, 123456)
+    listing = ("etag", [{"id": 1, "name": "Python", "created_at": "2026-10-01T08:00:00",
+                         "updated_at": edited}], "cursor")
+    cache.set("rooms:g1:api", listing)
+
+    raw = cache._client.data["prorooms:rooms:g1:api"]
+    assert raw.startswith(b"[")                                 # JSON, not a pickle
+    etag, rows, cursor = cache.get("rooms:g1:api")
+    assert (etag, cursor) == ("etag", "cursor")
+    assert rows[0]["updated_at"] == edited and rows[0]["created_at"] == "2026-10-01T08:00:00"
+
+
+def test_shared_tier_never_unpickles():
+    cache = shared_tier()
+    cache._client.data["prorooms:room:1"] = pickle.dumps({"id": 1})
+    assert cache.get("room:1") is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_commit_invalidates_its_own_apps_cache(sqlite_app, tmp_path):
+    other = make_app(f"sqlite:///{tmp_path / 'other.db'}", CACHE_ENABLED=True)
+    with other.app_context():
+        other_key = room_cache().listing_key("api")
+
+    with sqlite_app.app_context():
+        key = room_cache().listing_key("api")
+        db.session.add(Room(name="Cached", whatsapp_link="https://chat.whatsapp.com/x", password="123456"))
+        db.session.commit()
+        assert room_cache().listing_key("api") != key
+
+    with other.app_context():
+        assert room_cache().listing_key("api") == other_key
@@ -0,0 +1,98 @@
+"""
+tests/test_identity.py
+──────────────────────
+The sign-in lookups reach accounts and credentials through their unique
+indexes. Sequential scans are disabled while planning, so a predicate no
+index can serve still plans as a Seq Scan; and the tables are seeded and
+analyzed first, since on statistics of near-empty tables the planner
+may as well walk credentials and fetch accounts by primary key.
+"""
+
+from datetime import datetime
+
+import pytest
+
+from rooms.identity import GOOGLE_SIGN_IN, _index_scans, check_login_plans, google_sign_in_params, login_lookup
+from rooms.Models import db
+
+
+SEED_ROWS = 2000
+
+
+@pytest.fixture(scope="module", autouse=True)
+def seeded(app):
+    """Accounts with password credentials, analyzed: statistics like a live database."""
+    with app.app_context():
+        db.session.execute(db.text("""
+            WITH account AS (
+                INSERT INTO accounts (username, email, display_name, created_at)
+                SELECT 'plan-' || i, 'plan-' || i || '@example.com', 'plan-' || i, now()
+                  FROM generate_series(1, :rows) AS i
+                RETURNING id
+            )
+            INSERT INTO credentials (account_id, provider, secret, created_at)
+            SELECT id, 'password', 'x', now() FROM account
+        """), {"rows": SEED_ROWS})
+        db.session.commit()
+        db.session.execute(db.text("ANALYZE accounts, credentials"))
+        db.session.commit()
+    yield
+    with app.app_context():
+        db.session.execute(db.text("DELETE FROM accounts WHERE username LIKE 'plan-%'"))
+        db.session.commit()
+
+
+def explain(sql, params):
+    """Every (node type, relation, index) of the plan of `sql`, seq scans disabled."""
+    db.session.execute(db.text("SET LOCAL enable_seqscan = off"))
+    plan = db.session.execute(db.text("EXPLAIN (FORMAT JSON) " + sql), params).scalar()
+    db.session.rollback()
+    return list(_index_scans(plan[0]["Plan"]))
+
+
+def psycopg2_plan(identifier):
+    """The plan of login_lookup(identifier), run the way login() runs it."""
+    conn = db.engine.raw_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            sql, params = login_lookup(identifier)
+            cursor.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+            plan = cursor.fetchone()[0]
+        conn.rollback()
+    finally:
+        conn.close()
+    return list(_index_scans(plan[0]["Plan"]))
+
+
+def indexes_on(nodes, relation):
+    return {index for _, rel, index in nodes if rel == relation and index}
+
+
+@pytest.mark.parametrize("identifier, index", [
+    ("Someone",             "ux_accounts_username_lower"),
+    ("Someone@Example.com", "ux_accounts_email_lower"),
+])
+def test_login_lookup_uses_lower_index(app_context, identifier, index):
+    nodes = psycopg2_plan(identifier)
+    assert index in indexes_on(nodes, "accounts"), nodes
+    assert ("Seq Scan", "accounts", None) not in nodes
+
+
+def test_login_lookup_reaches_password_credential_by_index(app_context):
+    nodes = psycopg2_plan("someone")
+    assert indexes_on(nodes, "credentials") == {"ux_credentials_account_provider"}, nodes
+
+
+def test_google_sign_in_finds_credential_by_subject(app_context):
+    params = google_sign_in_params({"sub": "1234567890", "email": "someone@example.com",
+                                    "email_verified": True, "name": "Someone"}, datetime.utcnow())
+    nodes = explain(GOOGLE_SIGN_IN, params)
+    assert "ux_credentials_provider_subject" in indexes_on(nodes, "credentials"), nodes
+    assert "ux_accounts_email_lower" in indexes_on(nodes, "accounts"), nodes
+
+
+def test_check_login_plans_reports_both_lookups(app_context):
+    results = check_login_plans()
+    assert set(results) == {"username", "email"}
+    assert all(uses_index for uses_index, _ in results.values()), results
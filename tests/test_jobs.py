@@ -0,0 +1,64 @@
+"""
+tests/test_jobs.py
+──────────────────
+Coalescing jobs keep the newest payload per key, also when an older
+payload's failed batch is retried after a newer one was enqueued.
+"""
+
+import threading
+
+from rooms.jobs import JOBS, PostgresQueue, ThreadQueue, job
+
+KIND = "tests.coalesced"
+_handler = None
+
+
+@job(KIND, coalesce=True, durable=False)
+def coalesced(payloads):
+    _handler(payloads)
+
+
+def test_thread_queue_retry_keeps_newer_pending_payload(bare_app):
+    global _handler
+    queue = ThreadQueue(bare_app, retry_backoff=0.05, coalesce_delay=0.01)
+    calls, done = [], threading.Event()
+
+    def handler(payloads):
+        calls.append([p["v"] for p in payloads])
+        if len(calls) == 1:
+            queue.enqueue(KIND, {"v": 2}, key=7)     # arrives while v1 is running
+            raise RuntimeError("first attempt fails")
+        done.set()
+
+    _handler = handler
+    queue.enqueue(KIND, {"v": 1}, key=7)
+    assert done.wait(5)
+    assert calls == [[1], [2]]
+    assert queue.counters.snapshot() == {(KIND, "retried"): 1, (KIND, "succeeded"): 1}
+
+
+def test_thread_queue_retry_requeues_when_nothing_newer(bare_app):
+    global _handler
+    queue = ThreadQueue(bare_app, retry_backoff=0.05, coalesce_delay=0.01)
+    calls, done = [], threading.Event()
+
+    def handler(payloads):
+        calls.append([p["v"] for p in payloads])
+        if len(calls) == 1:
+            raise RuntimeError("first attempt fails")
+        done.set()
+
+    _handler = handler
+    queue.enqueue(KIND, {"v": 1}, key=7)
+    assert done.wait(5)
+    assert calls == [[1], [1]]
+
+
+def test_postgres_batches_pick_newest_row_per_key():
+    queue = PostgresQueue(app=None)
+    # Claimed in (run_at, id) order: the retried row 3 is due after row 5.
+    rows = [(5, KIND, {"v": 2}, "7", 0), (3, KIND, {"v": 1}, "7", 1), (4, KIND, {"v": 9}, "8", 0)]
+    [(kind, batch, payloads)] = list(queue._batches(rows))
+    assert kind == KIND and batch == rows
+    assert payloads == [{"v": 9}, {"v": 2}]
+    assert JOBS[KIND].coalesce
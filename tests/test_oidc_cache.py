@@ -0,0 +1,103 @@
+"""
+tests/test_oidc_cache.py
+────────────────────────
+The OpenID metadata cache against a fake provider: the refresher renews
+the file ahead of expiry, and a failed fetch keeps the stale copy serving.
+"""
+
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+import requests
+
+from rooms import oidc_cache
+from rooms.oidc_cache import OIDCMetadataCache
+
+DISCOVERY_URL = "https://accounts.example.com/.well-known/openid-configuration"
+JWKS_URL      = "https://accounts.example.com/jwks"
+TTL           = 100.0
+
+
+class FakeProvider:
+    def __init__(self):
+        self.version = 0
+        self.fetches = 0
+        self.down    = False
+
+    def get(self, url, timeout=None):
+        if self.down:
+            raise requests.ConnectionError("provider unreachable")
+        if url == DISCOVERY_URL:
+            self.fetches += 1
+            self.version += 1
+            body = {"issuer": "https://accounts.example.com", "jwks_uri": JWKS_URL, "version": self.version}
+        else:
+            body = {"keys": [{"kid": f"key-{self.version}"}]}
+        return SimpleNamespace(json=lambda: dict(body), raise_for_status=lambda: None)
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    provider = FakeProvider()
+    monkeypatch.setattr(oidc_cache.requests, "get", provider.get)
+    return provider
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return OIDCMetadataCache(DISCOVERY_URL, path=str(tmp_path / "oidc.json"), ttl=TTL)
+
+
+def age_file(cache, seconds):
+    with open(cache.path) as f:
+        metadata = json.load(f)
+    metadata["_loaded_at"] = time.time() - seconds
+    with open(cache.path, "w") as f:
+        json.dump(metadata, f)
+
+
+def attached_client(cache):
+    client = SimpleNamespace(server_metadata={})
+    cache._clients.append(client)
+    return client
+
+
+def test_refresher_renews_metadata_before_it_expires(cache, provider):
+    assert cache.get()["version"] == 1
+    client = attached_client(cache)
+
+    age_file(cache, TTL * 0.95)                     # due for the refresher, still fresh for get()
+    assert cache.get()["version"] == 1 and provider.fetches == 1
+
+    cache._push(max_age=TTL * 0.9)                  # what _refresh_loop runs on waking
+    assert provider.fetches == 2
+    assert client.server_metadata["version"] == 2
+    assert client.server_metadata["jwks"] == {"keys": [{"kid": "key-2"}]}
+    assert cache.get()["version"] == 2              # written through for the other workers
+
+    cache._push(max_age=TTL * 0.9)                  # just renewed: nothing to fetch
+    assert provider.fetches == 2
+
+
+def test_failed_refresh_serves_stale_metadata(cache, provider):
+    cache.get()
+    client = attached_client(cache)
+    provider.down = True
+
+    age_file(cache, TTL * 0.95)
+    cache._push(max_age=TTL * 0.9)
+    assert client.server_metadata["version"] == 1
+
+    age_file(cache, TTL * 2)                        # expired, and the provider is still down
+    assert cache.get()["version"] == 1
+
+    provider.down = False
+    assert cache.get()["version"] == 2
+
+
+def test_first_load_failure_raises_without_a_stale_copy(cache, provider):
+    provider.down = True
+    with pytest.raises(requests.ConnectionError):
+        cache.get()
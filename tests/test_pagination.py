@@ -0,0 +1,51 @@
+"""
+tests/test_pagination.py
+────────────────────────
+The room listing ETag is read off indexes (no scan per poll) and moves
+when a room is added or edited.
+"""
+
+import uuid
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from rooms.identity import _index_scans
+from rooms.Models import db, Room
+from rooms.pagination import rooms_etag
+
+
+@pytest.fixture
+def room(app_context):
+    room = Room(name=f"test-{uuid.uuid4().hex[:12]}", whatsapp_link="https://chat.whatsapp.com/x",
+                password="123456")
+    db.session.add(room)
+    db.session.commit()
+    yield room
+    db.session.delete(room)
+    db.session.commit()
+
+
+def test_etag_query_reads_indexes_only(app_context):
+    query = db.session.query(db.func.max(Room.id), db.func.max(Room.created_at), db.func.max(Room.updated_at))
+    sql   = str(query.statement.compile(dialect=postgresql.dialect()))
+    db.session.execute(db.text("SET LOCAL enable_seqscan = off"))
+    plan  = db.session.execute(db.text("EXPLAIN (FORMAT JSON) " + sql)).scalar()
+    db.session.rollback()
+    nodes = list(_index_scans(plan[0]["Plan"]))
+    assert not [n for n in nodes if n[0] == "Seq Scan"], nodes
+    assert {index for _, rel, index in nodes if rel == "rooms"} >= {"rooms_pkey", "ix_rooms_updated_at"}
+
+
+def test_etag_changes_when_a_room_is_edited(room):
+    before = rooms_etag(b"limit=20")
+    assert rooms_etag(b"limit=20") == before
+    assert rooms_etag(b"limit=10") != before
+
+    room.description = "edited"
+    db.session.commit()
+    assert rooms_etag(b"limit=20") != before
+
+
+def test_etag_carries_the_shared_generation(app_context):
+    assert rooms_etag(b"", generation=3) != rooms_etag(b"", generation=4)
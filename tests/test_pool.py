@@ -0,0 +1,61 @@
+"""
+tests/test_pool.py
+──────────────────
+Pool checkout metrics: only waiting for an idle connection counts as
+wait time, and timed-out checkouts are counted apart from successful ones.
+"""
+
+import threading
+import time
+
+import pytest
+from sqlalchemy import exc
+
+from rooms.db.pool import InstrumentedQueuePool
+
+
+class FakeConnection:
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def slow_creator():
+    time.sleep(0.2)                      # a slow handshake is not waiting
+    return FakeConnection()
+
+
+def pool(**kwargs):
+    return InstrumentedQueuePool(slow_creator, pool_size=1, max_overflow=0, timeout=0.3, **kwargs)
+
+
+def test_opening_a_connection_is_not_wait_time():
+    p = pool()
+    p.connect().close()
+    p.connect().close()
+    stats = p.stats()
+    assert stats["checkouts"] == 2 and stats["checkout_timeouts"] == 0
+    assert stats["wait_seconds_total"] < 0.1
+
+
+def test_timeouts_are_counted_apart_from_checkouts():
+    p    = pool()
+    held = p.connect()
+    with pytest.raises(exc.TimeoutError):
+        p.connect()
+    stats = p.stats()
+    assert stats["checkouts"] == 1 and stats["checkout_timeouts"] == 1
+    assert 0.25 < stats["wait_seconds_total"] < 1.0
+    held.close()
+
+
+def test_waiting_for_a_returned_connection_is_wait_time():
+    p    = pool()
+    held = p.connect()
+    threading.Timer(0.15, held.close).start()
+    p.connect().close()
+    stats = p.stats()
+    assert stats["checkouts"] == 2 and stats["checkout_timeouts"] == 0
+    assert 0.1 < stats["wait_seconds_max"] < 0.3
@@ -0,0 +1,58 @@
+"""
+tests/test_ratelimit.py
+───────────────────────
+A request takes a token from every bucket it hits or from none: one
+rejected by a later rule doesn't spend the earlier rules' budget.
+The Redis backend runs its Lua script on fakeredis when installed.
+"""
+
+import pytest
+
+from rooms.ratelimit import _TAKE_LUA, MemoryBuckets, RateLimiter, RedisBuckets
+
+RULES = {"join_ip": "3/minute", "join_user": "10/minute", "join_room": "1/minute"}
+
+
+def memory_buckets():
+    return MemoryBuckets()
+
+
+def redis_buckets():
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    buckets = RedisBuckets("redis://localhost:6379/0", fallback=MemoryBuckets())
+    buckets._client = fakeredis.FakeRedis()
+    buckets._take   = buckets._client.register_script(_TAKE_LUA)
+    return buckets
+
+
+@pytest.fixture(params=[memory_buckets, redis_buckets], ids=["memory", "redis"])
+def limiter(request):
+    return RateLimiter(RULES, request.param())
+
+
+def join(limiter, room):
+    return limiter.check(("join_ip", "1.2.3.4"), ("join_user", 7), ("join_room", room))
+
+
+def test_rejected_request_spends_no_tokens(limiter):
+    assert join(limiter, room=1) == 0.0
+    for _ in range(5):                                   # room 1 is out of tokens
+        assert join(limiter, room=1) > 0
+    # The IP had 3 tokens; only the first join took one.
+    assert join(limiter, room=2) == 0.0
+    assert join(limiter, room=3) == 0.0
+    assert join(limiter, room=4) > 0
+    assert limiter.stats()["rejected"] == {"join_ip": 1, "join_user": 0, "join_room": 5}
+    assert limiter.stats()["allowed"] == {"join_ip": 3, "join_user": 3, "join_room": 3}
+
+
+def test_retry_after_is_for_the_first_empty_bucket(limiter):
+    join(limiter, room=1)
+    retry_after = join(limiter, room=1)
+    assert 59 < retry_after <= 60                        # join_room refills one token a minute
+
+
+def test_disabled_limiter_allows_everything():
+    limiter = RateLimiter(RULES, MemoryBuckets(), enabled=False)
+    assert all(join(limiter, room=1) == 0.0 for _ in range(10))
@@ -0,0 +1,181 @@
+"""
+tests/test_replicas.py
+──────────────────────
+Read-replica routing (rooms/db/replicas.py) against two local databases:
+the test database as the primary and "<name>_replica" as the replica.
+Each holds a room the other doesn't, so a listing shows which one served it.
+"""
+
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from rooms.analytics import room_stats
+from rooms.db import replicas
+from rooms.db.replicas import PIN_KEY, replica_set
+
+INSERT_ROOM = """
+    INSERT INTO rooms (name, description, whatsapp_link, password, created_at)
+    VALUES (:name, '', 'https://chat.whatsapp.com/x', '123456', :created_at)
+"""
+
+
+@pytest.fixture
+def rooms(database_url, replica_database_url):
+    """One room on each database, newer than anything else; (primary name, replica name)."""
+    names   = {url: f"test-{uuid.uuid4().hex[:12]}" for url in (database_url, replica_database_url)}
+    engines = [create_engine(url) for url in names]
+    future  = datetime.utcnow() + timedelta(days=3650)
+    for engine, name in zip(engines, names.values()):
+        with engine.begin() as conn:
+            conn.execute(text(INSERT_ROOM), {"name": name, "created_at": future})
+    yield names[database_url], names[replica_database_url]
+    for engine in engines:
+        with engine.begin() as conn:
+            conn.execute(text("DELETE FROM rooms WHERE created_at >= :future OR name LIKE 'test-%'"),
+                         {"future": future})
+        engine.dispose()
+
+
+@pytest.fixture
+def account_id(database_url):
+    """An account on the primary, for views that write."""
+    engine = create_engine(database_url)
+    with engine.begin() as conn:
+        account = conn.execute(text(
+            "INSERT INTO accounts (username, email, display_name, created_at) "
+            "VALUES (:name, :name || '@example.com', :name, now()) RETURNING id"
+        ), {"name": f"replica-{uuid.uuid4().hex[:12]}"}).scalar()
+    yield account
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM accounts WHERE id = :id"), {"id": account})
+    engine.dispose()
+
+
+@pytest.fixture
+def replica_app(app_factory, replica_database_url):
+    def make(**settings):
+        settings = {"DB_REPLICA_URIS": [replica_database_url], "DB_REPLICA_CHECK_INTERVAL": 0,
+                    "CACHE_ENABLED": False, **settings}
+        return app_factory(**settings)
+    return make
+
+
+def logged_in(app, account_id=1):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["account_id"] = account_id
+    return client
+
+
+def listed(client):
+    response = client.get("/api/rooms?limit=20&fields=id,name")
+    assert response.status_code == 200
+    return {room["name"] for room in response.get_json()}
+
+
+def test_read_only_view_reads_the_replica(replica_app, rooms):
+    primary_room, replica_room = rooms
+    app = replica_app()
+    names = listed(logged_in(app))
+    assert replica_room in names and primary_room not in names
+    with app.app_context():
+        stats = replica_set().stats()
+    [(name, health)] = stats["replicas"].items()
+    assert health["healthy"] and stats["reads"] == {name: 1}
+
+
+def test_write_pins_the_client_to_the_primary(replica_app, rooms, account_id):
+    primary_room, replica_room = rooms
+    app    = replica_app(DB_REPLICA_PIN_SECONDS=60)
+    writer = logged_in(app, account_id)
+    created = f"test-{uuid.uuid4().hex[:12]}"
+    response = writer.post("/api/rooms", json={"name": created, "description": "",
+                                               "whatsapp_link": "https://chat.whatsapp.com/x",
+                                               "password": "123456"})
+    assert response.get_json()["success"]
+
+    names = listed(writer)
+    assert primary_room in names and replica_room not in names
+    assert replica_room in listed(logged_in(app))          # other clients still read the replica
+
+    with writer.session_transaction() as session:
+        session[PIN_KEY] = 0                                # the pin expired
+    assert replica_room in listed(writer)
+
+
+def test_lagging_replica_is_taken_out_of_rotation(replica_app, rooms, monkeypatch):
+    primary_room, replica_room = rooms
+    app    = replica_app(DB_REPLICA_MAX_LAG=5, DB_REPLICA_CHECK_INTERVAL=3600)
+    client = logged_in(app)
+
+    monkeypatch.setattr(replicas, "LAG_SQL", "SELECT 30")   # 30 s behind
+    names = listed(client)
+    assert primary_room in names and replica_room not in names
+    with app.app_context():
+        [health] = replica_set().stats()["replicas"].values()
+        assert not health["healthy"] and health["lag_seconds"] == 30
+
+        monkeypatch.setattr(replicas, "LAG_SQL", "SELECT 0")  # caught up
+        replica_set().check(force=True)
+    assert replica_room in listed(client)
+
+
+def test_unreachable_replica_falls_back_to_the_primary(replica_app, rooms):
+    primary_room, _ = rooms
+    app = replica_app(DB_REPLICA_URIS=["postgresql+psycopg2://postgres@127.0.0.1:1/missing"],
+                      DB_REPLICA_CONNECT_TIMEOUT=1)
+    assert primary_room in listed(logged_in(app))
+    with app.app_context():
+        stats = replica_set().stats()
+    assert not any(r["healthy"] for r in stats["replicas"].values())
+    assert stats["reads"] == {"primary": 1}
+
+
+def test_cached_listings_are_filled_from_the_primary(replica_app, rooms):
+    primary_room, replica_room = rooms
+    app    = replica_app(CACHE_ENABLED=True)
+    client = logged_in(app)
+    for _ in range(2):                                      # the fill, then a cache hit
+        names = listed(client)
+        assert primary_room in names and replica_room not in names
+
+
+def test_trending_ranking_is_computed_on_the_primary(replica_app, rooms, database_url, replica_database_url):
+    # Each database counts joins only for its own room: the ranking shows where it was read.
+    ranked = {}
+    for url, name in zip((database_url, replica_database_url), rooms):
+        engine = create_engine(url)
+        with engine.begin() as conn:
+            ranked[url] = conn.execute(text("SELECT id FROM rooms WHERE name = :name"), {"name": name}).scalar()
+            conn.execute(text("INSERT INTO room_stats (room_id, bucket, joins, failed_joins) "
+                              "VALUES (:id, date_trunc('hour', now() AT TIME ZONE 'utc'), 5, 0)"),
+                         {"id": ranked[url]})
+        engine.dispose()
+
+    app = replica_app()
+    assert logged_in(app).get("/api/rooms?sort=trending&fields=id").status_code == 200
+    with app.app_context():
+        ids = room_stats().ranking().ids                    # computed by that request
+    assert ranked[database_url] in ids and ranked[replica_database_url] not in ids
+
+
+def test_cached_rooms_are_filled_from_the_primary(replica_app, rooms, database_url, replica_database_url):
+    # A room just created on the primary that the replica hasn't caught up with.
+    primary, replica = create_engine(database_url), create_engine(replica_database_url)
+    with primary.begin() as conn:
+        room_id = conn.execute(text(
+            "INSERT INTO rooms (name, description, whatsapp_link, password, created_at) "
+            "VALUES (:name, '', 'https://chat.whatsapp.com/primary', '654321', now()) RETURNING id"
+        ), {"name": f"test-{uuid.uuid4().hex[:12]}"}).scalar()
+    with replica.begin() as conn:
+        conn.execute(text("DELETE FROM rooms WHERE id = :id"), {"id": room_id})
+    primary.dispose()
+    replica.dispose()
+
+    client = logged_in(replica_app(CACHE_ENABLED=True))
+    for _ in range(2):                                      # the fill, then a cache hit
+        response = client.post("/api/rooms/join", json={"room_id": room_id, "password": "654321"})
+        assert response.get_json() == {"success": True, "link": "https://chat.whatsapp.com/primary"}
@@ -0,0 +1,54 @@
+"""
+tests/test_search.py
+────────────────────
+The in-process search index only changes when a transaction commits, and
+only in the app whose session committed it.
+"""
+
+from rooms.Models import db, Room
+from rooms.search import search_backend
+
+from conftest import make_app
+
+
+def add_room(name):
+    room = Room(name=name, description="", whatsapp_link="https://chat.whatsapp.com/x", password="123456")
+    db.session.add(room)
+    db.session.flush()
+    return room
+
+
+def test_index_follows_commits_not_rollbacks(sqlite_app):
+    with sqlite_app.app_context():
+        index = search_backend()
+        assert index.search("python", 10) == []              # loaded, and kept in step from here
+
+        committed = add_room("Python Developers")
+        db.session.commit()
+        assert index.search("pyth", 10) == [committed.id]
+
+        add_room("Python Beginners")                         # flushed, then rolled back
+        db.session.rollback()
+        assert index.search("beginners", 10) == []
+
+        committed.name = "Rust Developers"
+        db.session.commit()
+        assert index.search("python", 10) == [] and index.search("rust", 10) == [committed.id]
+
+        db.session.delete(committed)
+        db.session.commit()
+        assert index.search("rust", 10) == []
+
+
+def test_commits_only_reach_their_own_apps_index(sqlite_app, tmp_path):
+    other = make_app(f"sqlite:///{tmp_path / 'other.db'}", SEARCH_BACKEND="memory")
+    with other.app_context():
+        search_backend().search("anything", 10)
+
+    with sqlite_app.app_context():
+        search_backend().search("anything", 10)
+        add_room("Golang Gophers")
+        db.session.commit()
+
+    with other.app_context():
+        assert search_backend().search("golang", 10) == []
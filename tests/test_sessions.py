@@ -0,0 +1,48 @@
+"""
+tests/test_sessions.py
+──────────────────────
+Server-side sessions get a new id at login: an id issued before login
+(here by a failed login's flash) never becomes an authenticated session.
+"""
+
+import uuid
+
+import pytest
+from sqlalchemy import text
+
+from rooms.Models import db
+
+
+@pytest.fixture
+def server_side_app(app_factory):
+    app = app_factory(SESSION_BACKEND="memory")
+    yield app
+    with app.app_context():
+        db.session.execute(text("DELETE FROM accounts WHERE username LIKE 'session-%'"))
+        db.session.commit()
+
+
+def session_id(client, app):
+    cookie = client.get_cookie(app.config["SESSION_COOKIE_NAME"])
+    return cookie and cookie.value
+
+
+def test_login_moves_the_session_to_a_new_id(server_side_app):
+    app, client = server_side_app, server_side_app.test_client()
+    username = f"session-{uuid.uuid4().hex[:8]}"
+    client.post("/signup", data={"username": username, "email": f"{username}@example.com",
+                                 "password": "s3cret-pass", "ConfirmPassword": "s3cret-pass"})
+
+    client.post("/login", data={"identifier": f"nobody-{username}", "password": "wrong"})
+    before = session_id(client, app)
+    assert before                                            # the failure's flash got a session
+
+    response = client.post("/login", data={"identifier": username, "password": "s3cret-pass"})
+    assert response.status_code == 302 and response.location.endswith("/dashboard")
+    after = session_id(client, app)
+    assert after and after != before
+    assert client.get("/api/rooms?limit=1").status_code == 200
+
+    fixed = app.test_client()                                # whoever planted the old id
+    fixed.set_cookie(app.config["SESSION_COOKIE_NAME"], before)
+    assert fixed.get("/api/rooms?limit=1").status_code == 401
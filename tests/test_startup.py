@@ -0,0 +1,52 @@
+"""
+tests/test_startup.py
+─────────────────────
+Startup cost, as paid by every worker, CLI command and test run, checked
+in fresh interpreters since this test process has long imported it all:
+
+    • `import app` (which creates the app) stays within
+      STARTUP_IMPORT_BUDGET_MS, measured with `python -X importtime`
+    • create_app() leaves the heavy optional dependencies unimported
+      (rooms/factory.py); each loads on first use
+
+benchmarks/bench_startup.py reports the same numbers in detail.
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from benchmarks.bench_startup import importtime, python
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENV  = dict(os.environ, GOOGLE_CLIENT_ID="test-client", GOOGLE_CLIENT_SECRET="test-secret")
+
+# Generous for slow CI machines; today's tree imports in well under half of it.
+IMPORT_BUDGET_MS = float(os.getenv("STARTUP_IMPORT_BUDGET_MS", "2000"))
+
+CHILD = """
+import json, sys
+from rooms.factory import LAZY_MODULES, create_app
+app = create_app()
+print(json.dumps(sorted(m for m in LAZY_MODULES if m in sys.modules)))
+"""
+
+
+def test_create_app_imports_no_lazy_dependency():
+    result = subprocess.run([sys.executable, "-c", CHILD], cwd=ROOT, env=ENV,
+                            capture_output=True, text=True, check=True)
+    assert json.loads(result.stdout.splitlines()[-1]) == []
+
+
+def test_import_time_within_budget():
+    python("-c", "import app", env=ENV)                 # warm the bytecode cache
+    runs = [importtime(ENV) for _ in range(3)]
+    import_ms = statistics.median(total for total, _ in runs) / 1000
+    _, modules = runs[-1]
+    slowest = sorted(((c, name) for name, (_, c) in modules.items() if name != "app"), reverse=True)[:5]
+    assert import_ms <= IMPORT_BUDGET_MS, (
+        f"import app took {import_ms:.0f} ms (budget {IMPORT_BUDGET_MS:.0f} ms); slowest: "
+        + ", ".join(f"{name} {c / 1000:.0f} ms" for c, name in slowest)
+    )